@@ -106,7 +106,8 @@ class Neo4jUploader:
                     j.salary_min = $salary_min,
                     j.salary_max = $salary_max,
                     j.annual_months = $annual_months,
-                    j.publish_time = $publish_time
+                    j.publish_time = $publish_time,
+                    j.updated_at = datetime()
             """,
                 url=job_url,
                 title=job_data.get('职位', ''),
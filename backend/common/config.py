@@ -16,6 +16,8 @@ PROJECT_ROOT = BACKEND_DIR.parent
 GRAPHSAGE_MODULE_PATH = PROJECT_ROOT / "模块_推荐系统" / "深度学习GraphSAGE" / "源代码" / "核心模块"
 GRAPHSAGE_MODEL_PATH = GRAPHSAGE_MODULE_PATH / "输出" / "模型权重" / "graphsage_model.pth"
 GRAPHSAGE_DATA_PATH = GRAPHSAGE_MODULE_PATH / "graph_data.pt"
+# 训练后导出的嵌入包根目录（存在时服务优先从嵌入包启动）
+GRAPHSAGE_BUNDLE_PATH = GRAPHSAGE_MODULE_PATH / "输出" / "嵌入包"
 
 # .env 文件路径
 ENV_FILE_PATH = BACKEND_DIR / ".env"
@@ -27,10 +29,43 @@ load_dotenv(ENV_FILE_PATH)
 NEO4J_URI = os.getenv("neo4j_uri", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("neo4j_user", "neo4j")
 NEO4J_PASSWORD = os.getenv("neo4j_password", "TYH041113")
+# 连接池（每个进程一个驱动，各服务与推荐器共用）
+NEO4J_MAX_POOL_SIZE = int(os.getenv("neo4j_max_pool_size", "50"))
+# 连接池耗尽时等待空闲连接的最长时间（秒）
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("neo4j_acquisition_timeout", "30"))
+NEO4J_CONNECTION_TIMEOUT = float(os.getenv("neo4j_connection_timeout", "30"))
+# 空闲超过该时长的连接取出前先做存活检测（秒）
+NEO4J_LIVENESS_CHECK_TIMEOUT = float(os.getenv("neo4j_liveness_check_timeout", "60"))
+# 后台健康检查间隔（秒），0 表示关闭
+NEO4J_HEALTH_CHECK_INTERVAL = float(os.getenv("neo4j_health_check_interval", "60"))
+# 只读副本地址（逗号分隔），读查询在副本间轮询；为空时读会话发往 NEO4J_URI
+# （NEO4J_URI 为 neo4j:// 集群地址时驱动自动把读会话路由到 follower）
+NEO4J_READ_URIS = [uri.strip() for uri in os.getenv("neo4j_read_uris", "").split(",") if uri.strip()]
 
 # ==================== Neon PostgreSQL 配置 ====================
 NEON_DATABASE_URL = os.getenv("NEON_DATABASE_URL", "")
 
+# ==================== GraphSAGE 在线更新配置 ====================
+# 新职位归纳式嵌入的轮询间隔（秒），0 表示关闭
+GRAPHSAGE_REFRESH_INTERVAL = float(os.getenv("graphsage_refresh_interval", "30"))
+# 嵌入包 CURRENT 指针的检查间隔（秒），0 表示关闭热切换
+GRAPHSAGE_BUNDLE_POLL_INTERVAL = float(os.getenv("graphsage_bundle_poll_interval", "5"))
+# 召回向量精度：float32 / float16 / int8（量化时召回候选用 float32 精确重排）
+GRAPHSAGE_RECALL_PRECISION = os.getenv("graphsage_recall_precision", "float32")
+# 课程 -> 技能映射的目录变化检查间隔（秒），0 表示只在启动时加载
+COURSE_SKILL_REFRESH_INTERVAL = float(os.getenv("course_skill_refresh_interval", "60"))
+# 技能索引（规范化/别名）的词表变化检查间隔（秒），0 表示只在启动时加载
+SKILL_INDEX_REFRESH_INTERVAL = float(os.getenv("skill_index_refresh_interval", "300"))
+# 技能诊断同行对比的采样人数上限（统计在图数据库中完成，只返回均值与热门技能）
+PEER_SAMPLE_LIMIT = int(os.getenv("peer_sample_limit", "2000"))
+# 管理接口（模型版本切换/回滚）令牌，为空时管理接口关闭
+ADMIN_TOKEN = os.getenv("admin_token", "")
+
+# ==================== 性能剖析配置 ====================
+PROFILING_ENABLED = os.getenv("profiling_enabled", "true").lower() in ("1", "true", "yes")
+# 采样比例（0~1），带 x-profile 请求头的请求总是被采样
+PROFILING_SAMPLE_RATE = float(os.getenv("profiling_sample_rate", "0.05"))
+
 # ==================== JWT 配置 ====================
 JWT_SECRET = os.getenv("jwt_secret_key", "zhitung-ai-job-rec-secret-key-2026")
 JWT_ALGORITHM = os.getenv("algorithm", "HS256")
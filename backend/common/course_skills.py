@@ -0,0 +1,169 @@
+"""
+课程 -> 技能映射缓存
+====================
+课程目录（Course 与 TEACHES_SKILL 关系）很少变化，却在每次 AI 推荐、技能诊断、推荐解释中被反复遍历。
+启动时一次性加载为内存字典，之后课程相关的技能计算都是集合并集:
+- skills_for(courses):      课程名 -> 技能集合的并集（c.name 与 c.course_name 都可作为键）
+- courses_for_skills(...):  技能 -> 课程的反向映射，用于按缺口技能推荐课程
+后台线程定期比对课程数 / TEACHES_SKILL 关系数（计数存储，无需扫描），变化时整体重新加载；
+另按 max_age 定期全量重载，覆盖数量不变的改名/替换。
+"""
+import time
+import logging
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+COURSE_SKILL_QUERY = """
+MATCH (c:Course)
+OPTIONAL MATCH (c)-[:TEACHES_SKILL]->(sk:Skill)
+RETURN c.name AS name, c.course_name AS course_name, COLLECT(DISTINCT sk.name) AS skills
+"""
+
+# 两个计数都直接读取计数存储
+COURSE_COUNT_QUERY = "MATCH (c:Course) RETURN count(c) AS n"
+LINK_COUNT_QUERY = "MATCH ()-[r:TEACHES_SKILL]->() RETURN count(r) AS n"
+
+EMPTY: FrozenSet[str] = frozenset()
+
+
+class CourseSkillIndex:
+    """
+    课程 -> 技能 的内存索引（线程安全：刷新时整体替换字典引用，读方不加锁）
+
+    Args:
+        conn: 提供 query(cypher, parameters) 的 Neo4j 连接
+        interval: 目录变化的检查间隔（秒），0 表示不自动刷新
+        max_age: 无论是否检测到变化，超过该时长（秒）后全量重载
+    """
+
+    def __init__(self, conn, interval: float = 60.0, max_age: float = 3600.0):
+        self.conn = conn
+        self.interval = interval
+        self.max_age = max_age
+        self.course_skills: Dict[str, FrozenSet[str]] = {}
+        self.skill_courses: Dict[str, Tuple[str, ...]] = {}
+        self.fingerprint: Optional[Tuple[int, int]] = None
+        self.loaded_at = 0.0
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at > 0
+
+    # ==================== 加载与刷新 ====================
+
+    def _fingerprint(self) -> Tuple[int, int]:
+        courses = self.conn.query(COURSE_COUNT_QUERY)
+        links = self.conn.query(LINK_COUNT_QUERY)
+        return (courses[0]["n"] if courses else 0, links[0]["n"] if links else 0)
+
+    def load(self) -> int:
+        """全量加载课程目录，返回课程数"""
+        with self._load_lock:
+            start = time.time()
+            fingerprint = self._fingerprint()
+            course_skills: Dict[str, FrozenSet[str]] = {}
+            skill_courses: Dict[str, List[str]] = {}
+            records = self.conn.query(COURSE_SKILL_QUERY)
+            for record in records:
+                skills = frozenset(s for s in record.get("skills") or [] if s)
+                name = record.get("name")
+                for key in (name, record.get("course_name")):
+                    if key:
+                        course_skills[key] = course_skills.get(key, EMPTY) | skills
+                if name:
+                    for skill in skills:
+                        skill_courses.setdefault(skill, []).append(name)
+
+            # 整体替换引用
+            self.course_skills = course_skills
+            self.skill_courses = {skill: tuple(dict.fromkeys(names)) for skill, names in skill_courses.items()}
+            self.fingerprint = fingerprint
+            self.loaded_at = time.time()
+            logger.info(f"✅ 课程技能映射已加载: {len(records)} 门课程, {len(self.skill_courses)} 个技能 "
+                        f"({(self.loaded_at - start) * 1000:.0f}ms)")
+            return len(records)
+
+    def invalidate(self) -> None:
+        """课程目录被本进程修改后调用：下次检查时强制重载"""
+        self.fingerprint = None
+
+    def check(self) -> bool:
+        """目录有变化（或超过 max_age）时重新加载，返回是否重载"""
+        stale = not self.loaded or self.fingerprint is None or time.time() - self.loaded_at > self.max_age
+        if not stale and self._fingerprint() == self.fingerprint:
+            return False
+        self.load()
+        return True
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning(f"⚠️ 课程技能映射刷新失败: {e}")
+
+    def start(self) -> Optional[threading.Thread]:
+        if self.interval <= 0:
+            return None
+        thread = threading.Thread(target=self._loop, name="course-skill-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    # ==================== 查询 ====================
+
+    def _ensure_loaded(self):
+        """启动时加载失败的情况下，首次查询时再加载一次"""
+        if not self.loaded:
+            self.load()
+
+    def skills_of(self, course: str) -> FrozenSet[str]:
+        return self.course_skills.get(course, EMPTY)
+
+    def skills_for(self, courses: Iterable[str]) -> Set[str]:
+        """多门课程所教授技能的并集"""
+        self._ensure_loaded()
+        course_skills = self.course_skills
+        skills: Set[str] = set()
+        for course in courses or ():
+            skills |= course_skills.get(course, EMPTY)
+        return skills
+
+    def sources(self, courses: Iterable[str], skills: Iterable[str]) -> Dict[str, List[str]]:
+        """skills 中由 courses 教授的技能 -> 教授它的课程列表（推荐解释使用）"""
+        self._ensure_loaded()
+        course_skills = self.course_skills
+        wanted = set(skills)
+        result: Dict[str, List[str]] = {}
+        for course in dict.fromkeys(courses or ()):
+            for skill in course_skills.get(course, EMPTY) & wanted:
+                result.setdefault(skill, []).append(course)
+        return result
+
+    def courses_for_skills(self, skills: Iterable[str], limit: Optional[int] = None) -> List[dict]:
+        """
+        按覆盖的技能数推荐课程
+
+        Returns:
+            [{'name', 'covers', 'priority'}]，按覆盖技能数降序
+        """
+        self._ensure_loaded()
+        covers: Dict[str, List[str]] = {}
+        for skill in dict.fromkeys(skills):
+            for course in self.skill_courses.get(skill, ()):
+                covers.setdefault(course, []).append(skill)
+        ranked = sorted(covers.items(), key=lambda kv: len(kv[1]), reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [{"name": name, "covers": covered, "priority": len(covered)} for name, covered in ranked]
+
+    def stats(self) -> dict:
+        return {
+            "courses": len(self.course_skills),
+            "skills": len(self.skill_courses),
+            "fingerprint": self.fingerprint,
+            "loaded_at": self.loaded_at,
+        }
@@ -1,41 +1,67 @@
 """
 数据库连接模块 - 增强版
-- 连接池管理
-- 健康检查和自动重连
+- 连接池管理（每个进程一个 Neo4j 驱动，各服务与推荐器共用）
+- 读写分离：读查询使用 READ_ACCESS 会话，路由到集群 follower 或配置的只读副本；写操作发往 leader
+- 因果书签：同一用户写入后的读取等待副本追上该写入（读己之写）；
+  书签同时经响应头 X-Neo4j-Bookmarks 返回给客户端，客户端之后的请求原样带回，
+  多 worker 部署下写入与随后的读取落在不同进程时同样生效
+- 后台健康检查和自动重连
+- 连接池使用指标
 - 完善的异常处理
 """
 import time
 import logging
-from typing import Optional, List, Dict, Any
+import threading
+from contextvars import ContextVar
+from collections import OrderedDict
+from itertools import count
+from typing import Optional, List, Dict, Any, Iterable, Union
 from contextlib import contextmanager
 from threading import Lock
 
-from neo4j import GraphDatabase
-from neo4j.exceptions import ServiceUnavailable, SessionExpired, AuthError
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS, Bookmarks
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, AuthError, ClientError
 from supabase import create_client, Client
 from . import config
+from .profiling import track, ProfiledCursor, registry
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 书签键：单个键或多个键（如注册时同时登记用户名与学号）
+BookmarkKey = Union[None, str, Iterable[str]]
+
+# 客户端书签的请求/响应头，以及单个请求最多接受的书签数
+BOOKMARK_HEADER = b"x-neo4j-bookmarks"
+MAX_CLIENT_BOOKMARKS = 16
+
+# 当前请求的书签状态 {"received": 客户端带来的书签, "written": 本次请求写入产生的书签}，由 BookmarkMiddleware 设置
+_request_bookmarks: ContextVar[Optional[Dict[str, Any]]] = ContextVar("neo4j_request_bookmarks", default=None)
+
 # ==================== Neo4j 连接管理 ====================
 
 class Neo4jConnectionManager:
     """
-    Neo4j 连接管理器
-    - 连接池由 Neo4j 驱动内置管理
-    - 健康检查和自动重连
+    Neo4j 连接管理器（驱动提供者）
+    - 连接池由 Neo4j 驱动内置管理，池大小/获取超时/存活检测由 config 配置
+    - query() 为只读查询（READ_ACCESS），execute_write() 为写操作（WRITE_ACCESS）；
+      neo4j:// 集群地址时驱动自动把读会话路由到 follower，
+      另配置了 NEO4J_READ_URIS 时读查询在各只读副本间轮询，副本不可用时回落到主库
+    - bookmark_key（通常为学号/用户名）下记录写操作的书签，同一键的读查询携带书签；
+      书签表是进程内的，跨 worker 的读己之写依赖客户端经 BookmarkMiddleware 带回的书签
+    - 健康检查在后台线程中进行，请求路径上不再同步 verify_connectivity
+    - 提供与驱动相同的 session() 接口，推荐器/嵌入包可直接把它（或只读的 reader）当作驱动使用，
+      重连后持有方无需更新引用
     - 线程安全的单例模式
     """
     
     _instance = None
     _lock = Lock()
     
-    # 连接池配置
-    MAX_CONNECTION_POOL_SIZE = 50
-    CONNECTION_TIMEOUT = 30  # 秒
     MAX_RETRY_ATTEMPTS = 3
     RETRY_DELAY = 1  # 秒
+    # 最多保留的书签键数（按最近写入淘汰）
+    MAX_BOOKMARK_KEYS = 10000
     
     def __new__(cls):
         if cls._instance is None:
@@ -50,118 +76,416 @@ class Neo4jConnectionManager:
             return
         
         self._driver = None
-        self._last_health_check = 0
-        self._health_check_interval = 60  # 每60秒检查一次
+        self._replicas: List[Dict[str, Any]] = []
+        self._replica_cursor = count()
+        self._bookmarks: "OrderedDict[str, Bookmarks]" = OrderedDict()
+        self._connect_lock = Lock()
+        self._stats_lock = Lock()
+        self._healthy = False
+        self._last_health_check = 0.0
+        self._health_check_interval = config.NEO4J_HEALTH_CHECK_INTERVAL
+        self._health_thread = None
+        self._stats = {
+            "sessions_active": 0,
+            "sessions_peak": 0,
+            "sessions_total": 0,
+            "acquisition_timeouts": 0,
+            "reconnects": 0,
+            "reads": 0,
+            "replica_reads": 0,
+            "replica_fallbacks": 0,
+            "writes": 0,
+        }
+        self.reader = _ReadOnlyDriver(self)
         self._initialized = True
         self._connect()
+        self._connect_replicas()
+        self.start_health_check()
+        registry.add_gauges(self.gauges)
+    
+    @staticmethod
+    def _new_driver(uri: str):
+        return GraphDatabase.driver(
+            uri,
+            auth=(config.NEO4J_USER, config.NEO4J_PASSWORD),
+            max_connection_pool_size=config.NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=config.NEO4J_ACQUISITION_TIMEOUT,
+            connection_timeout=config.NEO4J_CONNECTION_TIMEOUT,
+            liveness_check_timeout=config.NEO4J_LIVENESS_CHECK_TIMEOUT,
+        )
     
     def _connect(self) -> bool:
-        """建立 Neo4j 连接"""
-        try:
-            if self._driver:
-                self._driver.close()
-            
-            self._driver = GraphDatabase.driver(
-                config.NEO4J_URI,
-                auth=(config.NEO4J_USER, config.NEO4J_PASSWORD),
-                max_connection_pool_size=self.MAX_CONNECTION_POOL_SIZE,
-                connection_timeout=self.CONNECTION_TIMEOUT,
-            )
-            
-            # 验证连接
-            self._driver.verify_connectivity()
-            logger.info(f"✅ Neo4j 连接成功: {config.NEO4J_URI}")
-            return True
-            
-        except AuthError as e:
-            logger.error(f"❌ Neo4j 认证失败: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"❌ Neo4j 连接失败: {e}")
-            return False
+        """建立 Neo4j 连接（新驱动就绪后再替换并关闭旧驱动）"""
+        with self._connect_lock:
+            driver = None
+            try:
+                driver = self._new_driver(config.NEO4J_URI)
+                
+                # 验证连接
+                driver.verify_connectivity()
+                old, self._driver = self._driver, driver
+                if old:
+                    old.close()
+                self._healthy = True
+                self._last_health_check = time.time()
+                logger.info(f"✅ Neo4j 连接成功: {config.NEO4J_URI} (连接池上限 {config.NEO4J_MAX_POOL_SIZE})")
+                return True
+                
+            except AuthError as e:
+                logger.error(f"❌ Neo4j 认证失败: {e}")
+                if driver:
+                    driver.close()
+                raise
+            except Exception as e:
+                self._healthy = False
+                logger.error(f"❌ Neo4j 连接失败: {e}")
+                if driver:
+                    driver.close()
+                return False
+    
+    def _connect_replicas(self):
+        """为配置的只读副本各建一个驱动（连接池上限按副本分别计算），不可用的副本由健康检查恢复"""
+        for uri in config.NEO4J_READ_URIS:
+            replica = {"uri": uri, "driver": self._new_driver(uri), "healthy": False}
+            try:
+                replica["driver"].verify_connectivity()
+                replica["healthy"] = True
+                logger.info(f"✅ Neo4j 只读副本: {uri}")
+            except Exception as e:
+                logger.warning(f"⚠️ Neo4j 只读副本不可用: {uri} ({e})")
+            self._replicas.append(replica)
     
     def _ensure_connection(self):
-        """确保连接有效，必要时重连"""
-        current_time = time.time()
-        
-        # 定期健康检查
-        if current_time - self._last_health_check > self._health_check_interval:
-            self._last_health_check = current_time
-            if not self.health_check():
-                self._reconnect()
+        """启动时连接失败的情况下，首次使用时再连接（不做网络检查）"""
+        if self._driver is None:
+            self._reconnect()
     
     def _reconnect(self):
         """重连机制"""
         for attempt in range(self.MAX_RETRY_ATTEMPTS):
             logger.warning(f"🔄 尝试重连 Neo4j (第 {attempt + 1}/{self.MAX_RETRY_ATTEMPTS} 次)")
             if self._connect():
+                with self._stats_lock:
+                    self._stats["reconnects"] += 1
                 return
             time.sleep(self.RETRY_DELAY * (attempt + 1))  # 指数退避
         
         logger.error("❌ Neo4j 重连失败，已达最大重试次数")
     
     def health_check(self) -> bool:
-        """健康检查"""
+        """健康检查（主库；只读副本的状态一并刷新）"""
+        for replica in self._replicas:
+            try:
+                replica["driver"].verify_connectivity()
+                replica["healthy"] = True
+            except Exception as e:
+                if replica["healthy"]:
+                    logger.warning(f"⚠️ Neo4j 只读副本健康检查失败: {replica['uri']} ({e})")
+                replica["healthy"] = False
+        
         if not self._driver:
             return False
         
         try:
             self._driver.verify_connectivity()
-            return True
+            self._healthy = True
         except Exception as e:
             logger.warning(f"⚠️ Neo4j 健康检查失败: {e}")
-            return False
+            self._healthy = False
+        self._last_health_check = time.time()
+        return self._healthy
     
-    def query(self, cypher: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict]:
-        """
-        执行 Cypher 查询
-        - 自动重试连接错误
-        - 返回记录列表
-        """
-        self._ensure_connection()
-        
+    def _health_loop(self):
+        while True:
+            time.sleep(self._health_check_interval)
+            try:
+                if not self.health_check():
+                    self._reconnect()
+            except Exception as e:
+                logger.warning(f"⚠️ Neo4j 后台健康检查出错: {e}")
+    
+    def start_health_check(self) -> Optional[threading.Thread]:
+        """启动后台健康检查线程（每个进程一个）"""
+        if self._health_check_interval <= 0 or self._health_thread is not None:
+            return self._health_thread
+        self._health_thread = threading.Thread(target=self._health_loop, name="neo4j-health", daemon=True)
+        self._health_thread.start()
+        return self._health_thread
+    
+    # ==================== 因果书签 ====================
+    
+    @staticmethod
+    def _keys(bookmark_key: BookmarkKey) -> List[str]:
+        if not bookmark_key:
+            return []
+        if isinstance(bookmark_key, str):
+            return [bookmark_key]
+        return [str(key) for key in bookmark_key if key]
+    
+    def bookmarks(self, bookmark_key: BookmarkKey) -> Optional[Bookmarks]:
+        """键下最近一次写入的书签（多个键时合并，并合并当前请求中客户端带来的书签），没有记录时为 None"""
+        found = [self._bookmarks.get(key) for key in self._keys(bookmark_key)]
+        request = _request_bookmarks.get()
+        if request is not None:
+            found.append(request["received"])
+        found = [b for b in found if b is not None]
+        if not found:
+            return None
+        merged = found[0]
+        for b in found[1:]:
+            merged = merged + b
+        return merged
+    
+    def _remember(self, bookmark_key: BookmarkKey, bookmarks: Optional[Bookmarks]):
+        if not bookmarks:
+            return
+        request = _request_bookmarks.get()
+        if request is not None:
+            # 随响应返回给客户端
+            request["written"] = bookmarks
+        with self._stats_lock:
+            for key in self._keys(bookmark_key):
+                self._bookmarks[key] = bookmarks
+                self._bookmarks.move_to_end(key)
+            while len(self._bookmarks) > self.MAX_BOOKMARK_KEYS:
+                self._bookmarks.popitem(last=False)
+    
+    # ==================== 查询 ====================
+    
+    def _read_replica(self) -> Optional[Dict[str, Any]]:
+        """轮询选择健康的只读副本，没有时返回 None（使用主库驱动）"""
+        healthy = [r for r in self._replicas if r["healthy"]]
+        if not healthy:
+            return None
+        return healthy[next(self._replica_cursor) % len(healthy)]
+    
+    def _run(self, cypher: str, parameters: Optional[Dict[str, Any]], access_mode: str,
+             bookmark_key: BookmarkKey) -> List[Dict]:
+        """执行查询并返回记录列表；连接错误时重试，只读副本不可用时回落到主库"""
+        use_replica = True
         for attempt in range(self.MAX_RETRY_ATTEMPTS):
             try:
-                with self._driver.session() as session:
+                with track("neo4j", cypher), self.session(access_mode=access_mode, bookmark_key=bookmark_key,
+                                                          use_replica=use_replica) as session:
                     result = session.run(cypher, parameters or {})
                     return [record.data() for record in result]
                     
             except (ServiceUnavailable, SessionExpired) as e:
                 logger.warning(f"⚠️ Neo4j 连接异常 (尝试 {attempt + 1}): {e}")
-                if attempt < self.MAX_RETRY_ATTEMPTS - 1:
-                    self._reconnect()
-                    time.sleep(self.RETRY_DELAY)
-                else:
+                if attempt >= self.MAX_RETRY_ATTEMPTS - 1:
                     raise
+                if access_mode == READ_ACCESS and use_replica and self._replicas:
+                    # 先改由主库读取，不重建主库驱动
+                    use_replica = False
+                    with self._stats_lock:
+                        self._stats["replica_fallbacks"] += 1
+                    continue
+                self._reconnect()
+                time.sleep(self.RETRY_DELAY)
                     
+            except ClientError as e:
+                request = _request_bookmarks.get()
+                if "Bookmark" in (e.code or "") and request is not None and request["received"] is not None:
+                    # 客户端带来的书签无效（如数据库已重建）：忽略后重试
+                    logger.warning(f"⚠️ 忽略无效的客户端书签: {e.code}")
+                    request["received"] = None
+                    continue
+                logger.error(f"❌ Neo4j 查询错误: {e}")
+                raise
             except Exception as e:
                 logger.error(f"❌ Neo4j 查询错误: {e}")
                 raise
         
         return []
     
-    def execute_write(self, cypher: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict]:
-        """执行写操作（与 query 相同，语义更明确）"""
-        return self.query(cypher, parameters)
+    def query(self, cypher: str, parameters: Optional[Dict[str, Any]] = None,
+              bookmark_key: BookmarkKey = None) -> List[Dict]:
+        """
+        执行只读 Cypher 查询（READ_ACCESS，可路由到 follower / 只读副本）
+        - bookmark_key 非空时等待该键最近的写入可见后再读
+        - 返回记录列表
+        """
+        return self._run(cypher, parameters, READ_ACCESS, bookmark_key)
+    
+    def execute_write(self, cypher: str, parameters: Optional[Dict[str, Any]] = None,
+                      bookmark_key: BookmarkKey = None) -> List[Dict]:
+        """
+        执行写操作（WRITE_ACCESS，发往 leader / 主库）
+        - bookmark_key 非空时记录本次写入的书签，同一键之后的读取可见这次写入
+        """
+        return self._run(cypher, parameters, WRITE_ACCESS, bookmark_key)
     
     @contextmanager
-    def session(self):
-        """获取原始 session（用于事务操作）"""
+    def session(self, access_mode: str = WRITE_ACCESS, bookmark_key: BookmarkKey = None,
+                use_replica: bool = True, **kwargs):
+        """
+        获取原始 session（用于事务操作），其余参数透传给 driver.session
+        - access_mode 为 READ_ACCESS 时优先使用只读副本
+        - bookmark_key 非空时携带该键的书签；写会话结束后记录新书签
+        """
         self._ensure_connection()
-        session = self._driver.session()
+        replica = self._read_replica() if access_mode == READ_ACCESS and use_replica else None
+        driver = replica["driver"] if replica else self._driver
+        if driver is None:
+            raise ServiceUnavailable(f"Neo4j 不可用: {config.NEO4J_URI}")
+        if bookmark_key and "bookmarks" not in kwargs:
+            kwargs["bookmarks"] = self.bookmarks(bookmark_key)
+        session = driver.session(default_access_mode=access_mode, **kwargs)
+        with self._stats_lock:
+            stats = self._stats
+            stats["sessions_total"] += 1
+            stats["sessions_active"] += 1
+            stats["sessions_peak"] = max(stats["sessions_peak"], stats["sessions_active"])
+            stats["writes" if access_mode == WRITE_ACCESS else "reads"] += 1
+            if replica:
+                stats["replica_reads"] += 1
         try:
             yield session
+            if bookmark_key and access_mode == WRITE_ACCESS:
+                self._remember(bookmark_key, session.last_bookmarks())
+        except (ServiceUnavailable, SessionExpired):
+            if replica:
+                # 暂停使用该副本，由后台健康检查恢复
+                replica["healthy"] = False
+                logger.warning(f"⚠️ Neo4j 只读副本不可用，改由主库读取: {replica['uri']}")
+            raise
+        except ClientError as e:
+            if "failed to obtain a connection from the pool" in str(e):
+                with self._stats_lock:
+                    self._stats["acquisition_timeouts"] += 1
+                logger.warning(f"⚠️ Neo4j 连接池耗尽 ({config.NEO4J_ACQUISITION_TIMEOUT:g}s 内未获取到连接)")
+            raise
         finally:
+            with self._stats_lock:
+                self._stats["sessions_active"] -= 1
             session.close()
     
+    def _pool_counts(self):
+        """连接池中 (使用中, 空闲) 的连接数（读取驱动内部结构，取不到时为 0；含只读副本）"""
+        in_use = idle = 0
+        for driver in [self._driver] + [r["driver"] for r in self._replicas]:
+            pool = getattr(driver, "_pool", None)
+            connections = getattr(pool, "connections", None)
+            if not connections:
+                continue
+            for queue in list(connections.values()):
+                for connection in list(queue):
+                    if getattr(connection, "in_use", False):
+                        in_use += 1
+                    else:
+                        idle += 1
+        return in_use, idle
+    
+    def pool_metrics(self) -> Dict[str, Any]:
+        """连接池使用情况"""
+        in_use, idle = self._pool_counts()
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            "max_pool_size": config.NEO4J_MAX_POOL_SIZE,
+            "connections_in_use": in_use,
+            "connections_idle": idle,
+            **stats,
+            "replicas": len(self._replicas),
+            "replicas_healthy": sum(1 for r in self._replicas if r["healthy"]),
+            "bookmark_keys": len(self._bookmarks),
+            "healthy": self._healthy,
+            "last_health_check": self._last_health_check,
+        }
+    
+    def gauges(self):
+        """导出到 /metrics 的指标: (名称, 说明, 值)"""
+        metrics = self.pool_metrics()
+        return [
+            ("neo4j_pool_max_size", "Configured Neo4j connection pool size", metrics["max_pool_size"]),
+            ("neo4j_pool_connections_in_use", "Neo4j connections currently in use", metrics["connections_in_use"]),
+            ("neo4j_pool_connections_idle", "Idle Neo4j connections in the pool", metrics["connections_idle"]),
+            ("neo4j_sessions_active", "Open Neo4j sessions", metrics["sessions_active"]),
+            ("neo4j_sessions_peak", "Peak concurrently open Neo4j sessions", metrics["sessions_peak"]),
+            ("neo4j_sessions_total", "Neo4j sessions opened since start", metrics["sessions_total"]),
+            ("neo4j_read_sessions", "Neo4j READ_ACCESS sessions opened since start", metrics["reads"]),
+            ("neo4j_replica_read_sessions", "Read sessions served by configured read replicas", metrics["replica_reads"]),
+            ("neo4j_replica_fallbacks", "Reads retried on the primary after a replica failure", metrics["replica_fallbacks"]),
+            ("neo4j_write_sessions", "Neo4j WRITE_ACCESS sessions opened since start", metrics["writes"]),
+            ("neo4j_replicas_healthy", "Healthy configured read replicas", metrics["replicas_healthy"]),
+            ("neo4j_pool_acquisition_timeouts", "Connection acquisition timeouts", metrics["acquisition_timeouts"]),
+            ("neo4j_reconnects", "Driver reconnects since start", metrics["reconnects"]),
+            ("neo4j_healthy", "Last background health check result", int(metrics["healthy"])),
+        ]
+    
     def close(self):
         """关闭连接"""
+        for replica in self._replicas:
+            replica["driver"].close()
+        self._replicas = []
         if self._driver:
             self._driver.close()
             self._driver = None
             logger.info("Neo4j 连接已关闭")
 
 
+class _ReadOnlyDriver:
+    """
+    只读的驱动视图：session() 默认 READ_ACCESS（可路由到只读副本），close() 不关闭共享连接
+    注入推荐器/嵌入包，使其查询走读路由
+    """
+
+    def __init__(self, manager: Neo4jConnectionManager):
+        self._manager = manager
+
+    def session(self, **kwargs):
+        kwargs.setdefault("access_mode", kwargs.pop("default_access_mode", READ_ACCESS))
+        return self._manager.session(**kwargs)
+
+    def close(self):
+        pass
+
+
+# ==================== 客户端书签 ====================
+
+class BookmarkMiddleware:
+    """
+    客户端书签中间件（纯 ASGI）
+    - 请求头 X-Neo4j-Bookmarks 中的书签在本次请求的带键读取中一并等待
+    - 本次请求有写入时，把新书签写入同名响应头，由客户端保存后在之后的请求中带回
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        received = None
+        for name, value in scope.get("headers", ()):
+            if name == BOOKMARK_HEADER:
+                values = [v.strip() for v in value.decode("latin-1").split(",") if v.strip()]
+                if values:
+                    received = Bookmarks.from_raw_values(values[:MAX_CLIENT_BOOKMARKS])
+        state = {"received": received, "written": None}
+        token = _request_bookmarks.set(state)
+
+        async def send_with_bookmarks(message):
+            if message["type"] == "http.response.start" and state["written"]:
+                headers = list(message.get("headers", []))
+                value = ",".join(sorted(state["written"].raw_values))
+                headers.append((BOOKMARK_HEADER, value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_bookmarks)
+        finally:
+            _request_bookmarks.reset(token)
+
+
+def install_bookmarks(app):
+    """为 FastAPI 应用挂载客户端书签中间件（CORS 需在 expose_headers 中暴露 X-Neo4j-Bookmarks）"""
+    app.add_middleware(BookmarkMiddleware)
+
+
 # ==================== 全局连接实例 ====================
 
 _neo4j_manager: Optional[Neo4jConnectionManager] = None
@@ -203,9 +527,15 @@ class Neo4jConnection:
         """
         self._manager = get_neo4j_connection()
     
-    def query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict]:
-        """执行查询"""
-        return self._manager.query(query, parameters)
+    def query(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+              bookmark_key: BookmarkKey = None) -> List[Dict]:
+        """执行只读查询（READ_ACCESS）"""
+        return self._manager.query(query, parameters, bookmark_key)
+    
+    def execute_write(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                      bookmark_key: BookmarkKey = None) -> List[Dict]:
+        """执行写操作（WRITE_ACCESS，发往主库）"""
+        return self._manager.execute_write(query, parameters, bookmark_key)
     
     def close(self):
         """关闭连接（实际不关闭，由全局管理）"""
@@ -214,6 +544,31 @@ class Neo4jConnection:
     def health_check(self) -> bool:
         """健康检查"""
         return self._manager.health_check()
+    
+    @property
+    def manager(self) -> Neo4jConnectionManager:
+        """共享的驱动提供者（注入推荐器/嵌入包，代替各自创建驱动）"""
+        return self._manager
+    
+    @property
+    def reader(self) -> "_ReadOnlyDriver":
+        """只读驱动视图（读会话走 follower / 只读副本），注入推荐器/嵌入包"""
+        return self._manager.reader
+    
+    def pool_metrics(self) -> Dict[str, Any]:
+        """连接池使用情况"""
+        return self._manager.pool_metrics()
+
+
+# ==================== PostgreSQL 连接 ====================
+
+def get_postgres_connection(dsn: str):
+    """
+    创建 PostgreSQL 连接
+    - 使用带计时的游标，采样请求中的 SQL 会计入剖析统计
+    """
+    import psycopg2
+    return psycopg2.connect(dsn, cursor_factory=ProfiledCursor)
 
 
 # ==================== Supabase 连接 ====================
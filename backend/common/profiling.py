@@ -0,0 +1,317 @@
+"""
+性能剖析模块
+- 请求级墙钟耗时
+- Neo4j / PostgreSQL 调用计数与耗时（按查询指纹聚合）
+- /metrics 导出直方图（Prometheus 文本格式）
+- Server-Timing 响应头
+- 按比例采样，未采样请求只付出一次随机数判断的开销
+"""
+import re
+import time
+import random
+import hashlib
+import logging
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# 直方图桶（毫秒）
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# 每请求数据库调用次数桶
+CALL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# 强制采样请求头（压测/排障时使用）
+FORCE_SAMPLE_HEADER = b"x-profile"
+
+
+# ==================== 查询指纹 ====================
+
+_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/|--[^\n]*", re.S)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> Tuple[str, str]:
+    """
+    计算查询指纹
+    - 去掉注释、字面量归一为 ?、压缩空白
+    - 返回 (指纹ID, 归一化后的查询文本)
+    """
+    normalized = _COMMENT_RE.sub(" ", query)
+    normalized = _STRING_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _SPACE_RE.sub(" ", normalized).strip()
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    return digest, normalized
+
+
+# ==================== 直方图 ====================
+
+class Histogram:
+    """线程安全的累积直方图"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为 +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", " ")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    return ",".join(f'{k}="{_escape_label(str(v))}"' for k, v in labels.items())
+
+
+class MetricsRegistry:
+    """指标注册表（每个进程一份）"""
+
+    def __init__(self, service: str = "unknown"):
+        self.service = service
+        self._lock = Lock()
+        self._request_hist: Dict[Tuple[str, str], Histogram] = {}
+        self._db_hist: Dict[Tuple[str, str], Histogram] = {}
+        self._db_calls_hist: Dict[Tuple[str, str], Histogram] = {}
+        self._query_text: Dict[str, str] = {}
+        self._gauge_sources: List = []
+
+    def _get(self, table: Dict, key, buckets) -> Histogram:
+        hist = table.get(key)
+        if hist is None:
+            with self._lock:
+                hist = table.setdefault(key, Histogram(buckets))
+        return hist
+
+    def add_gauges(self, source):
+        """登记仪表盘指标来源：source() 返回 [(名称, 说明, 值)]，导出时调用"""
+        with self._lock:
+            if source not in self._gauge_sources:
+                self._gauge_sources.append(source)
+
+    def observe_request(self, route: str, method: str, duration_ms: float, profile: "RequestProfile"):
+        self._get(self._request_hist, (route, method), LATENCY_BUCKETS_MS).observe(duration_ms)
+        for db in ("neo4j", "postgres"):
+            calls = profile.calls.get(db, 0)
+            self._get(self._db_calls_hist, (route, db), CALL_COUNT_BUCKETS).observe(calls)
+
+    def observe_query(self, db: str, query: str, duration_ms: float):
+        digest, normalized = fingerprint(query)
+        if digest not in self._query_text:
+            self._query_text[digest] = normalized[:160]
+        self._get(self._db_hist, (db, digest), LATENCY_BUCKETS_MS).observe(duration_ms)
+
+    def render(self) -> str:
+        """导出 Prometheus 文本格式"""
+        lines: List[str] = []
+
+        def emit(name: str, help_text: str, table: Dict, label_names: Tuple[str, str]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in sorted(table.items()):
+                labels = {"service": self.service, label_names[0]: key[0], label_names[1]: key[1]}
+                counts, total, count = hist.snapshot()
+                cumulative = 0
+                for bound, n in zip(hist.buckets, counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{_format_labels({**labels, "le": bound})}}} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'{name}_bucket{{{_format_labels({**labels, "le": "+Inf"})}}} {cumulative}')
+                lines.append(f"{name}_sum{{{_format_labels(labels)}}} {total:.3f}")
+                lines.append(f"{name}_count{{{_format_labels(labels)}}} {count}")
+
+        emit("http_request_duration_ms", "Sampled request wall time", self._request_hist, ("route", "method"))
+        emit("db_query_duration_ms", "Sampled database call time by query fingerprint", self._db_hist, ("db", "fingerprint"))
+        emit("http_request_db_calls", "Database calls per sampled request", self._db_calls_hist, ("route", "db"))
+
+        lines.append("# HELP db_query_info Normalized query text for each fingerprint")
+        lines.append("# TYPE db_query_info gauge")
+        for digest, text in sorted(self._query_text.items()):
+            lines.append(f'db_query_info{{{_format_labels({"service": self.service, "fingerprint": digest, "query": text})}}} 1')
+
+        for source in list(self._gauge_sources):
+            try:
+                gauges = source()
+            except Exception as e:
+                logger.warning(f"⚠️ 指标采集失败: {e}")
+                continue
+            for name, help_text, value in gauges:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f'{name}{{{_format_labels({"service": self.service})}}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# ==================== 请求上下文 ====================
+
+class RequestProfile:
+    """单个采样请求内的数据库调用统计"""
+
+    __slots__ = ("calls", "durations")
+
+    def __init__(self):
+        self.calls: Dict[str, int] = {}
+        self.durations: Dict[str, float] = {}
+
+    def add(self, db: str, duration_ms: float):
+        self.calls[db] = self.calls.get(db, 0) + 1
+        self.durations[db] = self.durations.get(db, 0.0) + duration_ms
+
+    def server_timing(self, total_ms: float) -> str:
+        parts = [f"app;dur={total_ms:.1f}"]
+        for db, dur in self.durations.items():
+            parts.append(f'{db};dur={dur:.1f};desc="{self.calls[db]} calls"')
+        return ", ".join(parts)
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _QueryTimer:
+    __slots__ = ("db", "query", "profile", "start")
+
+    def __init__(self, db: str, query: str, profile: RequestProfile):
+        self.db = db
+        self.query = query
+        self.profile = profile
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration_ms = (time.perf_counter() - self.start) * 1000
+        self.profile.add(self.db, duration_ms)
+        registry.observe_query(self.db, self.query, duration_ms)
+        return False
+
+
+def track(db: str, query: str):
+    """
+    数据库调用计时上下文
+    - 当前请求未被采样时返回空操作
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return _NULL_TIMER
+    return _QueryTimer(db, query, profile)
+
+
+# ==================== ASGI 中间件 ====================
+
+class ProfilingMiddleware:
+    """
+    请求剖析中间件（纯 ASGI，避免 BaseHTTPMiddleware 的额外开销）
+    - 采样命中时记录墙钟耗时并写入 Server-Timing 头
+    """
+
+    def __init__(self, app, sample_rate: float = 0.05):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    def _should_sample(self, scope) -> bool:
+        if random.random() < self.sample_rate:
+            return True
+        for name, _ in scope.get("headers", ()):
+            if name == FORCE_SAMPLE_HEADER:
+                return True
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_sample(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing(total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            registry.observe_request(route_path, scope.get("method", ""), (time.perf_counter() - start) * 1000, profile)
+
+
+def install_profiling(app, service: str):
+    """为 FastAPI 应用挂载剖析中间件和 /metrics 端点"""
+    from fastapi.responses import PlainTextResponse
+
+    registry.service = service
+    if not config.PROFILING_ENABLED:
+        logger.info("性能剖析已关闭")
+        return
+
+    app.add_middleware(ProfilingMiddleware, sample_rate=config.PROFILING_SAMPLE_RATE)
+
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+
+
+# ==================== PostgreSQL 游标 ====================
+
+try:
+    import psycopg2.extensions
+
+    class ProfiledCursor(psycopg2.extensions.cursor):
+        """记录 execute 耗时的 psycopg2 游标"""
+
+        def execute(self, query, vars=None):
+            with track("postgres", query if isinstance(query, str) else str(query)):
+                return super().execute(query, vars)
+
+        def executemany(self, query, vars_list):
+            with track("postgres", query if isinstance(query, str) else str(query)):
+                return super().executemany(query, vars_list)
+except ImportError:  # pragma: no cover - psycopg2 为必需依赖
+    ProfiledCursor = None
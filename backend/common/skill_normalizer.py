@@ -0,0 +1,359 @@
+"""
+技能名规范化与别名索引
+======================
+图中的 Skill.name 保留原始写法（Python / PYTHON / python 可能同时存在），
+按 name 精确匹配的查询会漏掉大小写、全半角、空格不同的写法。
+- normalize_skill: NFKC（全角转半角）+ casefold + 去空白，得到比较用的键
+- SKILL_ALIASES:   常见缩写/别名 -> 规范键（js -> javascript, k8s -> kubernetes）
+- SkillIndex:      由 Skill 词表构建一次，规范键 -> 图中的全部写法；
+                   包含关系匹配用 Aho-Corasick 自动机，耗时与输入长度成线性，不再两两比较子串
+"""
+import time
+import logging
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 规范键 -> 别名（别名同样经过 normalize_skill 后比较）
+SKILL_ALIASES = {
+    'javascript': ['js'],
+    'typescript': ['ts'],
+    'go': ['golang'],
+    'kubernetes': ['k8s'],
+    'postgresql': ['postgres', 'pgsql'],
+    'elasticsearch': ['es'],
+    'node.js': ['node', 'nodejs'],
+    'vue': ['vue.js', 'vuejs'],
+    'react': ['react.js', 'reactjs'],
+    'c++': ['cpp'],
+    'c#': ['csharp'],
+    'springboot': ['spring-boot'],
+    'sklearn': ['scikit-learn'],
+    'photoshop': ['ps'],
+    '机器学习': ['machinelearning', 'ml'],
+    '深度学习': ['deeplearning', 'dl'],
+    '人工智能': ['ai', 'artificialintelligence'],
+    '自然语言处理': ['nlp'],
+    '计算机视觉': ['cv', 'computervision'],
+}
+
+# 包含关系匹配的最短键长（单字符键如 "c" / "r" 会包含在几乎所有技能中）
+MIN_CONTAIN_LEN = 2
+
+SKILL_NAME_QUERY = "MATCH (s:Skill) WHERE s.name IS NOT NULL RETURN s.name AS name"
+SKILL_COUNT_QUERY = "MATCH (s:Skill) RETURN count(s) AS n"
+
+
+def fold_text(text: str) -> str:
+    """全角转半角、大小写折叠、连续空白合并为一个空格（自由文本扫描使用，保留词边界）"""
+    if not text:
+        return ''
+    return ' '.join(unicodedata.normalize('NFKC', str(text)).casefold().split())
+
+
+def normalize_skill(name: str) -> str:
+    """比较用的键：在 fold_text 的基础上去掉所有空白"""
+    return fold_text(name).replace(' ', '')
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+_ALIAS_LOOKUP = {normalize_skill(alias): normalize_skill(canonical)
+                 for canonical, aliases in SKILL_ALIASES.items() for alias in aliases}
+
+
+def skill_key(name: str) -> str:
+    """规范键（别名折叠到同一个键）"""
+    key = normalize_skill(name)
+    return _ALIAS_LOOKUP.get(key, key)
+
+
+class AhoCorasick:
+    """
+    多模式子串匹配自动机
+
+    用法:
+        ac = AhoCorasick()
+        ac.add('python', 'Python')
+        ac.build()
+        list(ac.iter('熟悉python开发'))  # [(2, 8, 'Python')]
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List] = [[]]
+        self._size = 0
+        self._built = False
+
+    def add(self, pattern: str, value=None) -> None:
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), pattern if value is None else value))
+        self._size += 1
+        self._built = False
+
+    def build(self) -> 'AhoCorasick':
+        """按 BFS 计算失配指针，并把后缀节点的输出合并进来"""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+        self._built = True
+        return self
+
+    def __len__(self) -> int:
+        return self._size
+
+    def iter(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """逐个产出 (起始位置, 结束位置, value)，一次扫描 text"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                yield i + 1 - length, i + 1, value
+
+    def find_all(self, text: str) -> Set:
+        """text 中出现过的全部 value"""
+        return {value for _, _, value in self.iter(text)}
+
+
+class SkillIndex:
+    """
+    Skill 词表的规范化索引（线程安全：刷新时整体替换引用）
+
+    Args:
+        names: 图中的技能名
+        conn: 提供 query(cypher, parameters) 的 Neo4j 连接（可选，用于 load / check）
+        interval: 词表变化的检查间隔（秒），0 表示不自动刷新
+    """
+
+    def __init__(self, names: Iterable[str] = (), conn=None, interval: float = 0.0):
+        self.conn = conn
+        self.interval = interval
+        self.variants: Dict[str, List[str]] = {}
+        self.count: Optional[int] = None
+        self.loaded_at = 0.0
+        self._automaton: Optional[AhoCorasick] = None
+        self._lock = threading.Lock()
+        self._set_names(names)
+
+    def _set_names(self, names: Iterable[str]) -> None:
+        variants: Dict[str, List[str]] = {}
+        for name in names:
+            key = skill_key(name)
+            if key:
+                group = variants.setdefault(key, [])
+                if name not in group:
+                    group.append(name)
+        self.variants = variants
+        self._automaton = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at > 0
+
+    # ==================== 加载与刷新 ====================
+
+    def _count(self) -> int:
+        rows = self.conn.query(SKILL_COUNT_QUERY)
+        return rows[0]["n"] if rows else 0
+
+    def load(self) -> int:
+        """从 Neo4j 全量加载技能名，返回技能数"""
+        with self._lock:
+            start = time.time()
+            count = self._count()
+            names = [r["name"] for r in self.conn.query(SKILL_NAME_QUERY)]
+            self._set_names(names)
+            self.count = count
+            self.loaded_at = time.time()
+            logger.info(f"✅ 技能索引已加载: {len(names)} 个技能名, {len(self.variants)} 个规范键 "
+                        f"({(self.loaded_at - start) * 1000:.0f}ms)")
+            return len(names)
+
+    def check(self) -> bool:
+        """技能数变化时重新加载"""
+        if self.loaded and self._count() == self.count:
+            return False
+        self.load()
+        return True
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning(f"⚠️ 技能索引刷新失败: {e}")
+
+    def start(self) -> Optional[threading.Thread]:
+        if self.interval <= 0 or self.conn is None:
+            return None
+        thread = threading.Thread(target=self._loop, name="skill-index-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    def _ensure_loaded(self):
+        if not self.loaded and self.conn is not None:
+            self.load()
+
+    def add(self, name: str) -> None:
+        """登记新写入图中的技能名（录入职位时调用）"""
+        key = skill_key(name)
+        if not key:
+            return
+        with self._lock:
+            group = self.variants.get(key, [])
+            if name not in group:
+                variants = dict(self.variants)
+                variants[key] = group + [name]
+                self.variants = variants
+                self._automaton = None
+
+    # ==================== 查询 ====================
+
+    def canonical(self, name: str) -> Optional[str]:
+        """图中与 name 等价的技能名（优先原样），不存在返回 None；录入时用它避免产生大小写变体"""
+        self._ensure_loaded()
+        group = self.variants.get(skill_key(name))
+        if not group:
+            return None
+        return name if name in group else group[0]
+
+    def resolve(self, names: Iterable[str]) -> List[str]:
+        """
+        展开为图中全部等价写法（用于 UNWIND $skills ... MATCH (sk:Skill {name: skill_name})）
+        词表中不存在的名字原样保留
+        """
+        self._ensure_loaded()
+        variants = self.variants
+        resolved = []
+        for name in names or ():
+            if not name:
+                continue
+            resolved.extend(variants.get(skill_key(name)) or [name])
+        return list(dict.fromkeys(resolved))
+
+    def match(self, required: Iterable[str], owned: Iterable[str]) -> Set[str]:
+        """
+        required 中被 owned 覆盖的技能：规范键相同，或一方包含另一方
+
+        两个方向的包含关系各用一个自动机扫描一遍，总耗时与两侧文本总长成线性
+        """
+        required = [r for r in required or () if r]
+        owned_keys = {skill_key(s) for s in owned or () if s} - {''}
+        if not required or not owned_keys:
+            return set()
+
+        required_keys = {r: skill_key(r) for r in required}
+        matched = {r for r, key in required_keys.items() if key in owned_keys}
+
+        # 已有技能包含于职位技能："python" ⊂ "python开发"
+        owned_ac = AhoCorasick()
+        for key in owned_keys:
+            if len(key) >= MIN_CONTAIN_LEN:
+                owned_ac.add(key)
+        owned_ac.build()
+        for r, key in required_keys.items():
+            if r not in matched and next(owned_ac.iter(key), None) is not None:
+                matched.add(r)
+
+        # 职位技能包含于已有技能："spring" ⊂ "springboot"
+        pending = [(r, key) for r, key in required_keys.items() if r not in matched and len(key) >= MIN_CONTAIN_LEN]
+        if pending:
+            required_ac = AhoCorasick()
+            for r, key in pending:
+                required_ac.add(key, r)
+            matched |= required_ac.find_all('\x00'.join(owned_keys))
+        return matched
+
+    def automaton(self) -> AhoCorasick:
+        """
+        词表全部写法与别名的自动机（首次使用时构建，词表变化后重建）
+        模式使用 fold_text 形式（保留空格），value 为规范键
+        """
+        self._ensure_loaded()
+        automaton = self._automaton
+        if automaton is None:
+            automaton = AhoCorasick()
+            patterns = {}
+            for key, names in self.variants.items():
+                for name in names:
+                    patterns.setdefault(fold_text(name), key)
+            for alias, key in _ALIAS_LOOKUP.items():
+                if key in self.variants:
+                    patterns.setdefault(alias, key)
+            for pattern, key in patterns.items():
+                if len(pattern) >= MIN_CONTAIN_LEN:
+                    automaton.add(pattern, key)
+            self._automaton = automaton.build()
+        return automaton
+
+    def find_in(self, text: str, longest: bool = True) -> List[str]:
+        """
+        自由文本中出现的词表技能（返回图中的写法，按首次出现顺序）
+        英文/数字开头或结尾的技能要求词边界，避免 "java" 命中 "javascript"、"go" 命中 "google"
+
+        Args:
+            longest: 重叠的命中只保留最左最长的一个（"整体运营工作" 不再同时产出 "整体运营"）
+        """
+        text = fold_text(text)
+        hits = []
+        for start, end, key in self.automaton().iter(text):
+            if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if _is_word_char(text[end - 1]) and end < len(text) and _is_word_char(text[end]):
+                continue
+            hits.append((start, end, key))
+
+        if longest:
+            hits.sort(key=lambda h: (h[0], -h[1]))
+            kept, covered = [], 0
+            for hit in hits:
+                if hit[0] >= covered:
+                    kept.append(hit)
+                    covered = hit[1]
+            hits = kept
+
+        variants = self.variants
+        found = {}
+        for _, _, key in hits:
+            if key not in found:
+                found[key] = variants[key][0]
+        return list(found.values())
+
+    def __len__(self) -> int:
+        return len(self.variants)
+
+    def __contains__(self, name: str) -> bool:
+        return skill_key(name) in self.variants
@@ -9,7 +9,6 @@ from pydantic import BaseModel
 from neo4j import GraphDatabase
 from typing import List, Optional
 from passlib.context import CryptContext
-import psycopg2
 import math
 import os
 import sys
@@ -40,14 +39,20 @@ settings = Settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # 导入共享的 Neo4j 连接（已包含连接池、健康检查和重连机制）
-from common.database import Neo4jConnection
+from common.database import Neo4jConnection, get_postgres_connection, close_neo4j, install_bookmarks
+from common.profiling import install_profiling
+from common.skill_normalizer import SkillIndex
 
 # 创建Neo4j连接实例
 neo4j_conn = Neo4jConnection(settings.neo4j_uri, settings.neo4j_user, settings.neo4j_password)
 
+# 技能名规范化索引（首次录入职位时加载词表），新技能折叠到图中已有的写法，避免产生大小写变体
+skill_index = SkillIndex(conn=neo4j_conn, interval=config.SKILL_INDEX_REFRESH_INTERVAL)
+skill_index.start()
+
 # Neon数据库连接
 def get_neon_connection():
-    return psycopg2.connect(settings.neon_database_url)
+    return get_postgres_connection(settings.neon_database_url)
 
 # 创建FastAPI应用
 app = FastAPI(title="企业端API", version="2.0.0")
@@ -59,8 +64,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Neo4j-Bookmarks"],
 )
 
+# 因果书签随响应返回，客户端带回后多 worker 下同样读己之写
+install_bookmarks(app)
+
+# 性能剖析（采样请求写入 Server-Timing，/metrics 导出直方图）
+install_profiling(app, "enterprise-service")
+
 # 请求模型
 class LoginRequest(BaseModel):
     username: str
@@ -359,7 +371,7 @@ def update_enterprise_profile(user_id: str, request: EnterpriseProfileUpdate):
         
         # 如果提供了公司名，同步到Neo4j的Company节点
         if request.company_name:
-            neo4j_conn.query("""
+            neo4j_conn.execute_write("""
                 MERGE (c:Company {name: $name})
                 SET c.scale = $scale,
                     c.updated_at = datetime()
@@ -370,11 +382,11 @@ def update_enterprise_profile(user_id: str, request: EnterpriseProfileUpdate):
             
             # 如果有城市，建立LOCATED_IN关系
             if request.city:
-                neo4j_conn.query("""
+                neo4j_conn.execute_write("""
                     MERGE (city:City {name: $city})
                 """, {"city": request.city})
                 
-                neo4j_conn.query("""
+                neo4j_conn.execute_write("""
                     MATCH (c:Company {name: $company})
                     MATCH (city:City {name: $city})
                     MERGE (c)-[:LOCATED_IN]->(city)
@@ -382,7 +394,7 @@ def update_enterprise_profile(user_id: str, request: EnterpriseProfileUpdate):
             
             # 如果有行业，建立关系
             if request.industry:
-                neo4j_conn.query("""
+                neo4j_conn.execute_write("""
                     MERGE (i:Industry {name: $industry})
                 """, {"industry": request.industry})
         
@@ -416,8 +428,11 @@ def create_job(user_id: str, request: JobCreate):
         import time
         job_url = f"enterprise_{user_id}_{int(time.time())}_{uuid.uuid4().hex[:8]}"
         
+        # 企业账号与职位的书签键：随后的职位列表/编辑读取可见本次写入
+        bookmark_keys = [f"enterprise:{user_id}", job_url]
+        
         # 在Neo4j中创建Job节点
-        neo4j_conn.query("""
+        neo4j_conn.execute_write("""
             MERGE (j:Job {url: $url})
             SET j.title = $title,
                 j.description = $description,
@@ -439,34 +454,36 @@ def create_job(user_id: str, request: JobCreate):
             "salary_max": request.salary_max,
             "salary_text": f"{request.salary_min}-{request.salary_max}K" if request.salary_max > 0 else "面议",
             "user_id": user_id
-        })
+        }, bookmark_key=bookmark_keys)
         
         # 建立 OFFERED_BY 关系
-        neo4j_conn.query("""
+        neo4j_conn.execute_write("""
             MATCH (j:Job {url: $url})
             MATCH (c:Company {name: $company})
             MERGE (j)-[:OFFERED_BY]->(c)
-        """, {"url": job_url, "company": company_name})
+        """, {"url": job_url, "company": company_name}, bookmark_key=bookmark_keys)
         
         # 建立 REQUIRES_SKILL 关系
         for skill in request.skills:
             skill = skill.strip()
             if skill:
-                neo4j_conn.query("MERGE (s:Skill {name: $name})", {"name": skill})
-                neo4j_conn.query("""
+                skill = skill_index.canonical(skill) or skill
+                neo4j_conn.execute_write("MERGE (s:Skill {name: $name})", {"name": skill}, bookmark_key=bookmark_keys)
+                skill_index.add(skill)
+                neo4j_conn.execute_write("""
                     MATCH (j:Job {url: $url})
                     MATCH (s:Skill {name: $skill})
                     MERGE (j)-[:REQUIRES_SKILL]->(s)
-                """, {"url": job_url, "skill": skill})
+                """, {"url": job_url, "skill": skill}, bookmark_key=bookmark_keys)
         
         # 如果有城市，建立关系
         if company_city:
-            neo4j_conn.query("""
+            neo4j_conn.execute_write("""
                 MATCH (j:Job {url: $url})
                 MATCH (c:Company)-[:LOCATED_IN]->(city:City)
                 WHERE c.name = $company
                 MERGE (j)-[:LOCATED_IN]->(city)
-            """, {"url": job_url, "company": company_name})
+            """, {"url": job_url, "company": company_name}, bookmark_key=bookmark_keys)
         
         return {
             "code": 200,
@@ -493,7 +510,7 @@ def list_jobs(user_id: str):
                    j.salary as salary, j.status as status, j.created_at as created_at,
                    c.name as company_name, collect(s.name) as skills
             ORDER BY j.created_at DESC
-        """, {"user_id": user_id})
+        """, {"user_id": user_id}, bookmark_key=f"enterprise:{user_id}")
         
         jobs = []
         for record in result:
@@ -517,9 +534,23 @@ def list_jobs(user_id: str):
         raise HTTPException(status_code=500, detail=f"获取职位列表失败: {str(e)}")
 
 @app.put("/api/enterprise/jobs/{job_id}")
-def update_job(job_id: str, request: JobUpdate):
+def update_job(job_id: str, user_id: str, request: JobUpdate):
     """更新职位信息"""
+    # 企业账号与职位的书签键：随后的职位列表读取可见本次修改
+    bookmark_keys = [f"enterprise:{user_id}", job_id]
     try:
+        # 验证是否是该用户创建的职位
+        result = neo4j_conn.query("""
+            MATCH (j:Job {url: $url})
+            RETURN j.created_by as created_by
+        """, {"url": job_id}, bookmark_key=bookmark_keys)
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="职位不存在")
+        
+        if result[0]["created_by"] != user_id:
+            raise HTTPException(status_code=403, detail="无权修改此职位")
+        
         # 构建更新语句
         updates = []
         params = {"url": job_id}
@@ -549,31 +580,36 @@ def update_job(job_id: str, request: JobUpdate):
             updates.append("j.status = $status")
             params["status"] = request.status
         
-        if updates:
-            updates.append("j.updated_at = datetime()")
-            query = f"MATCH (j:Job {{url: $url}}) SET {', '.join(updates)}"
-            neo4j_conn.query(query, params)
-        
         # 更新技能关系
         if request.skills is not None:
             # 删除旧的技能关系
-            neo4j_conn.query("""
+            neo4j_conn.execute_write("""
                 MATCH (j:Job {url: $url})-[r:REQUIRES_SKILL]->()
                 DELETE r
-            """, {"url": job_id})
+            """, {"url": job_id}, bookmark_key=bookmark_keys)
             
             # 建立新的技能关系
             for skill in request.skills:
                 skill = skill.strip()
                 if skill:
-                    neo4j_conn.query("MERGE (s:Skill {name: $name})", {"name": skill})
-                    neo4j_conn.query("""
+                    skill = skill_index.canonical(skill) or skill
+                    neo4j_conn.execute_write("MERGE (s:Skill {name: $name})", {"name": skill}, bookmark_key=bookmark_keys)
+                    skill_index.add(skill)
+                    neo4j_conn.execute_write("""
                         MATCH (j:Job {url: $url})
                         MATCH (s:Skill {name: $skill})
                         MERGE (j)-[:REQUIRES_SKILL]->(s)
-                    """, {"url": job_id, "skill": skill})
+                    """, {"url": job_id, "skill": skill}, bookmark_key=bookmark_keys)
+        
+        # 只改技能时同样标记修改时间（增量快照与归纳式刷新按 updated_at 发现变更），放在技能关系写完之后
+        if updates or request.skills is not None:
+            updates.append("j.updated_at = datetime()")
+            query = f"MATCH (j:Job {{url: $url}}) SET {', '.join(updates)}"
+            neo4j_conn.execute_write(query, params, bookmark_key=bookmark_keys)
         
         return {"code": 200, "message": "职位更新成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"更新职位失败: {str(e)}")
 
@@ -585,7 +621,7 @@ def delete_job(job_id: str, user_id: str):
         result = neo4j_conn.query("""
             MATCH (j:Job {url: $url})
             RETURN j.created_by as created_by
-        """, {"url": job_id})
+        """, {"url": job_id}, bookmark_key=job_id)
         
         if not result:
             raise HTTPException(status_code=404, detail="职位不存在")
@@ -594,10 +630,10 @@ def delete_job(job_id: str, user_id: str):
             raise HTTPException(status_code=403, detail="无权删除此职位")
         
         # 删除职位及其关系
-        neo4j_conn.query("""
+        neo4j_conn.execute_write("""
             MATCH (j:Job {url: $url})
             DETACH DELETE j
-        """, {"url": job_id})
+        """, {"url": job_id}, bookmark_key=[f"enterprise:{user_id}", job_id])
         
         return {"code": 200, "message": "职位删除成功"}
     except HTTPException:
@@ -608,12 +644,12 @@ def delete_job(job_id: str, user_id: str):
 # 健康检查
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "service": "enterprise", "port": 8002}
+    return {"status": "healthy", "service": "enterprise", "port": 8002, "neo4j_pool": neo4j_conn.pool_metrics()}
 
 # 关闭事件
 @app.on_event("shutdown")
 def shutdown_event():
-    neo4j_conn.close()
+    close_neo4j()
 
 if __name__ == "__main__":
     import uvicorn
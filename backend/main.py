@@ -3,7 +3,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic_settings import BaseSettings
 from pydantic import BaseModel, Field
-from neo4j import GraphDatabase
 from typing import List, Optional, Dict, Any
 import math
 import jwt
@@ -36,21 +35,8 @@ class Settings(BaseSettings):
 # 初始化配置
 settings = Settings()
 
-# Neo4j连接
-class Neo4jConnection:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-    
-    def close(self):
-        self.driver.close()
-    
-    def query(self, query, parameters=None):
-        with self.driver.session() as session:
-            result = session.run(query, parameters)
-            return [record.data() for record in result]
-
-# 创建Neo4j连接实例
-print(f"DEBUG: Connecting to Neo4j at {settings.neo4j_uri} with user {settings.neo4j_user}")
+# Neo4j连接（共用 common.database 的驱动与连接池）
+from common.database import Neo4jConnection, close_neo4j, install_bookmarks
 neo4j_conn = Neo4jConnection(settings.neo4j_uri, settings.neo4j_user, settings.neo4j_password)
 
 # 密码上下文
@@ -72,7 +58,8 @@ try:
         data_path=data_path,
         neo4j_uri=settings.neo4j_uri,
         neo4j_user=settings.neo4j_user,
-        neo4j_password=settings.neo4j_password
+        neo4j_password=settings.neo4j_password,
+        driver=neo4j_conn.reader
     )
     print("✅ GraphSAGE推荐器初始化成功!")
 except Exception as e:
@@ -89,8 +76,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Neo4j-Bookmarks"],
 )
 
+# 因果书签随响应返回，客户端带回后多 worker 下同样读己之写
+install_bookmarks(app)
+
 # 启动时创建 Neo4j 索引 (提升查询性能)
 @app.on_event("startup")
 async def create_neo4j_indexes():
@@ -107,7 +98,7 @@ async def create_neo4j_indexes():
     ]
     try:
         for idx_query in indexes:
-            neo4j_conn.query(idx_query)
+            neo4j_conn.execute_write(idx_query)
         print("✅ Neo4j 索引创建/验证完成")
     except Exception as e:
         print(f"⚠️ Neo4j 索引创建失败 (可能已存在): {e}")
@@ -332,7 +323,7 @@ def recommend_by_skills(request: SkillRecommendationRequest):
                    s.education as education,
                    collect(DISTINCT c.name) as courses
             """
-            user_info_result = neo4j_conn.query(user_info_query, parameters={"student_id": student_id})
+            user_info_result = neo4j_conn.query(user_info_query, parameters={"student_id": student_id}, bookmark_key=student_id)
             
             expected_position = None
             education = None
@@ -463,7 +454,7 @@ def recommend_by_skills(request: SkillRecommendationRequest):
     expected_position = None
     if request.student_id:
         user_query = "MATCH (s:Student {student_id: $sid}) RETURN s.expected_position as pos"
-        user_result = neo4j_conn.query(user_query, parameters={"sid": request.student_id})
+        user_result = neo4j_conn.query(user_query, parameters={"sid": request.student_id}, bookmark_key=request.student_id)
         if user_result and user_result[0]:
             expected_position = user_result[0].get("pos")
     
@@ -513,7 +504,7 @@ def student_login(request: LoginRequest):
            COLLECT(DISTINCT sk.name) AS skills, COLLECT(DISTINCT c.name) AS courses
     """
     
-    results = neo4j_conn.query(query, parameters={"username": request.username})
+    results = neo4j_conn.query(query, parameters={"username": request.username}, bookmark_key=request.username)
     
     # 检查是否有结果且student_id不为空（表示用户存在）
     if not results or results[0].get("student_id") is None:
@@ -529,11 +520,11 @@ def student_login(request: LoginRequest):
                s.major AS major, s.expected_position AS expected_position
         """
         
-        create_result = neo4j_conn.query(create_query, parameters={
+        create_result = neo4j_conn.execute_write(create_query, parameters={
             "student_id": new_student_id,
             "username": request.username,
             "password": hashed_password
-        })
+        }, bookmark_key=[request.username, new_student_id])
         
         return {
             "code": 200,
@@ -554,9 +545,10 @@ def student_login(request: LoginRequest):
     # 如果用户没有密码（旧数据），设置密码
     else:
         hashed_password = get_password_hash(request.password)
-        neo4j_conn.query(
+        neo4j_conn.execute_write(
             "MATCH (s:Student {student_id: $student_id}) SET s.password = $password",
-            parameters={"student_id": student["student_id"], "password": hashed_password}
+            parameters={"student_id": student["student_id"], "password": hashed_password},
+            bookmark_key=[request.username, student["student_id"]]
         )
     
     return {
@@ -598,7 +590,7 @@ def diagnose_skills(request: SkillDiagnosisRequest):
     MATCH (s:Student {student_id: $student_id})
     RETURN s.expected_position AS expected_position, s.education AS education, s.major AS major
     """
-    profile_result = neo4j_conn.query(profile_query, parameters={"student_id": student_id})
+    profile_result = neo4j_conn.query(profile_query, parameters={"student_id": student_id}, bookmark_key=student_id)
     expected_position = profile_result[0]["expected_position"] if profile_result else None
     education = profile_result[0]["education"] if profile_result else None
     major = profile_result[0]["major"] if profile_result else None
@@ -621,7 +613,7 @@ def diagnose_skills(request: SkillDiagnosisRequest):
     
     RETURN direct_skills, course_skills, all_skills
     """
-    skills_result = neo4j_conn.query(skills_query, parameters={"student_id": student_id})
+    skills_result = neo4j_conn.query(skills_query, parameters={"student_id": student_id}, bookmark_key=student_id)
     
     if skills_result:
         direct_skills = [s for s in skills_result[0]["direct_skills"] if s]
@@ -887,7 +879,7 @@ def save_courses(request: SaveCoursesRequest):
     MATCH (s:Student {student_id: $student_id})-[r:TAKES]->(:Course)
     DELETE r
     """
-    neo4j_conn.query(delete_query, parameters={"student_id": request.student_id})
+    neo4j_conn.execute_write(delete_query, parameters={"student_id": request.student_id}, bookmark_key=request.student_id)
     
     # 添加新的课程关系
     if not request.courses:
@@ -907,10 +899,10 @@ def save_courses(request: SaveCoursesRequest):
            COLLECT(DISTINCT sk.name) AS acquired_skills
     """
     
-    results = neo4j_conn.query(query, parameters={
+    results = neo4j_conn.execute_write(query, parameters={
         "student_id": request.student_id,
         "courses": request.courses
-    })
+    }, bookmark_key=request.student_id)
     
     return results[0] if results else {"courses_saved": 0, "acquired_skills": []}
 
@@ -927,7 +919,7 @@ def get_profile(student_id: str):
            COLLECT(DISTINCT sk.name) AS skills,
            COLLECT(DISTINCT c.name) AS courses
     """
-    results = neo4j_conn.query(query, parameters={"student_id": student_id})
+    results = neo4j_conn.query(query, parameters={"student_id": student_id}, bookmark_key=student_id)
     if not results or not results[0].get("student_id"):
         raise HTTPException(status_code=404, detail="User not found")
     return {"code": 200, "data": results[0]}
@@ -945,20 +937,20 @@ def update_profile(request: UpdateProfileRequest):
     RETURN s.student_id AS student_id
     """
     
-    neo4j_conn.query(update_basic_query, parameters={
+    neo4j_conn.execute_write(update_basic_query, parameters={
         "student_id": request.student_id,
         "name": request.name,
         "education": request.education,
         "major": request.major,
         "expected_position": request.expected_position
-    })
+    }, bookmark_key=request.student_id)
     
     # 删除现有的技能关系
     delete_skills_query = """
     MATCH (s:Student {student_id: $student_id})-[r:HAS_SKILL]->()
     DELETE r
     """
-    neo4j_conn.query(delete_skills_query, parameters={"student_id": request.student_id})
+    neo4j_conn.execute_write(delete_skills_query, parameters={"student_id": request.student_id}, bookmark_key=request.student_id)
     
     # 添加新的技能关系（如果有技能）
     if request.skills:
@@ -970,10 +962,10 @@ def update_profile(request: UpdateProfileRequest):
         MATCH (sk:Skill {name: skill_name})
         MERGE (s)-[:HAS_SKILL]->(sk)
         """
-        neo4j_conn.query(add_skills_query, parameters={
+        neo4j_conn.execute_write(add_skills_query, parameters={
             "student_id": request.student_id,
             "skills": request.skills
-        })
+        }, bookmark_key=request.student_id)
         print(f"DEBUG update-profile: 技能添加完成")
     
     # 处理课程（如果有）
@@ -984,7 +976,7 @@ def update_profile(request: UpdateProfileRequest):
         MATCH (s:Student {student_id: $student_id})-[r:ENROLLED_IN]->()
         DELETE r
         """
-        neo4j_conn.query(delete_courses_query, parameters={"student_id": request.student_id})
+        neo4j_conn.execute_write(delete_courses_query, parameters={"student_id": request.student_id}, bookmark_key=request.student_id)
         
         # 添加新课程关系
         add_courses_query = """
@@ -993,10 +985,10 @@ def update_profile(request: UpdateProfileRequest):
         MATCH (c:Course {name: course_name})
         MERGE (s)-[:ENROLLED_IN]->(c)
         """
-        neo4j_conn.query(add_courses_query, parameters={
+        neo4j_conn.execute_write(add_courses_query, parameters={
             "student_id": request.student_id,
             "courses": request.courses
-        })
+        }, bookmark_key=request.student_id)
         print(f"DEBUG update-profile: 课程添加完成")
     
     # 获取更新后的信息
@@ -1008,7 +1000,7 @@ def update_profile(request: UpdateProfileRequest):
            s.major AS major, s.expected_position AS expected_position,
            COLLECT(DISTINCT sk.name) AS skills, COLLECT(DISTINCT c.name) AS courses
     """
-    result = neo4j_conn.query(get_profile_query, parameters={"student_id": request.student_id})
+    result = neo4j_conn.query(get_profile_query, parameters={"student_id": request.student_id}, bookmark_key=request.student_id)
     
     return {"message": "Profile updated successfully", "data": result[0] if result else None}
 
@@ -1177,7 +1169,7 @@ def hybrid_recommend(request: HybridRecommendationRequest):
         MATCH (s:Student {student_id: $student_id})-[:HAS_SKILL]->(sk:Skill)
         RETURN collect(sk.name) as skills
         """
-        skills_result = neo4j_conn.query(skills_query, parameters={"student_id": request.student_id})
+        skills_result = neo4j_conn.query(skills_query, parameters={"student_id": request.student_id}, bookmark_key=request.student_id)
         student_skills = skills_result[0]["skills"] if skills_result and skills_result[0]["skills"] else []
         
         # 使用GraphSAGE推荐器获取推荐结果
@@ -1733,7 +1725,7 @@ def debug_data_stats():
 # 启动事件
 @app.on_event("shutdown")
 def shutdown_event():
-    neo4j_conn.close()
+    close_neo4j()
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,15 +2,21 @@
 学生服务 - 依赖项
 提供数据库连接、认证等共享依赖
 """
+import os
+import hmac
 import sys
-import psycopg2
-from fastapi import Depends, HTTPException, status
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic_settings import BaseSettings
 
 from common import config
-from common.database import Neo4jConnection
+from common.database import Neo4jConnection, get_postgres_connection, close_neo4j
+from common.course_skills import CourseSkillIndex
+from common.skill_normalizer import SkillIndex
 from .models import TokenData
 
 # 添加 GraphSAGE 推荐系统的路径
@@ -49,20 +55,86 @@ def get_neo4j():
 
 def get_neon_connection():
     """获取 Neon PostgreSQL 连接"""
-    return psycopg2.connect(settings.neon_database_url)
+    return get_postgres_connection(settings.neon_database_url)
+
+
+# ==================== 课程技能映射 ====================
+
+course_skill_index = CourseSkillIndex(neo4j_conn, interval=config.COURSE_SKILL_REFRESH_INTERVAL)
+
+
+def get_course_skill_index():
+    """获取课程 -> 技能映射（启动时加载，目录变化时后台刷新）"""
+    return course_skill_index
+
+
+def init_course_skills():
+    """加载课程 -> 技能映射并启动后台刷新；加载失败时由后台线程重试"""
+    try:
+        count = course_skill_index.load()
+        print(f"✅ 课程技能映射加载完成 ({count} 门课程)")
+    except Exception as e:
+        print(f"⚠️ 课程技能映射加载失败: {e}")
+    if course_skill_index.start() is not None:
+        print(f"✅ 课程目录变化检查已启动 (间隔 {config.COURSE_SKILL_REFRESH_INTERVAL:g}s)")
+
+
+# ==================== 技能索引 ====================
+
+skill_index = SkillIndex(conn=neo4j_conn, interval=config.SKILL_INDEX_REFRESH_INTERVAL)
+
+
+def get_skill_index():
+    """获取技能规范化索引（大小写/全半角/别名折叠，包含关系匹配）"""
+    return skill_index
+
+
+def init_skill_index():
+    """加载 Skill 词表并启动后台刷新；加载失败时首次查询再加载"""
+    try:
+        count = skill_index.load()
+        print(f"✅ 技能索引加载完成 ({count} 个技能名, {len(skill_index)} 个规范键)")
+    except Exception as e:
+        print(f"⚠️ 技能索引加载失败: {e}")
+    skill_index.start()
 
 
 # ==================== GraphSAGE 推荐器 ====================
 
 graphsage_recommender = None
 
+
+def _swap_graphsage(recommender):
+    """整体替换推荐器引用；进行中的请求继续使用旧对象，新旧推荐器共用进程级的 Neo4j 连接池，不关闭"""
+    global graphsage_recommender
+    if recommender is not None:
+        recommender.course_skill_index = course_skill_index
+        recommender.skill_index = skill_index
+    graphsage_recommender = recommender
+
+
+# 嵌入包版本注册表（仅嵌入包模式下存在）
+model_registry = None
+
 def init_graphsage():
     """初始化 GraphSAGE 推荐器"""
-    global graphsage_recommender
+    global graphsage_recommender, model_registry
     try:
         from hybrid_recommender import create_recommender_from_trained_model
+        from embedding_bundle import list_versions
+        from model_registry import ModelRegistry
         print("🔄 正在初始化GraphSAGE推荐器...")
         
+        # 优先使用嵌入包（内存映射，无需编码器前向）
+        bundle_path = str(config.GRAPHSAGE_BUNDLE_PATH)
+        if list_versions(bundle_path):
+            model_registry = ModelRegistry(bundle_path, on_swap=_swap_graphsage, driver=neo4j_conn.reader,
+                                           interval=config.GRAPHSAGE_BUNDLE_POLL_INTERVAL,
+                                           recall_precision=config.GRAPHSAGE_RECALL_PRECISION)
+            model_registry.load_current()
+            print(f"✅ GraphSAGE推荐器初始化成功 (嵌入包 {model_registry.version})!")
+            return
+        
         # 使用绝对路径
         model_path = str(config.GRAPHSAGE_MODEL_PATH)
         data_path = str(config.GRAPHSAGE_DATA_PATH)
@@ -70,13 +142,15 @@ def init_graphsage():
         # print(f"   模型路径: {model_path}")
         # print(f"   数据路径: {data_path}")
         
-        graphsage_recommender = create_recommender_from_trained_model(
+        _swap_graphsage(create_recommender_from_trained_model(
             model_path=model_path,
             data_path=data_path,
             neo4j_uri=settings.neo4j_uri,
             neo4j_user=settings.neo4j_user,
-            neo4j_password=settings.neo4j_password
-        )
+            neo4j_password=settings.neo4j_password,
+            recall_precision=config.GRAPHSAGE_RECALL_PRECISION,
+            driver=neo4j_conn.reader
+        ))
         print("✅ GraphSAGE推荐器初始化成功!")
     except Exception as e:
         print(f"❌ GraphSAGE推荐器初始化失败: {e}")
@@ -90,6 +164,112 @@ def get_graphsage():
     return graphsage_recommender
 
 
+def get_model_registry():
+    """获取嵌入包版本注册表（未使用嵌入包时为 None）"""
+    return model_registry
+
+
+# 轮询窗口重叠：企业端先创建职位再补技能/城市关系，重叠窗口保证补全后的职位会被重新编码
+REFRESH_OVERLAP = timedelta(seconds=60)
+REFRESH_BATCH = 1000
+# 归纳式编码器加载失败后的重试间隔上限（秒）；失败后从轮询间隔起逐次翻倍，不在每个周期都重新加载图数据
+ATTACH_RETRY_MAX = 1800
+
+
+def _attach_encoder(recommender):
+    """从嵌入包创建的推荐器没有编码器：在后台加载图数据与权重，不阻塞服务启动/热切换"""
+    if recommender.job_encoder is not None:
+        return True
+    try:
+        from embedding_bundle import attach_inductive_encoder
+        attach_inductive_encoder(recommender, str(config.GRAPHSAGE_MODEL_PATH),
+                                 str(config.GRAPHSAGE_DATA_PATH))
+        return True
+    except Exception as e:
+        print(f"⚠️ 归纳式编码器加载失败，新职位嵌入暂不更新: {e}")
+        return False
+
+
+def _refresh_start(recommender):
+    """
+    追赶起点：此后新增/修改的职位没有训练嵌入
+    取嵌入包生成时间与图数据文件修改时间中较早的一个（仅部署嵌入包时没有图数据文件）
+    """
+    candidates = []
+    manifest = recommender.bundle.manifest if hasattr(recommender, 'bundle') else {}
+    if manifest.get('created_at'):
+        candidates.append(datetime.fromisoformat(manifest['created_at']).astimezone(timezone.utc))
+    data_path = str(config.GRAPHSAGE_DATA_PATH)
+    if os.path.exists(data_path):
+        candidates.append(datetime.fromtimestamp(os.path.getmtime(data_path), timezone.utc))
+    return min(candidates, default=datetime.now(timezone.utc)).isoformat()
+
+
+def _job_refresh_loop(interval):
+    target = current = None     # 当前服务的推荐器 / 已挂上编码器、正在刷新的推荐器
+    retry_at, backoff = 0.0, interval
+    since = after = None
+    while True:
+        started = datetime.now(timezone.utc)
+        try:
+            recommender = graphsage_recommender
+            if recommender is not target:
+                # 启动或嵌入包热切换后重新挂编码器、重新确定追赶起点
+                target, current = recommender, None
+                retry_at, backoff = 0.0, interval
+            if target is not None and current is None and time.time() >= retry_at:
+                if _attach_encoder(target):
+                    since, after = _refresh_start(target), None
+                    current = target
+                else:
+                    retry_at = time.time() + backoff
+                    print(f"   {backoff:g}s 后重试加载归纳式编码器")
+                    backoff = min(backoff * 2, ATTACH_RETRY_MAX)
+            if current is not None:
+                count, cursor = current.refresh_changed_jobs(since, REFRESH_BATCH, after)
+                if count >= REFRESH_BATCH:
+                    # 积压较多：从本批最后的 (修改时间, url) 继续，不等待下一个周期；
+                    # 带上 url 是因为同一批写入的职位修改时间相同，只按时间翻页会跳过剩余部分
+                    since, after = cursor
+                    continue
+                since, after = (started - REFRESH_OVERLAP).isoformat(), None
+        except Exception as e:
+            print(f"⚠️ 新职位嵌入更新失败: {e}")
+        time.sleep(interval)
+
+
+def start_job_refresh():
+    """后台轮询新增/修改的职位，归纳式计算嵌入后写入推荐器"""
+    interval = config.GRAPHSAGE_REFRESH_INTERVAL
+    if interval <= 0 or graphsage_recommender is None:
+        return
+    if graphsage_recommender.job_encoder is None and not hasattr(graphsage_recommender, 'bundle'):
+        return
+    thread = threading.Thread(target=_job_refresh_loop, args=(interval,), name="job-refresh", daemon=True)
+    thread.start()
+    print(f"✅ 新职位嵌入轮询已启动 (间隔 {interval:g}s)")
+
+
+def start_bundle_watch():
+    """
+    监视嵌入包 CURRENT 指针，版本切换时后台加载、预热后热切换
+    各 worker 进程各自监视同一目录，矩阵通过内存映射共享页缓存，不会按 worker 数复制
+    """
+    if model_registry is None or config.GRAPHSAGE_BUNDLE_POLL_INTERVAL <= 0:
+        return
+    model_registry.start()
+    print(f"✅ 嵌入包版本监视已启动 (当前 {model_registry.version}, "
+          f"间隔 {config.GRAPHSAGE_BUNDLE_POLL_INTERVAL:g}s)")
+
+
+def verify_admin_token(x_admin_token: str = Header(default="")):
+    """管理接口鉴权：请求头 X-Admin-Token 需与配置一致，未配置时管理接口关闭"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="管理接口未启用")
+    if not hmac.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="管理令牌无效")
+
+
 # ==================== 认证 ====================
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -124,10 +304,12 @@ def create_neo4j_indexes():
         "CREATE INDEX IF NOT EXISTS FOR (c:Course) ON (c.name)",
         "CREATE INDEX IF NOT EXISTS FOR (j:Job) ON (j.city)",
         "CREATE INDEX IF NOT EXISTS FOR (j:Job) ON (j.title)",
+        "CREATE INDEX IF NOT EXISTS FOR (j:Job) ON (j.created_at)",
+        "CREATE INDEX IF NOT EXISTS FOR (j:Job) ON (j.updated_at)",
     ]
     for idx_query in index_queries:
         try:
-            neo4j_conn.query(idx_query)
+            neo4j_conn.execute_write(idx_query)
         except Exception as e:
             print(f"索引创建警告: {e}")
     print("✅ Neo4j 索引创建/验证完成")
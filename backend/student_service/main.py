@@ -5,9 +5,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from common.database import install_bookmarks
+from common.profiling import install_profiling
+
 # 导入路由
-from .routers import recommend_router, user_router, jobs_router, favorites_router, common_router
-from .dependencies import create_neo4j_indexes, init_graphsage
+from .routers import recommend_router, user_router, jobs_router, favorites_router, common_router, admin_router
+from .dependencies import (
+    create_neo4j_indexes, init_course_skills, init_skill_index, init_graphsage, start_job_refresh, start_bundle_watch,
+)
 
 # 创建 FastAPI 应用
 app = FastAPI(
@@ -23,14 +28,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Neo4j-Bookmarks"],
 )
 
+# 因果书签随响应返回，客户端带回后多 worker 下同样读己之写
+install_bookmarks(app)
+
+# 性能剖析（采样请求写入 Server-Timing，/metrics 导出直方图）
+install_profiling(app, "student-service")
+
 # 注册路由
 app.include_router(recommend_router)
 app.include_router(user_router)
 app.include_router(jobs_router)
 app.include_router(favorites_router)
 app.include_router(common_router)
+app.include_router(admin_router)
 
 
 # 启动事件
@@ -39,17 +52,24 @@ async def startup_event():
     """应用启动时初始化"""
     # 创建 Neo4j 索引
     create_neo4j_indexes()
+    # 课程 -> 技能映射（AI 推荐、技能诊断、推荐解释共用）
+    init_course_skills()
+    # 技能名规范化索引（路由、推荐器共用）
+    init_skill_index()
     # 初始化 GraphSAGE 推荐器
     init_graphsage()
+    # 新职位归纳式嵌入轮询
+    start_job_refresh()
+    # 嵌入包版本热切换（CURRENT 指针变化时后台加载、预热后切换）
+    start_bundle_watch()
 
 
 # 关闭事件
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭时清理资源"""
-    from .dependencies import get_neo4j
-    neo4j_conn = get_neo4j()
-    neo4j_conn.close()
+    from .dependencies import close_neo4j
+    close_neo4j()
 
 
 # 根路由
@@ -0,0 +1,53 @@
+"""
+学生服务 - 管理路由
+包含：推荐模型版本查询、切换、回滚（需 X-Admin-Token）
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+from ..dependencies import get_model_registry, verify_admin_token
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(verify_admin_token)])
+
+
+class ActivateRequest(BaseModel):
+    version: str
+
+
+def _registry():
+    registry = get_model_registry()
+    if registry is None:
+        raise HTTPException(status_code=404, detail="推荐服务未使用嵌入包，不支持版本管理")
+    return registry
+
+
+@router.get("/model")
+def get_model_status():
+    """当前生效的推荐模型版本"""
+    return {"code": 200, "data": _registry().status()}
+
+
+@router.post("/model/activate", status_code=202)
+def activate_model(request: ActivateRequest):
+    """后台加载并切换到指定版本（预热完成后切换，切换前继续使用当前版本）"""
+    registry = _registry()
+    try:
+        registry.activate(request.version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"code": 202, "message": f"正在加载 {request.version}", "data": registry.status()}
+
+
+@router.post("/model/rollback", status_code=202)
+def rollback_model():
+    """回滚到上一个生效的版本"""
+    registry = _registry()
+    try:
+        version = registry.rollback()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"code": 202, "message": f"正在回滚到 {version}", "data": registry.status()}
@@ -6,11 +6,12 @@ from fastapi import APIRouter, HTTPException, Body
 from typing import Optional, Dict
 
 from ..utils import sanitize_data
-from ..dependencies import get_neo4j
+from ..dependencies import get_neo4j, get_skill_index
 
 router = APIRouter(tags=["jobs"])
 
 neo4j_conn = get_neo4j()
+skill_index = get_skill_index()
 
 
 @router.get("/api/job/detail/{job_id:path}")
@@ -94,23 +95,8 @@ def get_job_graph(job_id: str, request_body: Optional[Dict] = Body(default=None)
         nodes.append({"id": "industry", "label": "Industry", "name": job_info["industry"]})
         edges.append({"source": "job", "target": "industry", "type": "BELONGS_TO"})
 
-    def skill_fuzzy_match(required_skill: str, user_skills: list) -> bool:
-        """技能模糊匹配"""
-        if not user_skills:
-            return False
-        
-        required_lower = required_skill.lower()
-        
-        for user_skill in user_skills:
-            user_lower = user_skill.lower()
-            if required_lower == user_lower:
-                return True
-            if required_lower in user_lower:
-                return True
-            if user_lower in required_lower:
-                return True
-        
-        return False
+    # 技能模糊匹配（规范键相同或互相包含），全部职位技能一次算出
+    matched_skills = skill_index.match([r["skill"] for r in results], user_skills)
     
     for result in results:
         skill = result["skill"]
@@ -118,7 +104,7 @@ def get_job_graph(job_id: str, request_body: Optional[Dict] = Body(default=None)
             "id": skill,
             "label": "Skill",
             "name": skill,
-            "matched": skill_fuzzy_match(skill, user_skills)
+            "matched": skill in matched_skills
         })
         
         edges.append({
@@ -147,5 +133,5 @@ def get_job_graph(job_id: str, request_body: Optional[Dict] = Body(default=None)
 
 @router.get("/api/student/health")
 def health_check():
-    """健康检查"""
-    return {"status": "ok"}
+    """健康检查（附 Neo4j 连接池使用情况）"""
+    return {"status": "ok", "neo4j_pool": neo4j_conn.pool_metrics()}
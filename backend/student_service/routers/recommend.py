@@ -11,12 +11,14 @@ from ..models import (
     HybridRecommendationRequest
 )
 from ..utils import sanitize_data
-from ..dependencies import get_neo4j, get_graphsage
+from ..dependencies import get_neo4j, get_graphsage, get_course_skill_index, get_skill_index
 
 router = APIRouter(prefix="/api/student", tags=["recommend"])
 
 # 获取依赖
 neo4j_conn = get_neo4j()
+course_skill_index = get_course_skill_index()
+skill_index = get_skill_index()
 
 
 @router.get("/hot-jobs")
@@ -98,7 +100,8 @@ def recommend_by_skills(request: SkillRecommendationRequest):
                    s.education as education,
                    collect(DISTINCT c.name) as courses
             """
-            user_info_result = neo4j_conn.query(user_info_query, parameters={"student_id": student_id})
+            user_info_result = neo4j_conn.query(user_info_query, parameters={"student_id": student_id},
+                                                bookmark_key=student_id)
             
             expected_position = None
             education = None
@@ -184,7 +187,7 @@ def recommend_by_skills(request: SkillRecommendationRequest):
                COLLECT(DISTINCT req_sk.name) AS required_skills,
                matched_skills
         """
-        parameters = {"skills": request.skills, "top_k": request.top_k, "city": request.city}
+        parameters = {"skills": skill_index.resolve(request.skills), "top_k": request.top_k, "city": request.city}
     else:
         query = """
         UNWIND $skills AS skill_name
@@ -199,14 +202,14 @@ def recommend_by_skills(request: SkillRecommendationRequest):
                COLLECT(DISTINCT req_sk.name) AS required_skills,
                matched_skills
         """
-        parameters = {"skills": request.skills, "top_k": request.top_k}
+        parameters = {"skills": skill_index.resolve(request.skills), "top_k": request.top_k}
     
     results = neo4j_conn.query(query, parameters=parameters)
     
     expected_position = None
     if request.student_id:
         user_query = "MATCH (s:Student {student_id: $sid}) RETURN s.expected_position as pos"
-        user_result = neo4j_conn.query(user_query, parameters={"sid": request.student_id})
+        user_result = neo4j_conn.query(user_query, parameters={"sid": request.student_id}, bookmark_key=request.student_id)
         if user_result and user_result[0]:
             expected_position = user_result[0].get("pos")
     
@@ -255,11 +258,16 @@ def hybrid_recommend(request: HybridRecommendationRequest):
             weight_tuple = (0.6, 0.3, 0.1)
         
         skills_query = """
-        MATCH (s:Student {student_id: $student_id})-[:HAS_SKILL]->(sk:Skill)
-        RETURN collect(sk.name) as skills
+        MATCH (s:Student {student_id: $student_id})
+        OPTIONAL MATCH (s)-[:HAS_SKILL]->(sk:Skill)
+        WITH s, collect(sk.name) as skills
+        OPTIONAL MATCH (s)-[:TAKES]->(c:Course)
+        RETURN skills, collect(DISTINCT c.name) as courses
         """
-        skills_result = neo4j_conn.query(skills_query, parameters={"student_id": request.student_id})
+        skills_result = neo4j_conn.query(skills_query, parameters={"student_id": request.student_id},
+                                         bookmark_key=request.student_id)
         student_skills = skills_result[0]["skills"] if skills_result and skills_result[0]["skills"] else []
+        student_courses = skills_result[0]["courses"] if skills_result else []
         
         recommendations = graphsage_recommender.recommend(
             student_id=request.student_id,
@@ -297,41 +305,22 @@ def hybrid_recommend(request: HybridRecommendationRequest):
                 
                 insight = None
                 if request.include_insight:
-                    direct_skill_query = """
-                    MATCH (s:Student {student_id: $student_id})-[:HAS_SKILL]->(sk:Skill)
-                          <-[:REQUIRES_SKILL]-(j:Job)
-                    WHERE j.url ENDS WITH $job_suffix
-                    RETURN sk.name AS skill
-                    """
-                    direct_results = neo4j_conn.query(direct_skill_query, parameters={
-                        "student_id": request.student_id,
-                        "job_suffix": job_id
-                    })
-                    direct_skills = set(r["skill"] for r in direct_results) if direct_results else set()
-                    
-                    course_skill_query = """
-                    MATCH (s:Student {student_id: $student_id})-[:TAKES]->(c:Course)-[:TEACHES_SKILL]->(sk:Skill)
-                          <-[:REQUIRES_SKILL]-(j:Job)
-                    WHERE j.url ENDS WITH $job_suffix
-                    RETURN sk.name AS skill, COLLECT(DISTINCT c.name) AS sources
-                    """
-                    course_results = neo4j_conn.query(course_skill_query, parameters={
-                        "student_id": request.student_id,
-                        "job_suffix": job_id
-                    })
+                    # 直接技能与课程技能都在内存中与职位要求求交集，不再逐个职位遍历图
+                    required = set(job_info["required_skills"] or [])
+                    direct_skills = required.intersection(student_skills)
+                    course_sources = course_skill_index.sources(student_courses, required) if student_courses else {}
                     
                     skill_paths = []
                     for skill in direct_skills:
                         skill_paths.append({"skill": skill, "sources": [], "direct_match": True})
                     
-                    if course_results:
-                        for r in course_results:
-                            if r["skill"] not in direct_skills:
-                                skill_paths.append({
-                                    "skill": r["skill"],
-                                    "sources": r["sources"],
-                                    "direct_match": False
-                                })
+                    for skill, sources in course_sources.items():
+                        if skill not in direct_skills:
+                            skill_paths.append({
+                                "skill": skill,
+                                "sources": sources,
+                                "direct_match": False
+                            })
                     
                     if skill_paths:
                         insight = {"skill_paths": skill_paths}
@@ -5,6 +5,7 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from typing import Optional
 
+from common import config
 from ..models import (
     LoginRequest,
     UpdateProfileRequest,
@@ -13,11 +14,13 @@ from ..models import (
     SkillDiagnosisRequest
 )
 from ..utils import verify_password, get_password_hash
-from ..dependencies import get_neo4j
+from ..dependencies import get_neo4j, get_course_skill_index, get_skill_index
 
 router = APIRouter(prefix="/api/student", tags=["user"])
 
 neo4j_conn = get_neo4j()
+course_skill_index = get_course_skill_index()
+skill_index = get_skill_index()
 
 
 @router.post("/login")
@@ -32,7 +35,8 @@ def student_login(request: LoginRequest):
            COLLECT(DISTINCT sk.name) AS skills, COLLECT(DISTINCT c.name) AS courses
     """
     
-    results = neo4j_conn.query(query, parameters={"username": request.username})
+    # 以用户名为书签键：刚注册的用户立即登录时，只读副本也能看到该账号
+    results = neo4j_conn.query(query, parameters={"username": request.username}, bookmark_key=request.username)
     
     if not results or results[0].get("student_id") is None:
         count_result = neo4j_conn.query('MATCH (s:Student) RETURN COUNT(s) AS count')
@@ -46,11 +50,11 @@ def student_login(request: LoginRequest):
                s.major AS major, s.expected_position AS expected_position
         """
         
-        create_result = neo4j_conn.query(create_query, parameters={
+        create_result = neo4j_conn.execute_write(create_query, parameters={
             "student_id": new_student_id,
             "username": request.username,
             "password": hashed_password
-        })
+        }, bookmark_key=[request.username, new_student_id])
         
         return {
             "code": 200,
@@ -69,9 +73,10 @@ def student_login(request: LoginRequest):
             raise HTTPException(status_code=401, detail="Incorrect password")
     else:
         hashed_password = get_password_hash(request.password)
-        neo4j_conn.query(
+        neo4j_conn.execute_write(
             "MATCH (s:Student {student_id: $student_id}) SET s.password = $password",
-            parameters={"student_id": student["student_id"], "password": hashed_password}
+            parameters={"student_id": student["student_id"], "password": hashed_password},
+            bookmark_key=[request.username, student["student_id"]]
         )
     
     return {"code": 200, "data": student}
@@ -109,7 +114,7 @@ def get_profile(student_id: str):
            COLLECT(DISTINCT sk.name) AS skills,
            COLLECT(DISTINCT c.name) AS courses
     """
-    results = neo4j_conn.query(query, parameters={"student_id": student_id})
+    results = neo4j_conn.query(query, parameters={"student_id": student_id}, bookmark_key=student_id)
     if not results or not results[0].get("student_id"):
         raise HTTPException(status_code=404, detail="User not found")
     return {"code": 200, "data": results[0]}
@@ -127,19 +132,20 @@ def update_profile(request: UpdateProfileRequest):
     RETURN s.student_id AS student_id
     """
     
-    neo4j_conn.query(update_basic_query, parameters={
+    neo4j_conn.execute_write(update_basic_query, parameters={
         "student_id": request.student_id,
         "name": request.name,
         "education": request.education,
         "major": request.major,
         "expected_position": request.expected_position
-    })
+    }, bookmark_key=request.student_id)
     
     delete_skills_query = """
     MATCH (s:Student {student_id: $student_id})-[r:HAS_SKILL]->()
     DELETE r
     """
-    neo4j_conn.query(delete_skills_query, parameters={"student_id": request.student_id})
+    neo4j_conn.execute_write(delete_skills_query, parameters={"student_id": request.student_id},
+                             bookmark_key=request.student_id)
     
     if request.skills:
         add_skills_query = """
@@ -148,17 +154,20 @@ def update_profile(request: UpdateProfileRequest):
         MATCH (sk:Skill {name: skill_name})
         MERGE (s)-[:HAS_SKILL]->(sk)
         """
-        neo4j_conn.query(add_skills_query, parameters={
+        # 折叠到图中已有的写法（python -> Python），否则大小写不同的技能会被 MATCH 漏掉
+        skills = [skill_index.canonical(skill) or skill for skill in request.skills]
+        neo4j_conn.execute_write(add_skills_query, parameters={
             "student_id": request.student_id,
-            "skills": request.skills
-        })
+            "skills": list(dict.fromkeys(skills))
+        }, bookmark_key=request.student_id)
     
     if hasattr(request, 'courses') and request.courses:
         delete_courses_query = """
         MATCH (s:Student {student_id: $student_id})-[r:ENROLLED_IN]->()
         DELETE r
         """
-        neo4j_conn.query(delete_courses_query, parameters={"student_id": request.student_id})
+        neo4j_conn.execute_write(delete_courses_query, parameters={"student_id": request.student_id},
+                                 bookmark_key=request.student_id)
         
         add_courses_query = """
         MATCH (s:Student {student_id: $student_id})
@@ -166,10 +175,10 @@ def update_profile(request: UpdateProfileRequest):
         MATCH (c:Course {name: course_name})
         MERGE (s)-[:ENROLLED_IN]->(c)
         """
-        neo4j_conn.query(add_courses_query, parameters={
+        neo4j_conn.execute_write(add_courses_query, parameters={
             "student_id": request.student_id,
             "courses": request.courses
-        })
+        }, bookmark_key=request.student_id)
     
     get_profile_query = """
     MATCH (s:Student {student_id: $student_id})
@@ -179,7 +188,8 @@ def update_profile(request: UpdateProfileRequest):
            s.major AS major, s.expected_position AS expected_position,
            COLLECT(DISTINCT sk.name) AS skills, COLLECT(DISTINCT c.name) AS courses
     """
-    result = neo4j_conn.query(get_profile_query, parameters={"student_id": request.student_id})
+    result = neo4j_conn.query(get_profile_query, parameters={"student_id": request.student_id},
+                              bookmark_key=request.student_id)
     
     return {"message": "Profile updated successfully", "data": result[0] if result else None}
 
@@ -221,7 +231,8 @@ def save_courses(request: SaveCoursesRequest):
     MATCH (s:Student {student_id: $student_id})-[r:TAKES]->()
     DELETE r
     """
-    neo4j_conn.query(delete_query, parameters={"student_id": request.student_id})
+    neo4j_conn.execute_write(delete_query, parameters={"student_id": request.student_id},
+                             bookmark_key=request.student_id)
     
     if request.courses:
         add_query = """
@@ -231,10 +242,10 @@ def save_courses(request: SaveCoursesRequest):
         MERGE (s)-[:TAKES]->(c)
         RETURN count(*) AS added
         """
-        neo4j_conn.query(add_query, parameters={
+        neo4j_conn.execute_write(add_query, parameters={
             "student_id": request.student_id,
             "courses": request.courses
-        })
+        }, bookmark_key=request.student_id)
     
     return {"message": "Courses saved successfully", "courses": request.courses}
 
@@ -249,29 +260,25 @@ def diagnose_skills(request: SkillDiagnosisRequest):
     MATCH (s:Student {student_id: $student_id})
     RETURN s.expected_position AS expected_position, s.education AS education, s.major AS major
     """
-    profile_result = neo4j_conn.query(profile_query, parameters={"student_id": student_id})
+    profile_result = neo4j_conn.query(profile_query, parameters={"student_id": student_id}, bookmark_key=student_id)
     expected_position = profile_result[0]["expected_position"] if profile_result else None
     education = profile_result[0]["education"] if profile_result else None
     major = profile_result[0]["major"] if profile_result else None
     
-    # 获取技能
+    # 获取技能：直接技能 + 已修课程，课程技能由课程技能映射合并
     skills_query = """
-    OPTIONAL MATCH (s:Student {student_id: $student_id})-[:HAS_SKILL]->(sk1:Skill)
-    WITH COLLECT(DISTINCT sk1.name) AS direct_skills
-    OPTIONAL MATCH (s2:Student {student_id: $student_id})-[:TAKES]->(c:Course)-[:TEACHES_SKILL]->(sk2:Skill)
-    WITH direct_skills, COLLECT(DISTINCT sk2.name) AS course_skills
-    WITH direct_skills, course_skills, 
-         [x IN direct_skills + course_skills WHERE x IS NOT NULL | x] AS all_raw
-    UNWIND all_raw AS skill
-    WITH direct_skills, course_skills, COLLECT(DISTINCT skill) AS all_skills
-    RETURN direct_skills, course_skills, all_skills
+    OPTIONAL MATCH (s:Student {student_id: $student_id})
+    OPTIONAL MATCH (s)-[:HAS_SKILL]->(sk:Skill)
+    WITH s, COLLECT(DISTINCT sk.name) AS direct_skills
+    OPTIONAL MATCH (s)-[:TAKES]->(c:Course)
+    RETURN direct_skills, COLLECT(DISTINCT c.name) AS courses
     """
-    skills_result = neo4j_conn.query(skills_query, parameters={"student_id": student_id})
+    skills_result = neo4j_conn.query(skills_query, parameters={"student_id": student_id}, bookmark_key=student_id)
     
     if skills_result:
         direct_skills = [s for s in skills_result[0]["direct_skills"] if s]
-        course_skills = [s for s in skills_result[0]["course_skills"] if s]
-        all_skills = [s for s in skills_result[0]["all_skills"] if s]
+        course_skills = sorted(course_skill_index.skills_for(skills_result[0]["courses"]))
+        all_skills = list(dict.fromkeys(direct_skills + course_skills))
     else:
         direct_skills, course_skills, all_skills = [], [], []
     
@@ -318,53 +325,43 @@ def diagnose_skills(request: SkillDiagnosisRequest):
     matched_hot_skills = [s["name"] for s in hot_skills if s["name"] in all_skills]
     market_match_rate = round(len(matched_hot_skills) / len(hot_skills) * 100, 2) if hot_skills else 0
     
-    # 同行对比
+    # 同行对比：最多采样 PEER_SAMPLE_LIMIT 名同行，技能数均值与热门技能在图数据库中聚合，只返回一行
     def build_peer_query(where_clause):
         return f"""
         MATCH (s:Student)
         WHERE {where_clause} AND s.student_id <> $student_id
+        WITH s LIMIT $peer_limit
         OPTIONAL MATCH (s)-[:HAS_SKILL]->(sk1:Skill)
+        WITH s, COLLECT(DISTINCT sk1.name) AS direct_skills
         OPTIONAL MATCH (s)-[:TAKES]->(:Course)-[:TEACHES_SKILL]->(sk2:Skill)
-        WITH s, COLLECT(DISTINCT sk1.name) + COLLECT(DISTINCT sk2.name) AS all_skill_names
-        WITH s, [x IN all_skill_names WHERE x IS NOT NULL | x] AS skills
-        WITH s, SIZE(skills) AS skill_count, skills
-        WITH COLLECT(skill_count) AS all_counts, COLLECT(skills) AS all_skills_lists
-        UNWIND all_skills_lists AS skill_list
+        WITH s, direct_skills, COLLECT(DISTINCT sk2.name) AS taught_skills
+        WITH s, direct_skills + [x IN taught_skills WHERE NOT x IN direct_skills] AS skills
+        WITH COUNT(s) AS peer_count, AVG(SIZE(skills)) AS avg_count, COLLECT(skills) AS skill_lists
+        UNWIND skill_lists AS skill_list
         UNWIND skill_list AS skill
-        WITH all_counts, skill, COUNT(*) AS freq
+        WITH peer_count, avg_count, skill, COUNT(*) AS freq
         ORDER BY freq DESC
-        WITH all_counts, COLLECT(skill)[0..5] AS top_skills
-        WITH top_skills, 
-             CASE WHEN SIZE(all_counts) > 0 THEN REDUCE(sum=0.0, x IN all_counts | sum + x) / SIZE(all_counts) ELSE 0 END AS avg_count,
-             SIZE(all_counts) AS peer_count
+        WITH peer_count, avg_count, COLLECT(skill)[0..5] AS top_skills
         RETURN avg_count, peer_count, top_skills
         """
     
     peer_data = None
-    
+    peer_filters = []
     if expected_position:
-        peer_query = build_peer_query("s.expected_position = $position")
-        peer_result = neo4j_conn.query(peer_query, parameters={"position": expected_position, "student_id": student_id})
-        if peer_result and peer_result[0]["peer_count"] > 0:
-            peer_data = peer_result[0]
-    
-    if not peer_data and major:
-        peer_query = build_peer_query("s.major = $major")
-        peer_result = neo4j_conn.query(peer_query, parameters={"major": major, "student_id": student_id})
-        if peer_result and peer_result[0]["peer_count"] > 0:
-            peer_data = peer_result[0]
-    
-    if not peer_data and education:
-        peer_query = build_peer_query("s.education = $education")
-        peer_result = neo4j_conn.query(peer_query, parameters={"education": education, "student_id": student_id})
-        if peer_result and peer_result[0]["peer_count"] > 0:
-            peer_data = peer_result[0]
-    
-    if not peer_data:
-        peer_query = build_peer_query("s.student_id IS NOT NULL")
-        peer_result = neo4j_conn.query(peer_query, parameters={"student_id": student_id})
+        peer_filters.append(("s.expected_position = $position", {"position": expected_position}))
+    if major:
+        peer_filters.append(("s.major = $major", {"major": major}))
+    if education:
+        peer_filters.append(("s.education = $education", {"education": education}))
+    peer_filters.append(("s.student_id IS NOT NULL", {}))
+    
+    for where_clause, params in peer_filters:
+        peer_result = neo4j_conn.query(build_peer_query(where_clause),
+                                       parameters={**params, "student_id": student_id,
+                                                   "peer_limit": config.PEER_SAMPLE_LIMIT})
         if peer_result and peer_result[0]["peer_count"] > 0:
             peer_data = peer_result[0]
+            break
     
     if peer_data:
         avg_skills_count = round(peer_data["avg_count"], 1)
@@ -379,19 +376,7 @@ def diagnose_skills(request: SkillDiagnosisRequest):
     # 推荐课程
     gap_skills = missing_position_skills[:5] if missing_position_skills else [s["name"] for s in hot_skills if s["name"] not in all_skills][:5]
     
-    if gap_skills:
-        course_query = """
-        UNWIND $skills AS skill_name
-        MATCH (c:Course)-[:TEACHES_SKILL]->(sk:Skill {name: skill_name})
-        WITH c, COLLECT(DISTINCT sk.name) AS covers
-        RETURN c.name AS name, covers, SIZE(covers) AS priority
-        ORDER BY priority DESC
-        LIMIT 4
-        """
-        course_results = neo4j_conn.query(course_query, parameters={"skills": gap_skills})
-        recommended_courses = [{"name": r["name"], "covers": r["covers"], "priority": r["priority"]} for r in course_results]
-    else:
-        recommended_courses = []
+    recommended_courses = course_skill_index.courses_for_skills(gap_skills, limit=4) if gap_skills else []
     
     # 生成诊断结论
     strengths = []
@@ -9,7 +9,6 @@ from pydantic import BaseModel
 from neo4j import GraphDatabase
 from typing import List, Optional
 from passlib.context import CryptContext
-import psycopg2
 import math
 import sys
 
@@ -36,14 +35,15 @@ settings = Settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # 导入共享的 Neo4j 连接（已包含连接池、健康检查和重连机制）
-from common.database import Neo4jConnection
+from common.database import Neo4jConnection, get_postgres_connection, close_neo4j
+from common.profiling import install_profiling
 
 # 创建Neo4j连接实例
 neo4j_conn = Neo4jConnection(settings.neo4j_uri, settings.neo4j_user, settings.neo4j_password)
 
 # Neon数据库连接
 def get_neon_connection():
-    return psycopg2.connect(settings.neon_database_url)
+    return get_postgres_connection(settings.neon_database_url)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -63,8 +63,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# 性能剖析（采样请求写入 Server-Timing，/metrics 导出直方图）
+install_profiling(app, "university-service")
+
 # ==================== 高校端API ====================
 
 @app.get("/api/")
@@ -340,12 +344,12 @@ def get_reform_suggestions():
 # 健康检查
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "service": "university", "port": 8003}
+    return {"status": "healthy", "service": "university", "port": 8003, "neo4j_pool": neo4j_conn.pool_metrics()}
 
 # 关闭事件
 @app.on_event("shutdown")
 def shutdown_event():
-    neo4j_conn.close()
+    close_neo4j()
 
 if __name__ == "__main__":
     import uvicorn
@@ -5,6 +5,27 @@ const api = axios.create({
   timeout: 30000,
 });
 
+// Neo4j 因果书签：写请求的响应头带回书签，之后的请求原样带上，
+// 多 worker 部署下读请求落到其他进程时也能读到自己刚才的写入
+const BOOKMARK_HEADER = "x-neo4j-bookmarks";
+
+function installBookmarks(client) {
+  client.interceptors.request.use((config) => {
+    const bookmarks = localStorage.getItem("neo4jBookmarks");
+    if (bookmarks) config.headers[BOOKMARK_HEADER] = bookmarks;
+    return config;
+  });
+  client.interceptors.response.use((response) => {
+    const bookmarks = response.headers[BOOKMARK_HEADER];
+    if (bookmarks) localStorage.setItem("neo4jBookmarks", bookmarks);
+    return response;
+  });
+}
+
+// 部分页面直接使用 axios，默认实例同样安装
+installBookmarks(api);
+installBookmarks(axios);
+
 // ==================== 学生端 API ====================
 export const studentApi = {
   // 热门职位
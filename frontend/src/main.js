@@ -3,6 +3,7 @@ import { createPinia } from 'pinia'
 import Antd from 'ant-design-vue'
 import App from './App.vue'
 import router from './router'
+import './api'  // 安装 axios 书签拦截器（部分页面直接使用 axios）
 import 'ant-design-vue/dist/reset.css'
 import './styles/global.css'
 
@@ -16,10 +16,24 @@
 - (Major)-[:HAS_COURSE]->(Course)
 - (Course)-[:TEACHES_SKILL]->(Skill)
 - (Student)-[:TAKES]->(Course)
+
+写入方式: 先在内存中组装参数列表，再按 --batch-size 分批用 UNWIND 写入，每批一个事务；
+--workers > 1 时多个写线程并行提交学生批次（各自的 session，死锁等瞬时错误由 execute_write 重试）。
+
+合成学生（--generate / --shards）的学号统一加 --id-prefix 前缀（默认 BENCH-），
+不会覆盖库中 STU0001… 的真实学生，也不会给真实学生添加 TAKES 关系。
+
+用法:
+    python 导入Neo4j.py -f students_data.json
+    python 导入Neo4j.py --generate 100000 --batch-size 5000 --workers 4 -y   # 压测用合成学生（向量化采样）
+    python 导入Neo4j.py --shards students_1m --workers 4 -y                 # 导入 生成学生数据_大规模.py 的分片
 """
 
 import json
 import os
+import glob
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from neo4j import GraphDatabase
 from datetime import datetime
 
@@ -28,6 +42,61 @@ NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "TYH041113"
 
+# 每个事务写入的行数
+BATCH_SIZE = 1000
+
+# 合成学生的学号前缀，与真实学生（STU0001…）区分
+BENCH_ID_PREFIX = 'BENCH-'
+
+
+def _batches(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _with_prefix(students, prefix):
+    for student in students:
+        student['student_id'] = prefix + student['student_id']
+    return students
+
+
+def generated_students(count, seed=None, shard_size=None):
+    """向量化采样合成学生（生成学生数据_大规模.py 的采样器），按分片逐个产出学生列表"""
+    import 生成学生数据_大规模 as large_gen
+    freq_file = large_gen.latest_skill_freq_file()
+    sampler = large_gen.StudentSampler(large_gen.load_skill_freq(freq_file) if freq_file else {}, seed=seed)
+    shard_size = shard_size or large_gen.SHARD_SIZE
+    id_format = 'STU{:0%dd}' % max(4, len(str(count)))
+    for offset in range(0, count, shard_size):
+        yield sampler.sample(offset + 1, min(shard_size, count - offset), id_format)
+
+
+def read_shards(shard_dir):
+    """逐个读取 生成学生数据_大规模.py 输出的 JSONL / Parquet 分片，返回 (分片迭代器, 专业数据, 学生总数)"""
+    manifest_path = os.path.join(shard_dir, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        files = [os.path.join(shard_dir, shard['file']) for shard in manifest['shards']]
+        total = sum(shard['count'] for shard in manifest['shards'])
+        domain_file = os.path.join(shard_dir, manifest.get('domain_data', 'domain_data.json'))
+    else:
+        files = sorted(glob.glob(os.path.join(shard_dir, 'students-*.jsonl'))
+                       + glob.glob(os.path.join(shard_dir, 'students-*.parquet')))
+        total = None
+        domain_file = os.path.join(shard_dir, 'domain_data.json')
+    with open(domain_file, 'r', encoding='utf-8') as f:
+        domain_data = json.load(f)
+
+    def load(path):
+        if path.endswith('.parquet'):
+            import pandas as pd
+            return pd.read_parquet(path).to_dict('records')
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    return (load(path) for path in files), domain_data, total
+
 
 class StudentGraphImporter:
     def __init__(self, uri, user, password):
@@ -66,73 +135,86 @@ class StudentGraphImporter:
                     print(f"⚠️ 约束警告: {e}")
         print("📋 约束已创建")
     
-    def import_domain_data(self, domain_data):
+    def _write_batches(self, cypher, rows, label, batch_size=BATCH_SIZE, workers=1):
+        """按批 UNWIND 写入，打印进度与吞吐；返回写入行数"""
+        if not rows:
+            return 0
+        batches = list(_batches(rows, batch_size))
+        start = time.time()
+        done = 0
+
+        def write(batch):
+            with self.driver.session() as session:
+                session.execute_write(lambda tx: tx.run(cypher, rows=batch).consume())
+            return len(batch)
+
+        def report(count, finished):
+            elapsed = time.time() - start
+            print(f"  📊 {label}: {count:,}/{len(rows):,} ({count / max(elapsed, 1e-6):,.0f} 条/秒)"
+                  + (f", 用时 {elapsed:.1f}s" if finished else ""))
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(write, batch) for batch in batches]
+                for i, future in enumerate(as_completed(futures), 1):
+                    done += future.result()
+                    if i % 10 == 0 or i == len(batches):
+                        report(done, i == len(batches))
+        else:
+            for i, batch in enumerate(batches, 1):
+                done += write(batch)
+                if i % 10 == 0 or i == len(batches):
+                    report(done, i == len(batches))
+        return done
+
+    def import_domain_data(self, domain_data, batch_size=BATCH_SIZE):
         """导入专业、课程、技能数据"""
-        with self.driver.session() as session:
-            for major_name, courses in domain_data.items():
-                # 创建专业节点
-                session.run("MERGE (m:Major {name: $name})", name=major_name)
-                
-                for course_name, skills in courses.items():
-                    # 创建课程节点
-                    session.run("MERGE (c:Course {name: $name})", name=course_name)
-                    
-                    # 专业-课程关系
-                    session.run("""
-                        MATCH (m:Major {name: $major})
-                        MATCH (c:Course {name: $course})
-                        MERGE (m)-[:HAS_COURSE]->(c)
-                    """, major=major_name, course=course_name)
-                    
-                    # 课程-技能关系
-                    for skill_name in skills:
-                        # 复用或创建技能节点
-                        session.run("MERGE (s:Skill {name: $name})", name=skill_name)
-                        session.run("""
-                            MATCH (c:Course {name: $course})
-                            MATCH (s:Skill {name: $skill})
-                            MERGE (c)-[:TEACHES_SKILL]->(s)
-                        """, course=course_name, skill=skill_name)
+        course_rows = [
+            {'major': major_name, 'course': course_name, 'skills': list(skills)}
+            for major_name, courses in domain_data.items()
+            for course_name, skills in courses.items()
+        ]
+        # 专业/课程/技能节点被多行共享，串行写入避免锁竞争
+        self._write_batches("""
+            UNWIND $rows AS row
+            MERGE (m:Major {name: row.major})
+            MERGE (c:Course {name: row.course})
+            MERGE (m)-[:HAS_COURSE]->(c)
+            WITH c, row
+            UNWIND row.skills AS skill_name
+            MERGE (s:Skill {name: skill_name})
+            MERGE (c)-[:TEACHES_SKILL]->(s)
+        """, course_rows, '专业-课程-技能', batch_size)
         
         print("📚 专业-课程-技能数据已导入")
     
-    def import_students(self, students):
-        """导入学生数据"""
-        count = 0
-        with self.driver.session() as session:
-            for student in students:
-                # 创建学生节点
-                session.run("""
-                    MERGE (s:Student {student_id: $id})
-                    SET s.name = $name,
-                        s.education = $education
-                """,
-                    id=student['student_id'],
-                    name=student['name'],
-                    education=student['education']
-                )
-                
-                # 学生-专业关系
-                session.run("""
-                    MATCH (s:Student {student_id: $id})
-                    MATCH (m:Major {name: $major})
-                    MERGE (s)-[:MAJORS_IN]->(m)
-                """, id=student['student_id'], major=student['major'])
-                
-                # 学生-课程关系
-                for course in student['courses']:
-                    course_name = course['name'] if isinstance(course, dict) else course
-                    session.run("""
-                        MATCH (s:Student {student_id: $id})
-                        MATCH (c:Course {name: $course})
-                        MERGE (s)-[:TAKES]->(c)
-                    """, id=student['student_id'], course=course_name)
-                
-                count += 1
-                if count % 20 == 0:
-                    print(f"  📊 进度: {count}/{len(students)}")
+    def import_students(self, students, batch_size=BATCH_SIZE, workers=1):
+        """导入学生数据（UNWIND 批量写入，可多线程并行）"""
+        rows = [{
+            'id': student['student_id'],
+            'name': student['name'],
+            'education': student['education'],
+            'major': student['major'],
+            'courses': [course['name'] if isinstance(course, dict) else course for course in student['courses']],
+        } for student in students]
+        
+        start = time.time()
+        count = self._write_batches("""
+            UNWIND $rows AS row
+            MERGE (s:Student {student_id: row.id})
+            SET s.name = row.name,
+                s.education = row.education
+            WITH s, row
+            OPTIONAL MATCH (m:Major {name: row.major})
+            FOREACH (_ IN CASE WHEN m IS NULL THEN [] ELSE [1] END | MERGE (s)-[:MAJORS_IN]->(m))
+            WITH s, row
+            UNWIND row.courses AS course_name
+            MATCH (c:Course {name: course_name})
+            MERGE (s)-[:TAKES]->(c)
+        """, rows, '学生', batch_size, workers)
         
-        print(f"👥 已导入 {count} 名学生")
+        elapsed = time.time() - start
+        print(f"👥 已导入 {count} 名学生 ({elapsed:.1f}s, {count / max(elapsed, 1e-6):,.0f} 名/秒)")
         return count
     
     def get_statistics(self):
@@ -175,6 +257,18 @@ def main():
                        help='自动确认导入操作')
     parser.add_argument('--file', '-f', default='students_data.json',
                        help='学生数据文件名')
+    parser.add_argument('--generate', type=int, default=0,
+                       help='不读文件，直接生成指定数量的合成学生（压测用）')
+    parser.add_argument('--shards', default=None,
+                       help='导入 生成学生数据_大规模.py 输出的分片目录（JSONL / Parquet）')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='--generate 的随机种子')
+    parser.add_argument('--id-prefix', default=BENCH_ID_PREFIX,
+                       help='合成学生（--generate / --shards）的学号前缀，避免覆盖真实学生')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                       help='每个事务写入的行数')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='并行写入学生的线程数')
     args = parser.parse_args()
     
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -185,24 +279,36 @@ def main():
     print(f"📅 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*60)
     
-    # 读取数据
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    students = data['students']
-    domain_data = data['domain_data']
+    # 读取数据（合成学生按分片产出，边生成/读取边写入）
+    if args.generate:
+        from 生成学生数据_500 import domain_data
+        student_batches = generated_students(args.generate, args.seed)
+        total = args.generate
+        source = f'（合成数据，学号前缀 {args.id_prefix}）'
+    elif args.shards:
+        student_batches, domain_data, total = read_shards(args.shards)
+        source = f'{args.shards}（分片，学号前缀 {args.id_prefix}）'
+    else:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        student_batches = [data['students']]
+        domain_data = data['domain_data']
+        total = len(data['students'])
+        source = args.file
     
-    print(f"📥 读取 {len(students)} 名学生, {len(domain_data)} 个专业")
+    total_text = f"{total:,}" if total is not None else "全部分片中的"
+    print(f"📥 待导入 {total_text} 名学生, {len(domain_data)} 个专业")
     
     # 安全确认
     print("\n" + "="*60)
     print("⚠️  安全提醒")
     print("="*60)
     print("即将向Neo4j数据库写入学生数据！")
-    print(f"\n将导入: {len(students)} 名学生, {len(domain_data)} 个专业")
+    print(f"\n将导入: {total_text} 名学生, {len(domain_data)} 个专业")
     print("\n建议操作:")
     print("  1. 确认已备份Neo4j数据库")
-    print(f"  2. 检查数据文件: {args.file}")
+    print(f"  2. 检查数据文件: {source}")
     print("  3. 确认数据库中已有Job数据")
     print("="*60)
     
@@ -222,10 +328,14 @@ def main():
         importer.create_constraints()
         
         # 导入专业-课程-技能
-        importer.import_domain_data(domain_data)
+        importer.import_domain_data(domain_data, args.batch_size)
         
         # 导入学生
-        importer.import_students(students)
+        synthetic = bool(args.generate or args.shards)
+        for students in student_batches:
+            if synthetic:
+                students = _with_prefix(students, args.id_prefix)
+            importer.import_students(students, args.batch_size, args.workers)
         
         # 统计
         print("\n" + "="*60)
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大规模学生数据生成（压测用）
+============================
+生成学生数据_500.py 逐个学生调用 random，并把全部学生写成一个 JSON 文档，
+百万级学生时既慢又需要整棵 JSON 树常驻内存。本脚本:
+
+- 每个分片一次性用 NumPy 向量化采样 姓名 / 学历 / 专业 / 课程 / 期望城市 / 额外技能
+- 课程按其所教技能在真实职位中的频次加权（技能频次表来自 技能提取/提取技能.py 的 技能频次_*.tsv），
+  专业按其课程权重之和加权；分布参数可用 --config 的 JSON 覆盖
+- 按 --shard-size 流式写出 JSON Lines 或 Parquet 分片，内存只与分片大小有关
+
+输出目录结构:
+    students-00000.jsonl ...   学生分片（字段与 students_data_500.json 中的学生一致，courses 只保留课程名）
+    domain_data.json           专业-课程-技能数据（导入 Neo4j 时使用）
+    manifest.json              分片列表、分布参数与统计
+
+用法:
+    python 生成学生数据_大规模.py --count 1000000 --output-dir students_1m
+    python 生成学生数据_大规模.py --count 1000000 --format parquet --shard-size 200000 --seed 42
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from 生成学生数据_500 import (domain_data, SURNAMES, NAMES, TIER1_CITIES, TIER15_CITIES,
+                          TIER2_CITIES, EDUCATION_WEIGHTS)
+
+SKILL_FREQ_DIR = os.path.abspath(os.path.join(BASE_DIR, '..', '技能提取'))
+
+SHARD_SIZE = 100000
+
+# 默认分布（与 生成学生数据_500.py 一致，可用 --config 覆盖其中任意项）
+DEFAULT_DISTRIBUTIONS = {
+    'education': EDUCATION_WEIGHTS,
+    'city_count': {'1': 0.5, '2': 0.35, '3': 0.15},
+    'city_tiers': {'tier1': 0.40, 'tier15': 0.35, 'tier2': 0.25},
+    'two_char_name': 0.4,           # 双字名比例
+    'courses': [4, 8],              # 每名学生的课程数范围（闭区间，且不超过专业课程数）
+    'skill_freq_power': 0.5,        # 课程权重 = (1 + 所教技能频次之和) ** power，0 表示均匀
+    'major': 'market',              # market: 按课程权重之和；uniform: 均匀
+    'extra_skills': 0.0,            # 课程之外自学技能数的均值（泊松分布），按职位技能频次采样
+    'extra_skill_top': 2000,        # 额外技能只从频次最高的前 N 个技能中采样
+}
+
+CITY_TIERS = {'tier1': TIER1_CITIES, 'tier15': TIER15_CITIES, 'tier2': TIER2_CITIES}
+
+
+def latest_skill_freq_file():
+    files = sorted(glob.glob(os.path.join(SKILL_FREQ_DIR, '技能频次_*.tsv')))
+    return files[-1] if files else None
+
+
+def load_skill_freq(path):
+    """读取 技能频次_*.tsv（表头: 技能\t频次）"""
+    freq = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        next(f, None)
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) == 2 and parts[1].isdigit():
+                freq[parts[0]] = int(parts[1])
+    return freq
+
+
+def _probabilities(weights):
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights / weights.sum()
+
+
+class StudentSampler:
+    """
+    按分片向量化采样学生
+
+    Args:
+        skill_freq: {技能: 职位中出现次数}，为空时课程/专业均匀分布
+        config: 覆盖 DEFAULT_DISTRIBUTIONS 的分布参数
+        seed: 随机种子
+    """
+
+    def __init__(self, skill_freq=None, config=None, seed=None):
+        self.config = {**DEFAULT_DISTRIBUTIONS, **(config or {})}
+        self.rng = np.random.default_rng(seed)
+        skill_freq = skill_freq or {}
+
+        # --- 课程表（按专业补齐成矩阵，空位权重为 0） ---
+        self.majors = list(domain_data)
+        self.courses = [course for major in self.majors for course in domain_data[major]]
+        course_code = {course: i for i, course in enumerate(dict.fromkeys(self.courses))}
+        self.courses = list(course_code)
+        max_courses = max(len(domain_data[m]) for m in self.majors)
+        self.major_courses = np.full((len(self.majors), max_courses), -1, dtype=np.int64)
+        self.major_course_count = np.zeros(len(self.majors), dtype=np.int64)
+        for i, major in enumerate(self.majors):
+            codes = [course_code[c] for c in domain_data[major]]
+            self.major_courses[i, :len(codes)] = codes
+            self.major_course_count[i] = len(codes)
+
+        # --- 技能词表：课程技能 + 额外技能候选，按名称排序（编码顺序即输出顺序） ---
+        top = sorted(skill_freq.items(), key=lambda kv: -kv[1])[:int(self.config['extra_skill_top'])]
+        course_skills = {skill for major in domain_data.values() for skills in major.values() for skill in skills}
+        self.skills = sorted(course_skills | {skill for skill, _ in top})
+        skill_code = {skill: i for i, skill in enumerate(self.skills)}
+
+        # 课程 -> 技能 CSR（同名课程在不同专业下技能取并集）
+        course_skill_sets = [set() for _ in self.courses]
+        for major in domain_data.values():
+            for course, skills in major.items():
+                course_skill_sets[course_code[course]].update(skill_code[s] for s in skills)
+        self.course_ptr = np.zeros(len(self.courses) + 1, dtype=np.int64)
+        self.course_ptr[1:] = np.cumsum([len(s) for s in course_skill_sets])
+        self.course_skills = np.fromiter((code for s in course_skill_sets for code in sorted(s)), dtype=np.int64)
+
+        # --- 由技能频次拟合的课程/专业权重 ---
+        power = float(self.config['skill_freq_power'])
+        course_weight = np.array([
+            (1.0 + sum(skill_freq.get(self.skills[code], 0) for code in s)) ** power
+            for s in course_skill_sets
+        ])
+        padded = np.where(self.major_courses >= 0, course_weight[np.maximum(self.major_courses, 0)], 0.0)
+        self.course_log_weight = np.log(padded, out=np.full(padded.shape, -np.inf), where=padded > 0)
+        if self.config['major'] == 'uniform':
+            self.major_p = _probabilities(np.ones(len(self.majors)))
+        else:
+            self.major_p = _probabilities(padded.sum(axis=1))
+
+        if top:
+            self.extra_codes = np.array([skill_code[skill] for skill, _ in top], dtype=np.int64)
+            self.extra_p = _probabilities([count for _, count in top])
+        else:
+            self.extra_codes = np.zeros(0, dtype=np.int64)
+            self.extra_p = None
+
+        # --- 其他分布 ---
+        self.educations = list(self.config['education'])
+        self.education_p = _probabilities(list(self.config['education'].values()))
+        self.city_counts = np.array([int(k) for k in self.config['city_count']], dtype=np.int64)
+        self.city_count_p = _probabilities(list(self.config['city_count'].values()))
+        self.tier_cities = np.array([CITY_TIERS[tier] for tier in self.config['city_tiers']], dtype=object)
+        self.tier_p = _probabilities(list(self.config['city_tiers'].values()))
+        self.surnames = np.array(SURNAMES)
+        self.given = np.array(NAMES)
+
+    def _names(self, n):
+        rng = self.rng
+        names = np.char.add(self.surnames[rng.integers(len(self.surnames), size=n)],
+                            self.given[rng.integers(len(self.given), size=n)])
+        two_char = rng.random(n) < self.config['two_char_name']
+        names[two_char] = np.char.add(names[two_char],
+                                      self.given[rng.integers(len(self.given), size=int(two_char.sum()))])
+        return names
+
+    def _cities(self, n):
+        """期望城市：先选城市层级，再在层级内无放回抽取 1-3 个"""
+        rng = self.rng
+        counts = self.city_counts[rng.choice(len(self.city_counts), size=n, p=self.city_count_p)]
+        tiers = rng.choice(len(self.tier_cities), size=n, p=self.tier_p)
+        tier_size = self.tier_cities.shape[1]
+        counts = np.minimum(counts, tier_size)
+        order = np.argsort(rng.random((n, tier_size)), axis=1)
+        picked = self.tier_cities[tiers[:, None], order]
+        return picked, counts
+
+    def _courses(self, majors):
+        """按课程权重无放回抽取（Gumbel top-k），返回 (n, k_max) 课程编码与每行课程数"""
+        rng = self.rng
+        n = len(majors)
+        low, high = self.config['courses']
+        available = self.major_course_count[majors]
+        high = np.minimum(high, available)
+        counts = rng.integers(np.minimum(low, high), high + 1)
+        keys = self.course_log_weight[majors] + rng.gumbel(size=(n, self.major_courses.shape[1]))
+        order = np.argsort(-keys, axis=1)[:, :int(counts.max())]
+        return self.major_courses[majors[:, None], order], counts
+
+    def _skills(self, selected, course_counts):
+        """学生技能 = 所选课程技能并集 + 额外技能；返回 CSR (ptr, 技能编码)，每行按技能名排序"""
+        rng = self.rng
+        n = len(course_counts)
+        mask = np.arange(selected.shape[1]) < course_counts[:, None]
+        owners = np.repeat(np.arange(n), course_counts)
+        courses = selected[mask]
+        lengths = self.course_ptr[courses + 1] - self.course_ptr[courses]
+        starts = np.repeat(self.course_ptr[courses] - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+        skill_owner = np.repeat(owners, lengths)
+        skill_codes = self.course_skills[np.arange(lengths.sum()) + starts]
+
+        mean_extra = float(self.config['extra_skills'])
+        if mean_extra > 0 and self.extra_p is not None:
+            extra_counts = rng.poisson(mean_extra, size=n)
+            extra = self.extra_codes[rng.choice(len(self.extra_codes), size=int(extra_counts.sum()), p=self.extra_p)]
+            skill_owner = np.concatenate([skill_owner, np.repeat(np.arange(n), extra_counts)])
+            skill_codes = np.concatenate([skill_codes, extra])
+
+        pairs = np.unique(skill_owner * len(self.skills) + skill_codes)
+        owners, codes = np.divmod(pairs, len(self.skills))
+        ptr = np.searchsorted(owners, np.arange(n + 1))
+        return ptr, codes
+
+    def sample(self, start_index, n, id_format='STU{:04d}'):
+        """采样一个分片，返回学生字典列表"""
+        rng = self.rng
+        names = self._names(n).tolist()
+        educations = rng.choice(len(self.educations), size=n, p=self.education_p)
+        majors = rng.choice(len(self.majors), size=n, p=self.major_p)
+        cities, city_counts = self._cities(n)
+        selected, course_counts = self._courses(majors)
+        skill_ptr, skill_codes = self._skills(selected, course_counts)
+
+        skills = self.skills
+        skill_names = [skills[c] for c in skill_codes.tolist()]
+        course_names = self.courses
+        students = []
+        for i, (name, edu, major, city_row, k, course_row, course_count, lo, hi) in enumerate(zip(
+                names, educations.tolist(), majors.tolist(), cities.tolist(), city_counts.tolist(),
+                selected.tolist(), course_counts.tolist(), skill_ptr[:-1].tolist(), skill_ptr[1:].tolist())):
+            students.append({
+                'student_id': id_format.format(start_index + i),
+                'name': name,
+                'education': self.educations[edu],
+                'major': self.majors[major],
+                'preferred_cities': city_row[:k],
+                'courses': [course_names[c] for c in course_row[:course_count]],
+                'skills': skill_names[lo:hi],
+            })
+        return students
+
+
+def write_shard(students, path, fmt):
+    if fmt == 'parquet':
+        import pandas as pd
+        pd.DataFrame(students).to_parquet(path, index=False)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(s, ensure_ascii=False) + '\n' for s in students)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='向量化生成大规模学生数据（JSONL / Parquet 分片）')
+    parser.add_argument('--count', '-n', type=int, default=1000000, help='学生数量')
+    parser.add_argument('--output-dir', '-o', default=None, help='输出目录（默认 students_<数量>）')
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl', help='分片格式')
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help='每个分片的学生数')
+    parser.add_argument('--skill-freq', default=None,
+                        help='技能频次表（默认 技能提取/ 下最新的 技能频次_*.tsv）')
+    parser.add_argument('--config', default=None, help='覆盖默认分布参数的 JSON 文件')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    parser.add_argument('--start-id', type=int, default=1, help='第一个学生的编号')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🎓 大规模学生数据生成")
+    print(f"📅 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("❌ Parquet 输出需要 pyarrow: pip install pyarrow")
+            return
+
+    config = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+    freq_file = args.skill_freq or latest_skill_freq_file()
+    skill_freq = load_skill_freq(freq_file) if freq_file else {}
+    if skill_freq:
+        print(f"📊 技能频次: {freq_file} ({len(skill_freq):,} 个技能)")
+    else:
+        print("⚠️ 未找到技能频次表，课程与专业按均匀分布采样（可先运行 技能提取/提取技能.py）")
+
+    sampler = StudentSampler(skill_freq, config, args.seed)
+    print(f"📚 {len(sampler.majors)} 个专业, {len(sampler.courses)} 门课程, 技能词表 {len(sampler.skills):,} 个")
+
+    output_dir = args.output_dir or os.path.join(BASE_DIR, f'students_{args.count}')
+    os.makedirs(output_dir, exist_ok=True)
+    last_id = args.start_id + args.count - 1
+    id_format = 'STU{:0%dd}' % max(4, len(str(last_id)))
+
+    stats = {'education_dist': {}, 'major_dist': {}, 'city_dist': {}, 'skills_per_student': 0.0}
+    shards = []
+    start = time.time()
+    skill_total = 0
+    for shard_no, offset in enumerate(range(0, args.count, args.shard_size)):
+        n = min(args.shard_size, args.count - offset)
+        students = sampler.sample(args.start_id + offset, n, id_format)
+
+        path = os.path.join(output_dir, f'students-{shard_no:05d}.{args.format}')
+        write_shard(students, path, args.format)
+        shards.append({'file': os.path.basename(path), 'count': n})
+
+        for s in students:
+            stats['education_dist'][s['education']] = stats['education_dist'].get(s['education'], 0) + 1
+            stats['major_dist'][s['major']] = stats['major_dist'].get(s['major'], 0) + 1
+            for city in s['preferred_cities']:
+                stats['city_dist'][city] = stats['city_dist'].get(city, 0) + 1
+            skill_total += len(s['skills'])
+
+        done = offset + n
+        elapsed = time.time() - start
+        print(f"  📦 {os.path.basename(path)}: {done:,}/{args.count:,} ({done / max(elapsed, 1e-6):,.0f} 名/秒)")
+
+    stats['total'] = args.count
+    stats['skills_per_student'] = round(skill_total / max(args.count, 1), 2)
+
+    with open(os.path.join(output_dir, 'domain_data.json'), 'w', encoding='utf-8') as f:
+        json.dump(domain_data, f, ensure_ascii=False, indent=2)
+    manifest = {
+        'format': args.format,
+        'shards': shards,
+        'domain_data': 'domain_data.json',
+        'distributions': sampler.config,
+        'skill_freq_file': freq_file,
+        'seed': args.seed,
+        'stats': stats,
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    elapsed = time.time() - start
+    print(f"\n✅ 已生成 {args.count:,} 名学生, {len(shards)} 个分片, 用时 {elapsed:.1f}s")
+    print(f"   平均技能数: {stats['skills_per_student']}")
+    print("\n📊 学历分布:")
+    for edu, count in sorted(stats['education_dist'].items(), key=lambda x: -x[1]):
+        print(f"   • {edu}: {count:,} 人 ({count / args.count * 100:.1f}%)")
+    print("\n📚 专业分布 (Top 5):")
+    for major, count in sorted(stats['major_dist'].items(), key=lambda x: -x[1])[:5]:
+        print(f"   • {major}: {count:,} 人")
+    print(f"\n📁 输出目录: {output_dir}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
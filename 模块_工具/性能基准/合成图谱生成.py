@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试用合成知识图谱
+======================
+按指定规模生成 Job / Skill / Company / Student / Course 图谱并写入 Neo4j，
+学生、专业、课程复用 模块_工具/学生数据生成 中的生成器。
+
+用法:
+    python 合成图谱生成.py --jobs 20000 --skills 3000 --students 2000 --courses 300
+    python 合成图谱生成.py --docker --yes          # 启动本地 Neo4j 容器后写入
+
+写入完成后会生成 bench_manifest.json（规模、随机种子、采样ID），供 端到端压测.py 使用。
+学生、职位、企业账号均使用 bench_ 前缀的ID，未加 --docker/--clear 写入开发库时也不会改动真实数据；
+清单中不保存数据库密码，只记录读取密码的环境变量名。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+from datetime import datetime
+
+from neo4j import GraphDatabase
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', '学生数据生成'))
+
+import 生成学生数据_500 as student_gen
+
+# 本地基准容器配置（与开发库隔离，避免误写）
+DOCKER_CONTAINER = 'jobrec-bench-neo4j'
+DOCKER_IMAGE = 'neo4j:5'
+DOCKER_BOLT_PORT = 7688
+DOCKER_PASSWORD = 'benchmark'
+
+MANIFEST_FILE = os.path.join(BASE_DIR, 'bench_manifest.json')
+
+# 基准数据的企业账号（企业端职位接口使用）
+BENCH_ENTERPRISE_ID = 'bench_enterprise'
+# 基准学生学号格式（与真实学生的 STU0001… 区分）
+BENCH_STUDENT_ID = 'bench_student_{:07d}'
+# 非 Docker 基准库的密码从该环境变量读取（清单中只记录变量名）
+PASSWORD_ENV = 'neo4j_password'
+
+INDUSTRIES = ['互联网', '电子商务', '金融科技', '通信', '人工智能', '企业服务', '游戏', '智能硬件', '教育', '医疗健康']
+TITLE_SUFFIXES = ['开发工程师', '高级工程师', '算法工程师', '架构师', '实习生', '技术专家', '测试工程师', '运维工程师']
+EXPERIENCES = ['不限', '应届生', '1-3年', '3-5年', '5-10年']
+JOB_EDUCATIONS = ['不限', '大专', '本科', '硕士', '博士']
+JOB_EDUCATION_WEIGHTS = [20, 15, 50, 12, 3]
+
+BATCH_SIZE = 1000
+
+
+# ==================== 数据生成 ====================
+
+def expand_courses(target_courses, skill_pool):
+    """
+    按目标课程数扩充 domain_data
+    - 生成器直接读取模块级 domain_data，扩充后 generate_students 会使用新课程
+    """
+    domain_data = student_gen.domain_data
+    majors = list(domain_data.keys())
+    current = sum(len(courses) for courses in domain_data.values())
+
+    idx = 0
+    while current < target_courses:
+        major = majors[idx % len(majors)]
+        course_name = f"{major}专题{idx + 1}"
+        domain_data[major][course_name] = random.sample(skill_pool, 3)
+        current += 1
+        idx += 1
+
+    return domain_data
+
+
+def build_skill_pool(target_skills):
+    """专业课程技能 + 合成技能，返回按热度排序的技能列表"""
+    base = []
+    seen = set()
+    for courses in student_gen.domain_data.values():
+        for skills in courses.values():
+            for skill in skills:
+                if skill not in seen:
+                    seen.add(skill)
+                    base.append(skill)
+
+    synthetic = [f"合成技能{i:05d}" for i in range(max(0, target_skills - len(base)))]
+    return base + synthetic
+
+
+def generate_jobs(count, skill_pool, companies):
+    """
+    生成职位
+    - 技能热度服从近似 Zipf 分布（少数热门技能被大量职位要求）
+    """
+    weights = [1.0 / (rank + 1) ** 0.8 for rank in range(len(skill_pool))]
+    cum_weights = []
+    total = 0.0
+    for w in weights:
+        total += w
+        cum_weights.append(total)
+
+    jobs = []
+    for i in range(count):
+        company = random.choice(companies)
+        skills = sorted(set(random.choices(skill_pool, cum_weights=cum_weights, k=random.randint(3, 8))))
+        main_skill = random.choice(skills)
+        jobs.append({
+            'url': f"bench_job_{i:07d}",
+            'title': f"{main_skill}{random.choice(TITLE_SUFFIXES)}",
+            'education': random.choices(JOB_EDUCATIONS, weights=JOB_EDUCATION_WEIGHTS)[0],
+            'experience': random.choice(EXPERIENCES),
+            'salary_min': random.randint(5, 30),
+            'company': company['name'],
+            'city': company['city'],
+            'industry': random.choice(INDUSTRIES),
+            'skills': skills,
+            # 少量职位归属基准企业账号，供企业端职位管理接口使用
+            'created_by': BENCH_ENTERPRISE_ID if i % 20 == 0 else None,
+        })
+        jobs[-1]['salary_max'] = jobs[-1]['salary_min'] + random.randint(2, 20)
+        jobs[-1]['salary'] = f"{jobs[-1]['salary_min']}-{jobs[-1]['salary_max']}K"
+
+    return jobs
+
+
+def generate_companies(count):
+    return [
+        {'name': f"基准科技{i:05d}", 'city': random.choice(student_gen.CITIES), 'scale': random.choice(['20-99人', '100-499人', '1000-9999人'])}
+        for i in range(count)
+    ]
+
+
+# ==================== Neo4j 写入 ====================
+
+def _batches(rows, size=BATCH_SIZE):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+class BenchGraphLoader:
+    """UNWIND 批量写入合成图谱"""
+
+    CONSTRAINTS = [
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (j:Job) REQUIRE j.url IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (s:Skill) REQUIRE s.name IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (c:Company) REQUIRE c.name IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (c:City) REQUIRE c.name IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (i:Industry) REQUIRE i.name IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (s:Student) REQUIRE s.student_id IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (m:Major) REQUIRE m.name IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (c:Course) REQUIRE c.name IS UNIQUE",
+    ]
+
+    def __init__(self, uri, user, password):
+        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.driver.verify_connectivity()
+        print(f"✅ 已连接到Neo4j: {uri}")
+
+    def close(self):
+        self.driver.close()
+
+    def _write(self, cypher, rows, label):
+        start = time.time()
+        with self.driver.session() as session:
+            for batch in _batches(rows):
+                session.execute_write(lambda tx, b=batch: tx.run(cypher, rows=b).consume())
+        elapsed = time.time() - start
+        print(f"  📦 {label}: {len(rows):,} 条, {elapsed:.1f}s ({len(rows) / max(elapsed, 1e-6):,.0f} 条/秒)")
+
+    def create_constraints(self):
+        with self.driver.session() as session:
+            for cypher in self.CONSTRAINTS:
+                session.run(cypher)
+        print("🔒 约束创建完成")
+
+    def clear(self):
+        """清空数据库（仅用于独立的基准库）"""
+        with self.driver.session() as session:
+            session.run("MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS")
+        print("🧹 已清空数据库")
+
+    def load(self, companies, jobs, domain_data, students):
+        self._write("""
+            UNWIND $rows AS row
+            MERGE (c:Company {name: row.name})
+            SET c.scale = row.scale
+            MERGE (city:City {name: row.city})
+            MERGE (c)-[:LOCATED_IN]->(city)
+        """, companies, '公司')
+
+        self._write("UNWIND $rows AS name MERGE (:Industry {name: name})", INDUSTRIES, '行业')
+
+        self._write("""
+            UNWIND $rows AS row
+            MERGE (j:Job {url: row.url})
+            SET j.title = row.title, j.education = row.education, j.experience = row.experience,
+                j.salary = row.salary, j.salary_min = row.salary_min, j.salary_max = row.salary_max,
+                j.description = row.title, j.created_by = row.created_by, j.status = 'active',
+                j.created_at = datetime()
+            WITH j, row
+            MATCH (c:Company {name: row.company})
+            MERGE (j)-[:OFFERED_BY]->(c)
+            WITH j, row
+            MATCH (city:City {name: row.city})
+            MERGE (j)-[:LOCATED_IN]->(city)
+            WITH j, row
+            MATCH (i:Industry {name: row.industry})
+            MERGE (j)-[:BELONGS_TO_INDUSTRY]->(i)
+        """, jobs, '职位')
+
+        skill_rows = [{'url': job['url'], 'skill': skill} for job in jobs for skill in job['skills']]
+        self._write("""
+            UNWIND $rows AS row
+            MATCH (j:Job {url: row.url})
+            MERGE (s:Skill {name: row.skill})
+            MERGE (j)-[:REQUIRES_SKILL]->(s)
+        """, skill_rows, '职位-技能')
+
+        course_rows = [
+            {'major': major, 'course': course, 'skills': skills}
+            for major, courses in domain_data.items()
+            for course, skills in courses.items()
+        ]
+        self._write("""
+            UNWIND $rows AS row
+            MERGE (m:Major {name: row.major})
+            MERGE (c:Course {name: row.course})
+            MERGE (m)-[:HAS_COURSE]->(c)
+            WITH c, row
+            UNWIND row.skills AS skill
+            MERGE (s:Skill {name: skill})
+            MERGE (c)-[:TEACHES_SKILL]->(s)
+        """, course_rows, '专业-课程-技能')
+
+        student_rows = [{
+            'id': s['student_id'], 'name': s['name'], 'education': s['education'], 'major': s['major'],
+            'cities': s['preferred_cities'], 'courses': [c['name'] for c in s['courses']], 'skills': s['skills'],
+        } for s in students]
+        self._write("""
+            UNWIND $rows AS row
+            MERGE (s:Student {student_id: row.id})
+            SET s.name = row.name, s.education = row.education, s.preferred_cities = row.cities
+            WITH s, row
+            MATCH (m:Major {name: row.major})
+            MERGE (s)-[:MAJORS_IN]->(m)
+            WITH s, row
+            UNWIND row.courses AS course
+            MATCH (c:Course {name: course})
+            MERGE (s)-[:TAKES]->(c)
+        """, student_rows, '学生-课程')
+        self._write("""
+            UNWIND $rows AS row
+            MATCH (s:Student {student_id: row.id})
+            UNWIND row.skills AS skill
+            MATCH (k:Skill {name: skill})
+            MERGE (s)-[:HAS_SKILL]->(k)
+        """, student_rows, '学生-技能')
+
+
+# ==================== Docker ====================
+
+def start_docker_neo4j():
+    """启动（或复用）本地基准 Neo4j 容器，返回 (uri, user, password)"""
+    uri = f"bolt://localhost:{DOCKER_BOLT_PORT}"
+    running = subprocess.run(
+        ['docker', 'ps', '-q', '-f', f'name={DOCKER_CONTAINER}'],
+        capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+    if not running:
+        subprocess.run(['docker', 'rm', '-f', DOCKER_CONTAINER], capture_output=True)
+        subprocess.run([
+            'docker', 'run', '-d', '--name', DOCKER_CONTAINER,
+            '-p', f'{DOCKER_BOLT_PORT}:7687',
+            '-e', f'NEO4J_AUTH=neo4j/{DOCKER_PASSWORD}',
+            '-e', 'NEO4J_server_memory_heap_max__size=2G',
+            DOCKER_IMAGE,
+        ], check=True)
+        print(f"🐳 已启动容器 {DOCKER_CONTAINER} ({DOCKER_IMAGE})")
+
+    # 等待 Bolt 就绪
+    driver = GraphDatabase.driver(uri, auth=('neo4j', DOCKER_PASSWORD))
+    for _ in range(60):
+        try:
+            driver.verify_connectivity()
+            break
+        except Exception:
+            time.sleep(2)
+    else:
+        driver.close()
+        raise RuntimeError(f"Neo4j 容器未能在 120 秒内就绪: {uri}")
+    driver.close()
+    print(f"✅ 容器就绪: {uri}")
+    return uri, 'neo4j', DOCKER_PASSWORD
+
+
+# ==================== 主程序 ====================
+
+def main():
+    parser = argparse.ArgumentParser(description='生成基准测试用合成图谱并写入Neo4j')
+    parser.add_argument('--jobs', type=int, default=20000, help='职位数')
+    parser.add_argument('--skills', type=int, default=3000, help='技能数')
+    parser.add_argument('--students', type=int, default=2000, help='学生数')
+    parser.add_argument('--courses', type=int, default=300, help='课程数（不足部分按专业扩充）')
+    parser.add_argument('--companies', type=int, default=0, help='公司数（默认 职位数/20）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--docker', action='store_true', help='启动本地 Neo4j 容器并写入')
+    parser.add_argument('--uri', default=os.getenv('neo4j_uri', 'bolt://localhost:7687'))
+    parser.add_argument('--user', default=os.getenv('neo4j_user', 'neo4j'))
+    parser.add_argument('--password', default=os.getenv(PASSWORD_ENV, ''))
+    parser.add_argument('--clear', action='store_true', help='写入前清空数据库（仅限基准库）')
+    parser.add_argument('--yes', '-y', action='store_true', help='自动确认写入')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧪 基准测试合成图谱")
+    print(f"📅 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+    random.seed(args.seed)
+    start = time.time()
+    skill_pool = build_skill_pool(args.skills)
+    domain_data = expand_courses(args.courses, skill_pool)
+    companies = generate_companies(args.companies or max(1, args.jobs // 20))
+    jobs = generate_jobs(args.jobs, skill_pool, companies)
+    students = student_gen.generate_students(args.students)
+    for i, student in enumerate(students, 1):
+        student['student_id'] = BENCH_STUDENT_ID.format(i)
+    print(f"✅ 生成完成 ({time.time() - start:.1f}s): {len(jobs):,} 职位, {len(skill_pool):,} 技能, "
+          f"{len(companies):,} 公司, {len(students):,} 学生, "
+          f"{sum(len(c) for c in domain_data.values())} 课程")
+
+    if args.docker:
+        uri, user, password = start_docker_neo4j()
+    else:
+        uri, user, password = args.uri, args.user, args.password
+
+    if not args.yes:
+        print(f"\n⚠️  即将写入 {uri}{'（先清空）' if args.clear else ''}")
+        response = input("是否继续? (yes/no): ").strip().lower()
+        if response not in ['yes', 'y']:
+            print("❌ 用户取消操作")
+            return
+
+    loader = BenchGraphLoader(uri, user, password)
+    try:
+        if args.clear:
+            loader.clear()
+        loader.create_constraints()
+        load_start = time.time()
+        loader.load(companies, jobs, domain_data, students)
+        print(f"✅ 写入完成 ({time.time() - load_start:.1f}s)")
+    finally:
+        loader.close()
+
+    sample = random.Random(args.seed)
+    manifest = {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'seed': args.seed,
+        'neo4j_uri': uri,
+        'neo4j_user': user,
+        'docker': args.docker,
+        'neo4j_password_env': None if args.docker else PASSWORD_ENV,
+        'scale': {
+            'jobs': len(jobs), 'skills': len(skill_pool), 'students': len(students),
+            'courses': sum(len(c) for c in domain_data.values()), 'companies': len(companies),
+        },
+        'enterprise_id': BENCH_ENTERPRISE_ID,
+        'student_ids': [s['student_id'] for s in sample.sample(students, min(200, len(students)))],
+        'job_ids': [j['url'] for j in sample.sample(jobs, min(500, len(jobs)))],
+        'enterprise_job_ids': [j['url'] for j in jobs if j['created_by']][:200],
+        'skills': skill_pool[:300],
+        'majors': list(domain_data.keys()),
+        'courses': [course for courses in domain_data.values() for course in courses][:300],
+        'cities': list(student_gen.CITIES),
+    }
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"📁 清单已保存: {MANIFEST_FILE}")
+
+
+if __name__ == '__main__':
+    main()
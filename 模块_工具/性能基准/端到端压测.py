@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端压测
+==========
+以固定并发依次压测学生端 / 企业端 / 高校端全部接口，统计:
+- 吞吐量 (req/s)
+- 延迟 p50 / p95 / p99
+- 每请求 Neo4j / PostgreSQL 调用次数（读取服务返回的 Server-Timing 头）
+
+结果写入 JSON，可用 --compare 与历史结果对比，定位跨提交的性能回退。
+
+用法:
+    python 合成图谱生成.py --docker --yes              # 先生成并写入基准图谱
+    python 端到端压测.py --launch-services -c 16 -n 200
+    python 端到端压测.py --compare 结果/bench_xxx.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.abspath(os.path.join(BASE_DIR, '..', '..', 'backend'))
+MANIFEST_FILE = os.path.join(BASE_DIR, 'bench_manifest.json')
+RESULT_DIR = os.path.join(BASE_DIR, '结果')
+
+SERVICES = {
+    'student': ('student_service.main:app', 8001, '/api/student/health'),
+    'enterprise': ('enterprise_service.main:app', 8002, '/health'),
+    'university': ('university_service.main:app', 8003, '/health'),
+}
+
+_TIMING_RE = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) calls")?')
+
+
+# ==================== 接口定义 ====================
+
+def _q(value):
+    return urllib.parse.quote(value, safe='')
+
+
+def build_endpoints(m):
+    """
+    接口列表: (服务, 名称, 是否写操作, 请求构造函数)
+    请求构造函数接收随机数生成器，返回 (method, path, body)
+    """
+    students, jobs, skills = m['student_ids'], m['job_ids'], m['skills']
+    ent_id, ent_jobs, cities = m['enterprise_id'], m['enterprise_job_ids'] or m['job_ids'], m['cities']
+
+    return [
+        # ---------- 学生端 ----------
+        ('student', 'GET /api/common/cities', False, lambda r: ('GET', '/api/common/cities', None)),
+        ('student', 'GET /api/student/hot-jobs', False, lambda r: ('GET', '/api/student/hot-jobs?limit=20', None)),
+        ('student', 'POST /api/student/recommend-jobs', False, lambda r: (
+            'POST', '/api/student/recommend-jobs', {'student_id': r.choice(students), 'top_k': 10})),
+        ('student', 'POST /api/student/recommend-by-skills', False, lambda r: (
+            'POST', '/api/student/recommend-by-skills', {'skills': r.sample(skills, 5), 'top_k': 20})),
+        ('student', 'POST /api/student/recommend-by-skills (model)', False, lambda r: (
+            'POST', '/api/student/recommend-by-skills',
+            {'skills': r.sample(skills, 5), 'top_k': 20, 'student_id': r.choice(students), 'use_model': True})),
+        ('student', 'POST /api/student/hybrid-recommend', False, lambda r: (
+            'POST', '/api/student/hybrid-recommend', {'student_id': r.choice(students), 'final_k': 20})),
+        ('student', 'POST /api/student/hybrid-recommend (insight)', False, lambda r: (
+            'POST', '/api/student/hybrid-recommend',
+            {'student_id': r.choice(students), 'final_k': 20, 'city': r.choice(cities), 'include_insight': True})),
+        ('student', 'GET /api/job/detail/{job_id}', False, lambda r: ('GET', f"/api/job/detail/{_q(r.choice(jobs))}", None)),
+        ('student', 'POST /api/job/{job_id}/graph', False, lambda r: (
+            'POST', f"/api/job/{_q(r.choice(jobs))}/graph", {'user_skills': r.sample(skills, 5)})),
+        ('student', 'GET /api/student/get-profile/{student_id}', False, lambda r: (
+            'GET', f"/api/student/get-profile/{r.choice(students)}", None)),
+        ('student', 'GET /api/student/courses', False, lambda r: ('GET', f"/api/student/courses?major={_q(r.choice(m['majors']))}", None)),
+        ('student', 'POST /api/student/skill-diagnosis', False, lambda r: (
+            'POST', '/api/student/skill-diagnosis', {'student_id': r.choice(students), 'skills': r.sample(skills, 5)})),
+        ('student', 'GET /api/student/favorites', False, lambda r: ('GET', f"/api/student/favorites?user_id={r.choice(students)}", None)),
+        ('student', 'POST /api/student/update-profile', True, lambda r: (
+            'POST', '/api/student/update-profile',
+            {'student_id': r.choice(students), 'expected_position': '开发工程师', 'skills': r.sample(skills, 6)})),
+        ('student', 'POST /api/student/save-courses', True, lambda r: (
+            'POST', '/api/student/save-courses', {'student_id': r.choice(students), 'courses': r.sample(m['courses'], 4)})),
+        # ---------- 企业端 ----------
+        ('enterprise', 'POST /api/enterprise/scout-talents', False, lambda r: (
+            'POST', '/api/enterprise/scout-talents', {'job_id': r.choice(jobs), 'top_k': 20})),
+        ('enterprise', 'POST /api/enterprise/resume-xray', False, lambda r: (
+            'POST', '/api/enterprise/resume-xray', {'student_id': r.choice(students), 'job_id': r.choice(jobs)})),
+        ('enterprise', 'GET /api/enterprise/profile', False, lambda r: ('GET', f"/api/enterprise/profile?user_id={ent_id}", None)),
+        ('enterprise', 'GET /api/enterprise/jobs', False, lambda r: ('GET', f"/api/enterprise/jobs?user_id={ent_id}", None)),
+        ('enterprise', 'PUT /api/enterprise/jobs/{job_id}', True, lambda r: (
+            'PUT', f"/api/enterprise/jobs/{_q(r.choice(ent_jobs))}?user_id={ent_id}", {'salary_min': 10, 'salary_max': r.randint(15, 30)})),
+        # ---------- 高校端 ----------
+        ('university', 'GET /api/university/skill-gap', False, lambda r: ('GET', '/api/university/skill-gap?top_k=20', None)),
+        ('university', 'GET /api/university/course-health', False, lambda r: ('GET', '/api/university/course-health?limit=30', None)),
+        ('university', 'GET /api/university/reform-suggestions', False, lambda r: ('GET', '/api/university/reform-suggestions', None)),
+    ]
+
+
+# ==================== 压测执行 ====================
+
+def send(base_url, method, path, body, timeout):
+    """发送单个请求，返回 (状态码, 耗时ms, {db: (调用次数, 耗时ms)})"""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header('Content-Type', 'application/json')
+    req.add_header('x-profile', '1')
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status, timing = resp.status, resp.headers.get('Server-Timing', '')
+    except urllib.error.HTTPError as e:
+        e.read()
+        status, timing = e.code, e.headers.get('Server-Timing', '')
+    except Exception:
+        status, timing = 0, ''
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    db = {}
+    for name, dur, calls in _TIMING_RE.findall(timing or ''):
+        if name != 'app':
+            db[name] = (int(calls or 0), float(dur))
+    return status, elapsed_ms, db
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_endpoint(base_url, make_request, requests_count, concurrency, warmup, seed, timeout):
+    """以固定并发压测单个接口"""
+    rng = random.Random(seed)
+    plan = [make_request(rng) for _ in range(warmup + requests_count)]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda req: send(base_url, *req, timeout), plan[:warmup]))
+        start = time.perf_counter()
+        results = list(pool.map(lambda req: send(base_url, *req, timeout), plan[warmup:]))
+        wall = time.perf_counter() - start
+
+    latencies = sorted(r[1] for r in results)
+    ok = [r for r in results if 200 <= r[0] < 300]
+    stats = {
+        'requests': len(results),
+        'errors': len(results) - len(ok),
+        'status_codes': {},
+        'throughput_rps': round(len(results) / wall, 2) if wall > 0 else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(latencies[-1], 2) if latencies else 0.0,
+        },
+        'db': {},
+    }
+    for r in results:
+        key = str(r[0])
+        stats['status_codes'][key] = stats['status_codes'].get(key, 0) + 1
+
+    for name in ('neo4j', 'postgres'):
+        sampled = [r[2].get(name, (0, 0.0)) for r in ok]
+        if sampled:
+            stats['db'][name] = {
+                'calls_per_request': round(sum(c for c, _ in sampled) / len(sampled), 2),
+                'ms_per_request': round(sum(d for _, d in sampled) / len(sampled), 2),
+            }
+    return stats
+
+
+# ==================== 服务启动 ====================
+
+def bench_password(manifest):
+    """清单中不保存密码：Docker 基准库使用固定密码，否则读取清单记录的环境变量（未设置时为 None，沿用 .env）"""
+    if manifest.get('docker'):
+        from 合成图谱生成 import DOCKER_PASSWORD
+        return DOCKER_PASSWORD
+    return os.getenv(manifest.get('neo4j_password_env') or 'neo4j_password')
+
+
+def launch_services(manifest, services):
+    """用基准库配置启动后端服务（环境变量优先于 .env）"""
+    env = dict(os.environ)
+    env.update({
+        'neo4j_uri': manifest['neo4j_uri'],
+        'neo4j_user': manifest['neo4j_user'],
+        'profiling_sample_rate': '0',  # 仅采样带 x-profile 的压测请求
+    })
+    password = bench_password(manifest)
+    if password is not None:
+        env['neo4j_password'] = password
+
+    procs = []
+    for name in services:
+        app, port, _ = SERVICES[name]
+        proc = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', app, '--port', str(port), '--workers', '1', '--log-level', 'warning'],
+            cwd=BACKEND_DIR, env=env
+        )
+        procs.append(proc)
+        print(f"🚀 启动 {name} 服务 (端口 {port}, pid {proc.pid})")
+
+    for name in services:
+        _, port, health = SERVICES[name]
+        wait_until_ready(f"http://127.0.0.1:{port}", health)
+    return procs
+
+
+def wait_until_ready(base_url, health_path, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + health_path, timeout=2) as resp:
+                if resp.status == 200:
+                    print(f"✅ 服务就绪: {base_url}")
+                    return
+        except Exception:
+            time.sleep(1)
+    raise RuntimeError(f"服务未能在 {timeout} 秒内就绪: {base_url}")
+
+
+# ==================== 报告 ====================
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def print_table(endpoints):
+    print(f"\n{'接口':<52}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'neo4j':>7}{'pg':>5}{'err':>6}")
+    print("-" * 106)
+    for name, s in endpoints.items():
+        lat = s['latency_ms']
+        neo = s['db'].get('neo4j', {}).get('calls_per_request', 0)
+        pg = s['db'].get('postgres', {}).get('calls_per_request', 0)
+        print(f"{name:<52}{s['throughput_rps']:>9.1f}{lat['p50']:>9.1f}{lat['p95']:>9.1f}{lat['p99']:>9.1f}"
+              f"{neo:>7.1f}{pg:>5.1f}{s['errors']:>6}")
+
+
+def compare(current, baseline_file):
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    print(f"\n📊 对比基线: {baseline_file} (commit {baseline.get('git_commit')})")
+    print(f"{'接口':<52}{'p95 基线':>10}{'p95 当前':>10}{'变化':>9}{'DB调用变化':>12}")
+    print("-" * 93)
+    for name, cur in current['endpoints'].items():
+        base = baseline.get('endpoints', {}).get(name)
+        if not base:
+            continue
+        b95, c95 = base['latency_ms']['p95'], cur['latency_ms']['p95']
+        delta = (c95 - b95) / b95 * 100 if b95 else 0.0
+        b_calls = base['db'].get('neo4j', {}).get('calls_per_request', 0)
+        c_calls = cur['db'].get('neo4j', {}).get('calls_per_request', 0)
+        flag = ' ⚠️' if delta > 10 else ''
+        print(f"{name:<52}{b95:>10.1f}{c95:>10.1f}{delta:>+8.1f}%{c_calls - b_calls:>+12.1f}{flag}")
+
+
+# ==================== 主程序 ====================
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端接口压测')
+    parser.add_argument('--manifest', default=MANIFEST_FILE, help='合成图谱清单 (合成图谱生成.py 输出)')
+    parser.add_argument('--concurrency', '-c', type=int, default=8, help='固定并发数')
+    parser.add_argument('--requests', '-n', type=int, default=200, help='每个接口的请求数')
+    parser.add_argument('--warmup', type=int, default=20, help='每个接口的预热请求数')
+    parser.add_argument('--timeout', type=float, default=60.0, help='单请求超时（秒）')
+    parser.add_argument('--seed', type=int, default=42, help='请求参数随机种子')
+    parser.add_argument('--services', default='student,enterprise,university', help='压测的服务，逗号分隔')
+    parser.add_argument('--only', default='', help='只压测名称包含该子串的接口')
+    parser.add_argument('--skip-writes', action='store_true', help='跳过写操作接口')
+    parser.add_argument('--launch-services', action='store_true', help='使用基准库配置启动后端服务')
+    parser.add_argument('--student-url', default='http://127.0.0.1:8001')
+    parser.add_argument('--enterprise-url', default='http://127.0.0.1:8002')
+    parser.add_argument('--university-url', default='http://127.0.0.1:8003')
+    parser.add_argument('--output', '-o', default='', help='结果 JSON 路径（默认 结果/bench_<commit>_<时间>.json）')
+    parser.add_argument('--compare', default='', help='与历史结果 JSON 对比')
+    args = parser.parse_args()
+
+    with open(args.manifest, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    services = [s.strip() for s in args.services.split(',') if s.strip()]
+    base_urls = {'student': args.student_url, 'enterprise': args.enterprise_url, 'university': args.university_url}
+
+    print("=" * 60)
+    print("🏋️  端到端压测")
+    print(f"📅 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"📐 图谱规模: {manifest['scale']}")
+    print(f"⚙️  并发 {args.concurrency}, 每接口 {args.requests} 次请求 (预热 {args.warmup})")
+    print("=" * 60)
+
+    procs = launch_services(manifest, services) if args.launch_services else []
+
+    results = {}
+    try:
+        for idx, (service, name, is_write, make_request) in enumerate(build_endpoints(manifest)):
+            if service not in services or (is_write and args.skip_writes) or args.only not in name:
+                continue
+            print(f"  ▶ {name}")
+            results[name] = run_endpoint(
+                base_urls[service], make_request, args.requests, args.concurrency,
+                args.warmup, args.seed + idx, args.timeout
+            )
+            results[name]['service'] = service
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+    print_table(results)
+
+    report = {
+        'git_commit': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': manifest['scale'],
+        'seed': args.seed,
+        'concurrency': args.concurrency,
+        'requests_per_endpoint': args.requests,
+        'warmup': args.warmup,
+        'endpoints': results,
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULT_DIR, exist_ok=True)
+        output = os.path.join(RESULT_DIR, f"bench_{report['git_commit']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n📁 结果已保存: {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
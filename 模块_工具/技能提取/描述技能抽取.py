@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位描述技能抽取
+================
+技能 列只是招聘网站给的标签，工作描述 中提到的技能没有进入图谱。
+本脚本把清洗后的技能词表编译成 Aho-Corasick 自动机，每篇职位描述只扫描一遍，
+抽出标签里没有的技能，作为额外的 REQUIRES_SKILL 关系（source = 'description'）写入 Neo4j。
+
+- 词表: 技能列表_清洗后.txt（去掉 智能过滤技能.INDUSTRY_KEYWORDS 这类泛化词）
+- 匹配: 大小写/全半角/别名折叠（backend/common/skill_normalizer），英文技能要求词边界
+- 并行: 按 CSV 文件分发到进程池，每个进程只构建一次自动机
+- 写入: 技能名折叠到图中已有的写法，UNWIND 批量写入，只新建关系，不改动已有的标签关系
+
+用法:
+    python 描述技能抽取.py                       # 只抽取，输出统计与关系文件
+    python 描述技能抽取.py --workers 8 --upload  # 抽取并写入 Neo4j
+"""
+
+import os
+import re
+import sys
+import csv
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', '..', 'backend'))
+
+from common.skill_normalizer import SkillIndex, SKILL_NAME_QUERY, skill_key
+from 智能过滤技能 import INDUSTRY_KEYWORDS
+
+# 输入目录（第二次清洗后的各城市数据）
+INPUT_DIR = os.path.abspath(os.path.join(BASE_DIR, '..', '..', '模块_数据处理', '清洗输出', '第二次清洗'))
+VOCAB_FILE = os.path.join(BASE_DIR, '技能列表_清洗后.txt')
+
+# 与流水线上传时相同的标签分隔符
+TAG_SEPARATORS = re.compile(r'[,，、;；/\\|]')
+
+# 关系来源标记
+EDGE_SOURCE = 'description'
+
+BATCH_SIZE = 1000
+
+# 描述中几乎必然出现的泛化词，不作为技能抽取
+GENERIC_SKILLS = set(INDUSTRY_KEYWORDS)
+
+
+def load_vocabulary(path):
+    """读取技能词表并去掉泛化词"""
+    with open(path, 'r', encoding='utf-8') as f:
+        vocab = [line.strip() for line in f if line.strip()]
+    return [skill for skill in vocab if skill not in GENERIC_SKILLS]
+
+
+# ==================== 抽取（工作进程） ====================
+
+_index = None
+
+
+def _init_worker(vocab):
+    """每个工作进程构建一次自动机"""
+    global _index
+    _index = SkillIndex(vocab)
+    _index.automaton()
+
+
+def scan_file(path):
+    """
+    扫描单个 CSV 文件的全部职位描述
+
+    Returns:
+        {'file', 'docs', 'chars', 'seconds', 'found', 'edges': [(url, skill)]}
+    """
+    start = time.time()
+    result = {'file': path, 'docs': 0, 'chars': 0, 'found': 0, 'edges': []}
+    try:
+        df = pd.read_csv(path, encoding='utf-8', usecols=lambda c: c in ('职位URL', '技能', '工作描述'))
+    except Exception as e:
+        print(f"处理文件失败 {path}: {e}")
+        result['seconds'] = time.time() - start
+        return result
+    if '工作描述' not in df.columns or '职位URL' not in df.columns:
+        result['seconds'] = time.time() - start
+        return result
+
+    tags_column = df['技能'] if '技能' in df.columns else [None] * len(df)
+    for url, tags, description in zip(df['职位URL'], tags_column, df['工作描述']):
+        if not isinstance(url, str) or not isinstance(description, str) or not description:
+            continue
+        result['docs'] += 1
+        result['chars'] += len(description)
+        found = _index.find_in(description)
+        result['found'] += len(found)
+        tagged = {skill_key(t) for t in TAG_SEPARATORS.split(tags)} if isinstance(tags, str) else set()
+        result['edges'].extend((url, skill) for skill in found if skill_key(skill) not in tagged)
+    result['seconds'] = time.time() - start
+    return result
+
+
+def find_csv_files(input_dir):
+    files = []
+    for root, _, names in os.walk(input_dir):
+        files.extend(os.path.join(root, name) for name in names if name.endswith('.csv'))
+    # 大文件先分发，进程负载更均衡
+    return sorted(files, key=os.path.getsize, reverse=True)
+
+
+def extract(files, vocab, workers):
+    """进程池并行抽取，返回 (关系列表, 统计)"""
+    edges = []
+    stats = Counter()
+    city_docs = Counter()
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(vocab,)) as pool:
+        futures = [pool.submit(scan_file, path) for path in files]
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            edges.extend(result['edges'])
+            stats['docs'] += result['docs']
+            stats['chars'] += result['chars']
+            stats['found'] += result['found']
+            stats['scan_seconds'] += result['seconds']
+            city_docs[os.path.basename(os.path.dirname(result['file']))] += result['docs']
+            if i % 20 == 0 or i == len(files):
+                elapsed = time.time() - start
+                print(f"  📄 {i}/{len(files)} 个文件, {stats['docs']:,} 篇描述 "
+                      f"({stats['docs'] / max(elapsed, 1e-6):,.0f} 篇/秒)")
+    stats['wall_seconds'] = time.time() - start
+    return edges, stats, city_docs
+
+
+# ==================== 写入 Neo4j ====================
+
+class DescriptionSkillUploader:
+    """
+    UNWIND 批量写入描述抽取出的 REQUIRES_SKILL 关系
+    新建关系时同时刷新职位的 updated_at，在线服务的增量刷新才能拾取到新技能
+    """
+
+    EDGE_QUERY = """
+    UNWIND $rows AS row
+    MATCH (j:Job {url: row.url})
+    MERGE (s:Skill {name: row.skill})
+    MERGE (j)-[r:REQUIRES_SKILL]->(s)
+    ON CREATE SET r.source = $source, j.updated_at = datetime()
+    RETURN count(j) AS matched
+    """
+
+    def __init__(self, uri, user, password):
+        from neo4j import GraphDatabase
+        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.driver.verify_connectivity()
+        print(f"✅ 已连接到Neo4j: {uri}")
+        with self.driver.session() as session:
+            self.skill_index = SkillIndex(r["name"] for r in session.run(SKILL_NAME_QUERY))
+        print(f"🏷️  图中已有技能: {len(self.skill_index)} 个规范键")
+
+    def close(self):
+        self.driver.close()
+
+    def upload(self, edges, batch_size=BATCH_SIZE):
+        # 折叠到图中已有的写法，避免产生大小写变体
+        rows = []
+        for url, skill in dict.fromkeys(edges):
+            skill = self.skill_index.canonical(skill) or skill
+            self.skill_index.add(skill)
+            rows.append({'url': url, 'skill': skill})
+
+        start = time.time()
+        matched = 0
+        with self.driver.session() as session:
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i + batch_size]
+                record = session.execute_write(
+                    lambda tx, b=batch: tx.run(self.EDGE_QUERY, rows=b, source=EDGE_SOURCE).single())
+                matched += record["matched"] if record else 0
+        elapsed = time.time() - start
+        print(f"  📦 关系: {len(rows):,} 条（匹配到职位 {matched:,} 条）, {elapsed:.1f}s "
+              f"({len(rows) / max(elapsed, 1e-6):,.0f} 条/秒)")
+        return matched
+
+
+def save_edges(edges, output_file):
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['职位URL', '技能', 'source'])
+        for url, skill in edges:
+            writer.writerow([url, skill, EDGE_SOURCE])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从职位描述中抽取技能（Aho-Corasick 自动机 + 进程池）')
+    parser.add_argument('--input-dir', default=INPUT_DIR, help='清洗后的职位数据目录（递归查找 CSV）')
+    parser.add_argument('--vocab', default=VOCAB_FILE, help='技能词表文件')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='进程数')
+    parser.add_argument('--output', default=None, help='关系输出文件（默认 描述技能_时间戳.csv）')
+    parser.add_argument('--upload', action='store_true', help='写入 Neo4j')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='每个事务写入的关系数')
+    parser.add_argument('--uri', default=os.getenv('neo4j_uri', 'bolt://localhost:7687'))
+    parser.add_argument('--user', default=os.getenv('neo4j_user', 'neo4j'))
+    parser.add_argument('--password', default=os.getenv('neo4j_password', ''))
+    parser.add_argument('--yes', '-y', action='store_true', help='自动确认写入')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔍 职位描述技能抽取")
+    print(f"📅 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+    start = time.time()
+    vocab = load_vocabulary(args.vocab)
+    index = SkillIndex(vocab)
+    automaton = index.automaton()
+    print(f"🏷️  词表: {len(vocab):,} 个技能 -> {len(automaton):,} 个模式 ({time.time() - start:.2f}s)")
+
+    files = find_csv_files(args.input_dir)
+    if not files:
+        print(f"❌ 未找到 CSV 文件: {args.input_dir}")
+        return
+    print(f"📁 {len(files)} 个文件, {args.workers} 个进程")
+
+    edges, stats, city_docs = extract(files, vocab, args.workers)
+
+    for city, docs in sorted(city_docs.items()):
+        print(f"  📁 {city}: {docs:,} 篇")
+
+    per_skill = Counter(skill for _, skill in edges)
+    print("\n" + "=" * 60)
+    print("📊 抽取完成")
+    print("=" * 60)
+    print(f"📄 描述数: {stats['docs']:,} ({stats['chars'] / 1e6:.1f}M 字符)")
+    print(f"⏱️  耗时: {stats['wall_seconds']:.2f}s, 吞吐 {stats['docs'] / max(stats['wall_seconds'], 1e-6):,.0f} 篇/秒 "
+          f"(单进程扫描 {stats['docs'] / max(stats['scan_seconds'], 1e-6):,.0f} 篇/秒)")
+    print(f"🏷️  描述中出现的技能: {stats['found']:,} 次, 标签之外的新关系: {len(edges):,} 条 "
+          f"(平均每篇 {len(edges) / max(stats['docs'], 1):.2f})")
+    print("\n📋 新增最多的技能（前20个）:")
+    for skill, count in per_skill.most_common(20):
+        print(f"   {skill:<20} {count:,}")
+
+    output_file = args.output or os.path.join(BASE_DIR, f"描述技能_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    save_edges(edges, output_file)
+    print(f"\n📄 关系文件: {output_file}")
+
+    if not args.upload:
+        return
+    if not args.yes:
+        print(f"\n⚠️  即将向 {args.uri} 写入 {len(edges):,} 条 REQUIRES_SKILL 关系 (source='{EDGE_SOURCE}')")
+        response = input("是否继续? (yes/no): ").strip().lower()
+        if response not in ['yes', 'y']:
+            print("❌ 用户取消操作")
+            return
+
+    uploader = DescriptionSkillUploader(args.uri, args.user, args.password)
+    try:
+        uploader.upload(edges, args.batch_size)
+    finally:
+        uploader.close()
+
+
+if __name__ == '__main__':
+    main()
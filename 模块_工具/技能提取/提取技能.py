@@ -3,13 +3,25 @@
 """
 技能提取脚本
 ============
-从所有清洗后的职位数据中提取技能，生成去重的技能列表
+从所有清洗后的职位数据中提取技能，生成去重的技能列表和技能频次表
+
+- 技能列按分隔符向量化拆分、展开，每个文件只对去重后的词调用 clean_skill（结果按进程缓存）
+- --workers > 1 时多个文件并行处理，各文件的频次 Counter 最后合并
+
+用法:
+    python 提取技能.py                              # 串行
+    python 提取技能.py --workers 8 --min-count 2    # 并行，技能列表只保留出现 2 次以上的技能
 
 作者：AI Assistant
 日期：2026-01-12
 """
 
 import os
+import re
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import pandas as pd
 from datetime import datetime
 
@@ -29,10 +41,14 @@ CITY_DIRS = [
     'data_zhengzhou_advanced'
 ]
 
+# 支持多种分隔符：逗号、中文逗号、斜杠、分号、顿号
+SKILL_SEPARATORS = r'[,，、;；/\|]'
+_NUMERIC_RANGE = re.compile(r'^[\d\-~～]+$')
+_DIGIT_START = re.compile(r'^\d')
+
+
 def clean_skill(skill):
     """清洗单个技能"""
-    import re
-    
     if not skill or not isinstance(skill, str):
         return None
     
@@ -47,11 +63,11 @@ def clean_skill(skill):
         return None
     
     # 过滤纯数字或数字开头的无意义项（如"0-1"、"1-10"）
-    if re.match(r'^[\d\-~～]+$', skill):
+    if _NUMERIC_RANGE.match(skill):
         return None
     
     # 过滤以数字开头且长度短的（如"00 后"、"10W+阅读"）
-    if re.match(r'^\d', skill) and len(skill) < 6:
+    if _DIGIT_START.match(skill) and len(skill) < 6:
         return None
     
     # 过滤以特殊字符开头
@@ -93,53 +109,46 @@ def clean_skill(skill):
     return skill
 
 
-def extract_skills_from_file(file_path):
-    """从单个CSV文件提取技能"""
-    skills = set()
+# 同一个词在各文件中反复出现，清洗结果按进程缓存
+_clean_cached = lru_cache(maxsize=None)(clean_skill)
+
+
+def count_skills_in_file(file_path):
+    """从单个CSV文件统计技能频次（向量化拆分，去重后再清洗）"""
+    counts = Counter()
     
     try:
-        df = pd.read_csv(file_path, encoding='utf-8')
+        df = pd.read_csv(file_path, encoding='utf-8', usecols=lambda c: c == '技能', dtype=str)
         
         if '技能' not in df.columns:
-            return skills
+            return counts
+        
+        tokens = (df['技能'].dropna().str.strip()
+                  .loc[lambda col: col != '']
+                  .str.split(SKILL_SEPARATORS, regex=True)
+                  .explode())
         
-        for skill_str in df['技能']:
-            if pd.isna(skill_str) or not isinstance(skill_str, str):
-                continue
-            
-            skill_str = skill_str.strip()
-            if not skill_str:
-                continue
-            
-            # 支持多种分隔符：逗号、中文逗号、斜杠、分号、顿号
-            import re
-            skill_list = re.split(r'[,，、;；/\|]', skill_str)
-            
-            for skill in skill_list:
-                cleaned = clean_skill(skill)
-                if cleaned:
-                    skills.add(cleaned)
+        for token, count in tokens.value_counts().items():
+            cleaned = _clean_cached(token)
+            if cleaned:
+                counts[cleaned] += int(count)
     
     except Exception as e:
         print(f"处理文件失败 {file_path}: {e}")
     
-    return skills
+    return counts
 
 
-def main():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    
-    print("="*60)
-    print("🔍 技能提取程序启动")
-    print(f"📅 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("="*60)
-    
-    all_skills = set()
-    file_count = 0
-    
+def extract_skills_from_file(file_path):
+    """从单个CSV文件提取技能"""
+    return set(count_skills_in_file(file_path))
+
+
+def list_city_files(base_dir, input_dir):
+    """按城市列出 CSV 文件: [(城市名, [文件路径])]"""
+    city_files = []
     for city_dir in CITY_DIRS:
-        city_path = os.path.join(base_dir, INPUT_BASE_DIR, city_dir)
+        city_path = os.path.join(base_dir, input_dir, city_dir)
         
         if not os.path.exists(city_path):
             print(f"⚠️ 目录不存在: {city_dir}")
@@ -148,20 +157,48 @@ def main():
         city_name = city_dir.replace('data_', '').replace('_advanced', '').upper()
         
         # 获取所有CSV文件
-        csv_files = [f for f in os.listdir(city_path) if f.endswith('.csv')]
-        
-        city_skills = set()
-        for csv_file in csv_files:
-            file_path = os.path.join(city_path, csv_file)
-            skills = extract_skills_from_file(file_path)
-            city_skills.update(skills)
-            file_count += 1
-        
-        print(f"📁 {city_name}: {len(city_skills)} 个技能")
-        all_skills.update(city_skills)
+        csv_files = [os.path.join(city_path, f) for f in os.listdir(city_path) if f.endswith('.csv')]
+        city_files.append((city_name, csv_files))
+    return city_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从清洗后的职位数据中提取技能列表与频次表')
+    parser.add_argument('--input-dir', default=INPUT_BASE_DIR, help='输入目录（相对脚本目录或绝对路径）')
+    parser.add_argument('--workers', type=int, default=1, help='并行处理文件的进程数')
+    parser.add_argument('--min-count', type=int, default=1, help='技能列表只保留出现次数不少于该值的技能')
+    args = parser.parse_args()
+    
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    print("="*60)
+    print("🔍 技能提取程序启动")
+    print(f"📅 时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("="*60)
+    
+    start = datetime.now()
+    city_files = list_city_files(base_dir, args.input_dir)
+    all_files = [path for _, files in city_files for path in files]
+    
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            file_counts = dict(zip(all_files, pool.map(count_skills_in_file, all_files, chunksize=4)))
+    else:
+        file_counts = {path: count_skills_in_file(path) for path in all_files}
+    
+    skill_counts = Counter()
+    for city_name, files in city_files:
+        city_counts = Counter()
+        for path in files:
+            city_counts.update(file_counts[path])
+        print(f"📁 {city_name}: {len(city_counts)} 个技能")
+        skill_counts.update(city_counts)
+    file_count = len(all_files)
+    elapsed = (datetime.now() - start).total_seconds()
     
     # 排序技能列表
-    sorted_skills = sorted(all_skills)
+    sorted_skills = sorted(skill for skill, count in skill_counts.items() if count >= args.min_count)
     
     # 输出到文件
     output_file = os.path.join(base_dir, f'技能列表_{timestamp}.txt')
@@ -170,20 +207,30 @@ def main():
         for skill in sorted_skills:
             f.write(skill + '\n')
     
+    # 频次表（按频次降序），供下游按出现次数过滤
+    freq_file = os.path.join(base_dir, f'技能频次_{timestamp}.tsv')
+    with open(freq_file, 'w', encoding='utf-8') as f:
+        f.write('技能\t频次\n')
+        for skill, count in skill_counts.most_common():
+            f.write(f'{skill}\t{count}\n')
+    
     print("\n" + "="*60)
     print("📊 提取完成")
     print("="*60)
-    print(f"📁 处理文件数: {file_count}")
-    print(f"🏷️  技能总数（去重后）: {len(sorted_skills)}")
+    print(f"📁 处理文件数: {file_count} ({args.workers} 个进程, {elapsed:.1f}s)")
+    print(f"🏷️  技能总数（去重后）: {len(skill_counts)}")
+    if args.min_count > 1:
+        print(f"🏷️  出现 ≥{args.min_count} 次的技能: {len(sorted_skills)}")
     print(f"📄 输出文件: {output_file}")
+    print(f"📄 频次文件: {freq_file}")
     print("="*60)
     
-    # 打印前20个技能示例
-    print("\n📋 技能示例（前20个）:")
-    for i, skill in enumerate(sorted_skills[:20], 1):
-        print(f"   {i}. {skill}")
-    if len(sorted_skills) > 20:
-        print(f"   ... 还有 {len(sorted_skills) - 20} 个技能")
+    # 打印频次最高的技能
+    print("\n📋 高频技能（前20个）:")
+    for i, (skill, count) in enumerate(skill_counts.most_common(20), 1):
+        print(f"   {i}. {skill} ({count})")
+    if len(skill_counts) > 20:
+        print(f"   ... 还有 {len(skill_counts) - 20} 个技能")
 
 
 if __name__ == '__main__':
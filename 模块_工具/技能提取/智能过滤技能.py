@@ -5,13 +5,24 @@
 ================
 使用规则 + 特征分类来识别真正的技能，过滤非技能项
 
+- is_valid_skill: 逐条规则判断（参考实现）
+- SkillClassifier: 规则预编译后的批量版本，判定与原因与 is_valid_skill 完全一致
+  非技能模式合并为一个交替正则，关键词用 Aho-Corasick 自动机 / 字典查找
+
 作者：AI Assistant
 日期：2026-01-12
 """
 
+import os
 import re
+import sys
+import time
+import argparse
 from collections import Counter
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+from common.skill_normalizer import AhoCorasick
+
 # ==================== 技能识别规则 ====================
 
 # 技术技能关键词（高置信度）
@@ -199,6 +210,169 @@ def is_valid_skill(skill):
     return False, f"得分不足({score})"
 
 
+# ==================== 预编译分类器 ====================
+
+class SkillClassifier:
+    """
+    is_valid_skill 的预编译版本
+
+    - 非技能模式: 合并为一个带命名分组的交替正则，一次 search 即可排除绝大多数有效技能；
+      命中时只需再检查编号更小的模式，保证报告的是列表中第一个匹配的模式
+    - TECH_KEYWORDS / INDUSTRY_KEYWORDS: 自动机一次扫描找出全部包含的关键词，
+      按与 is_valid_skill 相同的集合遍历顺序取第一个
+    - 前缀/后缀: 按长度切片后字典查找
+    """
+
+    def __init__(self):
+        self.patterns = [re.compile(p) for p in NON_SKILL_PATTERNS]
+        self.combined = re.compile('|'.join(f'(?P<p{i}>{p})' for i, p in enumerate(NON_SKILL_PATTERNS)))
+
+        # 集合的遍历顺序在同一进程内固定，与 is_valid_skill 的 for 循环一致
+        self.tech_order = {kw: i for i, kw in enumerate(TECH_KEYWORDS)}
+        self.tech_ac = AhoCorasick()
+        for kw in self.tech_order:
+            self.tech_ac.add(kw)
+        self.tech_ac.build()
+        # skill_upper in keyword：关键词的全部子串 -> 包含它的关键词
+        self.tech_substrings = {}
+        for kw in self.tech_order:
+            for i in range(len(kw)):
+                for j in range(i + 1, len(kw) + 1):
+                    self.tech_substrings.setdefault(kw[i:j], []).append(kw)
+
+        self.industry_order = {kw: i for i, kw in enumerate(INDUSTRY_KEYWORDS)}
+        self.industry_ac = AhoCorasick()
+        for kw in self.industry_order:
+            self.industry_ac.add(kw)
+        self.industry_ac.build()
+
+        self.suffixes = {}
+        for i, suffix in enumerate(SKILL_SUFFIXES):
+            self.suffixes.setdefault(suffix, i)
+        self.suffix_lengths = sorted({len(s) for s in self.suffixes})
+        self.prefixes = {}
+        for i, prefix in enumerate(SKILL_PREFIXES):
+            self.prefixes.setdefault(prefix, i)
+        self.prefix_lengths = sorted({len(p) for p in self.prefixes})
+
+        self.english_tech = re.compile(r'^[A-Za-z0-9\.\-\+\#\s]+$')
+        self.has_english = re.compile(r'[A-Za-z]')
+        self.has_chinese = re.compile(r'[\u4e00-\u9fff]')
+        self.standard_name = re.compile(r'^[A-Za-z\.\#\+]+$')
+
+    def _non_skill_pattern(self, skill):
+        match = self.combined.search(skill)
+        if match is None:
+            return None
+        first = int(match.lastgroup[1:])
+        for i in range(first):
+            if self.patterns[i].search(skill):
+                return NON_SKILL_PATTERNS[i]
+        return NON_SKILL_PATTERNS[first]
+
+    def _tech_keyword(self, skill_upper):
+        candidates = set(self.tech_ac.find_all(skill_upper))
+        candidates.update(self.tech_substrings.get(skill_upper, ()))
+        return min(candidates, key=self.tech_order.__getitem__) if candidates else None
+
+    def _industry_keyword(self, skill):
+        candidates = self.industry_ac.find_all(skill)
+        return min(candidates, key=self.industry_order.__getitem__) if candidates else None
+
+    def _affix(self, skill, table, lengths, from_end):
+        best = None
+        for length in lengths:
+            if length > len(skill):
+                break
+            part = skill[-length:] if from_end else skill[:length]
+            index = table.get(part)
+            if index is not None and (best is None or index < best[0]):
+                best = (index, part)
+        return best[1] if best else None
+
+    def classify(self, skill):
+        """与 is_valid_skill 相同的 (是否有效, 原因)"""
+        if not skill or not isinstance(skill, str):
+            return False, "空值"
+
+        skill = skill.strip()
+
+        if len(skill) < 2:
+            return False, "太短"
+        if len(skill) > 25:
+            return False, "太长（可能是描述）"
+
+        pattern = self._non_skill_pattern(skill)
+        if pattern is not None:
+            return False, f"匹配非技能模式: {pattern}"
+
+        score = 0
+        reasons = []
+
+        keyword = self._tech_keyword(skill.upper().replace(' ', ''))
+        if keyword is not None:
+            score += 3
+            reasons.append(f"技术关键词: {keyword}")
+
+        keyword = self._industry_keyword(skill)
+        if keyword is not None:
+            score += 2
+            reasons.append(f"行业关键词: {keyword}")
+
+        suffix = self._affix(skill, self.suffixes, self.suffix_lengths, from_end=True)
+        if suffix is not None:
+            score += 1
+            reasons.append(f"技能后缀: {suffix}")
+
+        prefix = self._affix(skill, self.prefixes, self.prefix_lengths, from_end=False)
+        if prefix is not None:
+            score += 1
+            reasons.append(f"技能前缀: {prefix}")
+
+        if self.english_tech.match(skill):
+            score += 2
+            reasons.append("英文技术词")
+
+        has_english = bool(self.has_english.search(skill))
+        has_chinese = bool(self.has_chinese.search(skill))
+        if has_english and has_chinese:
+            score += 1
+            reasons.append("中英混合")
+
+        if self.standard_name.match(skill):
+            score += 1
+            reasons.append("标准技术名")
+
+        if score >= 2:
+            return True, f"得分{score}: {'; '.join(reasons)}"
+        elif score == 1:
+            if len(skill) <= 10 and (has_english or '工' in skill or '师' in skill):
+                return True, f"边界通过: {'; '.join(reasons)}"
+
+        return False, f"得分不足({score})"
+
+    def classify_many(self, skills):
+        """批量判定，返回与输入等长的 [(是否有效, 原因)]"""
+        classify = self.classify
+        return [classify(skill) for skill in skills]
+
+
+_classifier = None
+
+
+def get_classifier():
+    """进程内共享的分类器（首次调用时编译）"""
+    global _classifier
+    if _classifier is None:
+        _classifier = SkillClassifier()
+    return _classifier
+
+
+def classify_skills(skills):
+    """批量版 is_valid_skill"""
+    return get_classifier().classify_many(skills)
+
+
 def clean_skills_file(input_file, output_file):
     """清洗技能文件"""
     print("="*60)
@@ -214,12 +388,13 @@ def clean_skills_file(input_file, output_file):
     valid_skills = []
     invalid_skills = []
     
-    for skill in skills:
-        is_valid, reason = is_valid_skill(skill)
+    start = time.time()
+    for skill, (is_valid, reason) in zip(skills, classify_skills(skills)):
         if is_valid:
             valid_skills.append(skill)
         else:
             invalid_skills.append((skill, reason))
+    print(f"⏱️  分类耗时: {time.time() - start:.2f}s")
     
     # 去重
     valid_skills = sorted(set(valid_skills))
@@ -251,24 +426,51 @@ def clean_skills_file(input_file, output_file):
     return valid_skills, invalid_skills
 
 
+def check_consistency(skills):
+    """核对 SkillClassifier 与 is_valid_skill 的判定和原因，返回不一致的条目"""
+    start = time.time()
+    reference = [is_valid_skill(skill) for skill in skills]
+    reference_time = time.time() - start
+    start = time.time()
+    compiled = classify_skills(skills)
+    compiled_time = time.time() - start
+    mismatches = [(skill, a, b) for skill, a, b in zip(skills, reference, compiled) if a != b]
+    print(f"🔍 核对 {len(skills):,} 项: is_valid_skill {reference_time:.2f}s, "
+          f"SkillClassifier {compiled_time:.2f}s, 不一致 {len(mismatches)} 项")
+    for skill, a, b in mismatches[:20]:
+        print(f"   {skill} | {a} | {b}")
+    return mismatches
+
+
 if __name__ == '__main__':
-    import os
     import glob
     
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # 查找最新的技能列表文件
-    skill_files = glob.glob(os.path.join(base_dir, '技能列表_*.txt'))
-    skill_files = [f for f in skill_files if '过滤' not in f and '清洗' not in f]
+    parser = argparse.ArgumentParser(description='技能智能清洗')
+    parser.add_argument('--input', default=None, help='技能列表文件（默认最新的 技能列表_*.txt）')
+    parser.add_argument('--check', action='store_true', help='只核对预编译分类器与 is_valid_skill 是否一致')
+    args = parser.parse_args()
     
-    if not skill_files:
-        print("❌ 未找到技能列表文件")
-        exit(1)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
     
-    # 使用最新的文件
-    input_file = max(skill_files, key=os.path.getmtime)
+    if args.input:
+        input_file = args.input
+    else:
+        # 查找最新的技能列表文件
+        skill_files = glob.glob(os.path.join(base_dir, '技能列表_*.txt'))
+        skill_files = [f for f in skill_files if '过滤' not in f and '清洗' not in f]
+        
+        if not skill_files:
+            print("❌ 未找到技能列表文件")
+            exit(1)
+        
+        # 使用最新的文件
+        input_file = max(skill_files, key=os.path.getmtime)
     output_file = os.path.join(base_dir, '技能列表_清洗后.txt')
     
     print(f"📄 输入文件: {os.path.basename(input_file)}")
     
-    clean_skills_file(input_file, output_file)
+    if args.check:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            check_consistency([line.strip() for line in f if line.strip()])
+    else:
+        clean_skills_file(input_file, output_file)
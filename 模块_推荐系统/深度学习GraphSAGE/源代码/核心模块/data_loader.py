@@ -2,20 +2,263 @@ import torch
 from torch_geometric.data import HeteroData
 from neo4j import GraphDatabase
 import json
-import pandas as pd
 import numpy as np
 from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 import os
+import glob
+import queue
+import random
+import hashlib
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 # 配置信息
 NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "TYH041113"
 
+# 职位分页拉取
+JOB_PAGE_SIZE = 5000
+FETCH_QUEUE_SIZE = 2
+
+# Parquet 学生分片每次读取的行数
+STUDENT_READ_BATCH = 10000
+
+# 键集分页：先按 url 取一页职位，再展开关联信息（行的重复方式与原整表查询一致）
+# $since 非空时只取该时间之后新增/修改的职位（增量快照）
+JOB_PAGE_QUERY = """
+MATCH (j:Job)
+WHERE j.url > $after AND (j)-[:OFFERED_BY]->(:Company)
+  AND ($since IS NULL OR coalesce(j.updated_at, j.created_at) > datetime($since))
+WITH j ORDER BY j.url LIMIT $page_size
+MATCH (j)-[:OFFERED_BY]->(c:Company)
+OPTIONAL MATCH (j)-[:LOCATED_IN]->(city:City)
+OPTIONAL MATCH (j)-[:BELONGS_TO_INDUSTRY]->(ind:Industry)
+OPTIONAL MATCH (j)-[:REQUIRES_SKILL]->(s:Skill)
+RETURN j.url as id, j.salary_min as salary_min, j.salary_max as salary_max,
+       j.education as education, city.name as city, ind.name as industry,
+       collect(s.name) as skills
+ORDER BY id
+"""
+
+
+def student_digest(student):
+    """学生图相关字段的摘要，用于增量更新时识别新增/修改的学生"""
+    payload = json.dumps([student.get('education'), student.get('major'),
+                          student.get('preferred_cities'), student.get('skills')], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def student_files(source):
+    """
+    学生数据来源 -> 文件列表
+    - 目录: 有 manifest.json 时按其中的分片顺序，否则为按文件名排序的 *.jsonl / *.parquet
+    - 含通配符的路径: glob 结果排序
+    - 单个文件: .json（students_data_500.json 整体文档）/ .jsonl / .parquet
+    """
+    if os.path.isdir(source):
+        manifest = os.path.join(source, 'manifest.json')
+        if os.path.exists(manifest):
+            with open(manifest, 'r', encoding='utf-8') as f:
+                return [os.path.join(source, shard['file']) for shard in json.load(f)['shards']]
+        return sorted(glob.glob(os.path.join(source, '*.jsonl')) + glob.glob(os.path.join(source, '*.parquet')))
+    if glob.has_magic(source):
+        return sorted(glob.glob(source))
+    return [source]
+
+
+def iter_students(source, batch_size=STUDENT_READ_BATCH):
+    """
+    逐个产出学生字典
+    - JSONL 逐行解析，Parquet 按批读取，内存占用与单批大小相关，与学生总数无关
+    - .json 兼容旧的整体文档格式（整个文件一次性读入）
+    """
+    files = student_files(source)
+    if not files:
+        raise FileNotFoundError(f"未找到学生数据: {source}")
+    for path in files:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+                yield from batch.to_pylist()
+        elif path.endswith('.jsonl'):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                yield from json.load(f)['students']
+
+
+class StudentColumns:
+    """
+    学生列式存储（与 JobColumns 相同的思路）
+    - 学历/专业存为临时词表编码，期望城市/技能为 CSR 结构，保留原始顺序
+    - 读入时即计算 student_digest，之后不再需要原始字典
+    """
+
+    SCALARS = ('education', 'major')
+    LISTS = {'city': 'preferred_cities', 'skills': 'skills'}
+
+    def __init__(self):
+        self.ids = []
+        self.digests = []
+        self.columns = {name: array('q') for name in self.SCALARS}
+        self.ptr = {name: array('q', [0]) for name in self.LISTS}
+        self.flat = {name: array('q') for name in self.LISTS}
+        self.values = {name: {} for name in self.SCALARS + tuple(self.LISTS)}
+
+    @classmethod
+    def from_records(cls, records):
+        students = cls()
+        students.extend(records)
+        return students
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _code(self, name, value):
+        vocab = self.values[name]
+        code = vocab.get(value)
+        if code is None:
+            code = vocab[value] = len(vocab)
+        return code
+
+    def extend(self, records):
+        for s in records:
+            self.ids.append(s['student_id'])
+            self.digests.append(student_digest(s))
+            for name in self.SCALARS:
+                self.columns[name].append(self._code(name, s[name]))
+            for name, field in self.LISTS.items():
+                self.flat[name].extend(self._code(name, v) for v in s[field])
+                self.ptr[name].append(len(self.flat[name]))
+
+    def distinct(self, name):
+        return list(self.values[name])
+
+    def codes(self, name, vocab):
+        """临时编码 -> vocab 编码（CSR 列为展开后的编码），不在 vocab 中的值为 -1"""
+        lut = np.fromiter((vocab.get(v, -1) for v in self.values[name]), dtype=np.int64,
+                          count=len(self.values[name]))
+        raw = np.frombuffer(self.columns[name] if name in self.columns else self.flat[name], dtype=np.int64)
+        lut = np.append(lut, -1)
+        return lut[raw]
+
+    def edges(self, name, owner_indices, vocab):
+        """CSR 列展开为 (学生节点索引, vocab 编码) 边数组，只保留 vocab 中存在的值"""
+        owners = np.repeat(np.asarray(owner_indices, dtype=np.int64),
+                           np.diff(np.frombuffer(self.ptr[name], dtype=np.int64)))
+        codes = self.codes(name, vocab)
+        valid = codes >= 0
+        return owners[valid], codes[valid]
+
+    def lists(self, name, rows=None):
+        """逐行产出 CSR 列的原始取值列表"""
+        values = self.distinct(name)
+        ptr, flat = self.ptr[name], self.flat[name]
+        for i in range(len(self)) if rows is None else rows:
+            yield [values[c] for c in flat[ptr[i]:ptr[i + 1]]]
+
+    def take(self, rows):
+        """按行号取子集"""
+        scalars = {name: self.distinct(name) for name in self.SCALARS}
+        return StudentColumns.from_records(
+            dict({'student_id': self.ids[i]},
+                 **{name: scalars[name][self.columns[name][i]] for name in self.SCALARS},
+                 **{field: next(self.lists(name, [i])) for name, field in self.LISTS.items()})
+            for i in rows
+        )
+
+
+class JobColumns:
+    """
+    职位列式存储
+    - 数值列使用 array 紧凑存储，类别列（学历/城市/行业/技能）存为临时词表编码
+    - 技能为 CSR 结构: skill_ptr[i]:skill_ptr[i+1] 对应第 i 个职位的技能编码
+    - 编码器拟合后通过 codes() 映射为 LabelEncoder 的最终编码
+    """
+
+    FIELDS = ('id', 'salary_min', 'salary_max', 'education', 'city', 'industry', 'skills')
+
+    def __init__(self):
+        self.ids = []
+        self.salary_min = array('d')
+        self.salary_max = array('d')
+        self.skill_ptr = array('q', [0])
+        self.skill_codes = array('q')
+        self.columns = {name: array('q') for name in ('education', 'city', 'industry')}
+        self.values = {name: {} for name in ('education', 'city', 'industry', 'skills')}
+
+    @classmethod
+    def from_records(cls, records):
+        """兼容字典列表形式的职位数据"""
+        jobs = cls()
+        jobs.append_rows([tuple(r.get(f) for f in cls.FIELDS) for r in records])
+        return jobs
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _code(self, name, value):
+        vocab = self.values[name]
+        code = vocab.get(value)
+        if code is None:
+            code = vocab[value] = len(vocab)
+        return code
+
+    def append_rows(self, rows):
+        nan = float('nan')
+        for job_id, salary_min, salary_max, education, city, industry, skills in rows:
+            self.ids.append(job_id)
+            self.salary_min.append(nan if salary_min is None else float(salary_min))
+            self.salary_max.append(nan if salary_max is None else float(salary_max))
+            self.columns['education'].append(self._code('education', education if education else '不限'))
+            self.columns['city'].append(self._code('city', city) if city else -1)
+            self.columns['industry'].append(self._code('industry', industry) if industry else -1)
+            self.skill_codes.extend(self._code('skills', sk) for sk in skills)
+            self.skill_ptr.append(len(self.skill_codes))
+
+    def distinct(self, name):
+        """某列出现过的全部取值（不含缺失）"""
+        return list(self.values[name])
+
+    def codes(self, name, vocab):
+        """临时编码 -> vocab 编码，缺失或不在 vocab 中的值为 -1"""
+        lut = np.fromiter((vocab.get(v, -1) for v in self.values[name]), dtype=np.int64,
+                          count=len(self.values[name]))
+        raw = np.frombuffer(self.skill_codes if name == 'skills' else self.columns[name], dtype=np.int64)
+        lut = np.append(lut, -1)  # 下标 -1 指向末尾的 -1
+        return lut[raw]
+
+    def salary_mid(self):
+        salary = np.stack([np.frombuffer(self.salary_min, dtype=np.float64),
+                           np.frombuffer(self.salary_max, dtype=np.float64)], axis=1)
+        salary = np.nan_to_num(salary, nan=0.0)
+        return ((salary[:, 0] + salary[:, 1]) / 2).reshape(-1, 1)
+
+    def skill_counts(self):
+        return np.diff(np.frombuffer(self.skill_ptr, dtype=np.int64))
+
+    def head_cities(self, n):
+        names = self.distinct('city')
+        return [names[c] if c >= 0 else None for c in self.columns['city'][:n]]
+
+
 class GraphDataLoader:
-    def __init__(self, student_file='/Users/tianyuhang/文稿/data/模块_工具/学生数据生成/students_data_500.json'):
+    def __init__(self, student_file='/Users/tianyuhang/文稿/data/模块_工具/学生数据生成/students_data_500.json',
+                 page_size=JOB_PAGE_SIZE):
+        """
+        Args:
+            student_file: 学生数据，可为 students_data_500.json、JSONL/Parquet 分片目录（生成学生数据_大规模.py 的输出）
+                          或通配符路径（如 students_1m/students-*.jsonl）
+        """
         self.driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
         self.student_file = student_file
+        self.page_size = page_size
         self.data = HeteroData()
         
         # 编码器
@@ -31,14 +274,9 @@ class GraphDataLoader:
     def load_data(self):
         print("🔄 开始加载并构建图数据...")
         
-        # 1. 加载学生数据
-        with open(self.student_file, 'r', encoding='utf-8') as f:
-            student_json = json.load(f)
-        students = student_json['students']
+        # 1-2. 学生分片在后台线程流式读入，同时从Neo4j分页拉取职位
+        students, jobs = self._load_students_and_jobs()
         print(f"   已加载 {len(students)} 名学生")
-
-        # 2. 从Neo4j加载职位数据
-        jobs = self._fetch_jobs()
         print(f"   已加载 {len(jobs)} 个职位")
         
         # 3. 构建节点映射和特征
@@ -51,64 +289,258 @@ class GraphDataLoader:
         print(self.data)
         return self.data
 
-    def _fetch_jobs(self):
-        query = """
-        MATCH (j:Job)-[:OFFERED_BY]->(c:Company)
-        OPTIONAL MATCH (j)-[:LOCATED_IN]->(city:City)
-        OPTIONAL MATCH (j)-[:BELONGS_TO_INDUSTRY]->(ind:Industry)
-        OPTIONAL MATCH (j)-[:REQUIRES_SKILL]->(s:Skill)
-        RETURN j.url as id, j.title as title, j.salary_min as salary_min, 
-               j.salary_max as salary_max, j.education as education,
-               city.name as city, ind.name as industry,
-               collect(s.name) as skills
+    def _load_students(self):
+        return StudentColumns.from_records(iter_students(self.student_file))
+
+    def _load_students_and_jobs(self, since=None):
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='student-read') as pool:
+            students = pool.submit(self._load_students)
+            jobs = self._fetch_jobs(since=since)
+            return students.result(), jobs
+
+    def load_delta(self, data, since):
+        """
+        增量更新已有图（节点索引保持不变）
+        - 职位：只拉取 since 之后新增/修改的职位 (j.updated_at / j.created_at)
+        - 学生：学生文件中摘要与快照不一致或新出现的学生
+        - 新出现的技能/城市等取值追加到词表末尾，已有编码不变
+        - 技能/城市节点特征宽度不变（与已训练模型兼容），新增的技能/城市特征为零向量
+        - 受影响学生（变更学生 + 与变更职位共享技能的学生）按同一规则重新生成 applies 边
+        - 已删除的职位/学生不会从图中移除
+        """
+        print(f"🔄 增量更新图数据 (since={since})...")
+        self.data = data
+        self._restore_vocab(data)
+
+        students, jobs = self._load_students_and_jobs(since=since)
+        digests = data.student_digest
+        changed_students = students.take([i for i, (sid, digest) in enumerate(zip(students.ids, students.digests))
+                                          if digests.get(sid) != digest])
+        print(f"   变更学生: {len(changed_students)} 名")
+        print(f"   变更职位: {len(jobs)} 条记录")
+
+        stats = {'students': len(changed_students), 'jobs': len(set(jobs.ids))}
+        if not changed_students and not len(jobs):
+            print("✅ 无变更")
+            return self.data, stats
+
+        s_idx, j_idx = self._append_nodes(changed_students, jobs)
+        self._update_edges(students, changed_students, s_idx, jobs, j_idx)
+
+        digests.update(zip(changed_students.ids, changed_students.digests))
+        print("✅ 增量更新完成")
+        print(self.data)
+        return self.data, stats
+
+    def _restore_vocab(self, data):
+        if not hasattr(data, 'vocab'):
+            raise ValueError("图数据缺少词表信息（旧版 graph_data.pt），请先全量构建一次")
+        vocab = data.vocab
+        self.skill_vocab = {v: i for i, v in enumerate(vocab['skill'])}
+        self.city_vocab = {v: i for i, v in enumerate(vocab['city'])}
+        self.major_vocab = {v: i for i, v in enumerate(vocab['major'])}
+        self.edu_vocab = {v: i for i, v in enumerate(vocab['edu'])}
+        self.industry_vocab = {v: i for i, v in enumerate(vocab['industry'])}
+
+    def _extend_vocab(self, name, values):
+        """新取值按排序追加到词表末尾"""
+        vocab = getattr(self, f'{name}_vocab')
+        new_values = sorted({v for v in values if v and v not in vocab})
+        for v in new_values:
+            vocab[v] = len(vocab)
+        self.data.vocab[name].extend(new_values)
+        return len(new_values)
+
+    def _append_nodes(self, students, jobs):
+        """更新/追加学生与职位节点特征，返回每名学生、每条职位记录对应的节点索引"""
+        # --- 词表扩展 ---
+        added_skills = self._extend_vocab('skill', chain(students.distinct('skills'), jobs.distinct('skills')))
+        added_cities = self._extend_vocab('city', chain(students.distinct('city'), jobs.distinct('city')))
+        self._extend_vocab('major', students.distinct('major'))
+        self._extend_vocab('edu', chain(students.distinct('education'), jobs.distinct('education')))
+        self._extend_vocab('industry', jobs.distinct('industry'))
+        print(f"   新增技能: {added_skills}, 新增城市: {added_cities}")
+
+        # --- 学生 ---
+        s_features = np.stack([students.codes('education', self.edu_vocab),
+                               students.codes('major', self.major_vocab)], axis=1).astype(np.float32).reshape(-1, 2)
+        s_idx = self._upsert_rows('student', students.ids, s_features)
+
+        # --- 职位：同一职位多条记录时以最后一条的特征为准（与全量构建的 node_map 一致） ---
+        lo, hi = self.data.salary_range
+        salary_norm = (jobs.salary_mid()[:, 0] - lo) / (hi - lo if hi > lo else 1.0)
+        j_features = np.stack([salary_norm, jobs.codes('education', self.edu_vocab)], axis=1).astype(np.float32)
+        j_idx = self._upsert_rows('job', jobs.ids, j_features)
+
+        # --- 技能/城市：保持训练时的 one-hot 宽度（模型输入维度固定），新增节点的特征为零向量，
+        #     嵌入只来自邻居聚合；需要独立的 one-hot 时全量重建并重新训练 ---
+        for node_type, name in (('skill', 'skill'), ('city', 'city')):
+            store = self.data[node_type]
+            size = len(self.data.vocab[name])
+            if store.num_nodes != size:
+                x = store.x
+                store.x = torch.cat([x, x.new_zeros((size - x.size(0), x.size(1)))])
+                store.num_nodes = size
+        return s_idx, j_idx
+
+    def _upsert_rows(self, node_type, ids, features):
+        """已有节点原位更新特征，新节点追加到末尾；返回每行对应的节点索引"""
+        store = self.data[node_type]
+        node_map = store.node_map
+        base = num_nodes = store.num_nodes
+        for node_id in ids:
+            if node_id not in node_map:
+                node_map[node_id] = num_nodes
+                num_nodes += 1
+        idx = np.fromiter((node_map[i] for i in ids), dtype=np.int64, count=len(ids))
+
+        x = store.x
+        if num_nodes > base:
+            x = torch.cat([x, x.new_zeros((num_nodes - base, x.size(1)))])
+        if len(ids):
+            x[torch.from_numpy(idx)] = torch.from_numpy(features)
+        store.x = x
+        store.num_nodes = num_nodes
+        return idx
+
+    def _replace_edges(self, owner_type, other_type, owners, owner_idx, other_idx):
+        """删除 owners 的全部 owner->other 边（及反向边）后追加新边"""
+        forward = self.data[owner_type, 'to', other_type]
+        backward = self.data[other_type, 'to', owner_type]
+        fwd = forward.edge_index.numpy()
+        bwd = backward.edge_index.numpy()
+        fwd = fwd[:, ~np.isin(fwd[0], owners)]
+        bwd = bwd[:, ~np.isin(bwd[1], owners)]
+        forward.edge_index = torch.from_numpy(np.concatenate([fwd, np.stack([owner_idx, other_idx])], axis=1).astype(np.int64))
+        backward.edge_index = torch.from_numpy(np.concatenate([bwd, np.stack([other_idx, owner_idx])], axis=1).astype(np.int64))
+
+    def _update_edges(self, students, changed_students, s_idx, jobs, j_idx):
+        s_nodes = np.unique(s_idx)
+        j_nodes = np.unique(j_idx)
+
+        # 变更职位原有的技能，用于确定受影响学生
+        job_skill = self.data['job', 'to', 'skill'].edge_index.numpy()
+        old_job_skills = job_skill[1, np.isin(job_skill[0], j_nodes)]
+
+        # 1. Student-Skill / Student-City
+        src_s, dst_k = changed_students.edges('skills', s_idx, self.skill_vocab)
+        self._replace_edges('student', 'skill', s_nodes, src_s, dst_k)
+        src_sc, dst_sc = changed_students.edges('city', s_idx, self.city_vocab)
+        self._replace_edges('student', 'city', s_nodes, src_sc, dst_sc)
+
+        # 2. Job-Skill / Job-City
+        src_j = np.repeat(j_idx, jobs.skill_counts())
+        dst_jk = jobs.codes('skills', self.skill_vocab)
+        self._replace_edges('job', 'skill', j_nodes, src_j, dst_jk)
+        dst_c = jobs.codes('city', self.city_vocab)
+        has_city = dst_c >= 0
+        self._replace_edges('job', 'city', j_nodes, j_idx[has_city], dst_c[has_city])
+
+        # 3. 受影响学生重新生成 applies 边
+        touched_skills = np.union1d(old_job_skills, dst_jk)
+        student_skill = self.data['student', 'to', 'skill'].edge_index.numpy()
+        affected = np.union1d(s_nodes, student_skill[0, np.isin(student_skill[1], touched_skills)])
+
+        s_map = self.data['student'].node_map
+        affected_set = set(affected.tolist())
+        s_rows = [i for i, sid in enumerate(students.ids) if s_map.get(sid, -1) in affected_set]
+        rows_idx = [s_map[students.ids[i]] for i in s_rows]
+
+        job_skill = self.data['job', 'to', 'skill'].edge_index.numpy()
+        self.skill_to_jobs = self._group_skill_jobs(job_skill[0], job_skill[1], self.data.vocab['skill'])
+        train_src, train_dst = self._sample_applies(students.lists('skills', s_rows), rows_idx, self.skill_to_jobs)
+
+        applies = self.data['student', 'applies', 'job'].edge_index.numpy()
+        applies = applies[:, ~np.isin(applies[0], affected)]
+        self.data['student', 'applies', 'job'].edge_index = torch.from_numpy(
+            np.concatenate([applies, np.array([train_src, train_dst], dtype=np.int64).reshape(2, -1)], axis=1)
+        )
+        print(f"   受影响学生: {len(s_rows)} 名, 重新生成正样本: {len(train_src)}")
+
+    def _fetch_jobs(self, page_size=None, since=None):
         """
-        with self.driver.session() as session:
-            result = session.run(query)
-            data = [record.data() for record in result]
-            print(f"   [Debug] 前5个职位城市: {[d['city'] for d in data[:5]]}")
-            return data
+        按 j.url 键集分页流式拉取职位
+        - 后台线程拉取下一页的同时，主线程把当前页编码进 JobColumns
+        - 队列容量有限，内存中最多同时存在 FETCH_QUEUE_SIZE 个未编码的页
+        - since (ISO 时间字符串) 非空时只拉取之后新增/修改的职位
+        """
+        page_size = page_size or self.page_size
+        self._ensure_job_index()
+
+        pages = queue.Queue(maxsize=FETCH_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def produce():
+            try:
+                after = ''
+                with self.driver.session() as session:
+                    while not stop.is_set():
+                        rows = session.run(JOB_PAGE_QUERY, after=after, page_size=page_size, since=since).values(*JobColumns.FIELDS)
+                        if not rows:
+                            break
+                        after = rows[-1][0]
+                        pages.put(rows)
+                pages.put(None)
+            except Exception as e:
+                pages.put(e)
+
+        producer = threading.Thread(target=produce, name='job-fetch', daemon=True)
+        producer.start()
+
+        jobs = JobColumns()
+        try:
+            while True:
+                rows = pages.get()
+                if rows is None:
+                    break
+                if isinstance(rows, Exception):
+                    raise rows
+                jobs.append_rows(rows)
+        finally:
+            stop.set()
+            # 解除生产者可能的阻塞
+            while producer.is_alive():
+                try:
+                    pages.get_nowait()
+                except queue.Empty:
+                    producer.join(timeout=0.1)
+
+        print(f"   [Debug] 前5个职位城市: {jobs.head_cities(5)}")
+        return jobs
+
+    def _ensure_job_index(self):
+        """键集分页依赖 Job.url 索引；已有唯一约束时创建会失败，忽略即可"""
+        try:
+            with self.driver.session() as session:
+                session.run("CREATE INDEX job_url_idx IF NOT EXISTS FOR (j:Job) ON (j.url)").consume()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _vocab(encoder):
+        """LabelEncoder.classes_ -> {值: 编码}，与 encoder.transform 结果一致（classes_ 已排序）"""
+        return {c: i for i, c in enumerate(encoder.classes_)}
 
     def _build_nodes(self, students, jobs):
+        if not isinstance(students, StudentColumns):
+            students = StudentColumns.from_records(students)
+        if not isinstance(jobs, JobColumns):
+            jobs = JobColumns.from_records(jobs)
+
         # --- 准备原始列表 ---
-        all_skills = set()
-        all_cities = set()
-        all_majors = set()
-        all_industries = set()
-        
-        # 收集学生端信息
-        student_ids = []
-        student_edus = []
-        
-        for s in students:
-            student_ids.append(s['student_id'])
-            student_edus.append(s['education'])
-            all_majors.add(s['major'])
-            for city in s['preferred_cities']:
-                all_cities.add(city)
-            for skill in s['skills']:
-                all_skills.add(skill)
-                
-        # 收集职位端信息
-        job_ids = []
-        job_salaries = []
-        job_edus = []
-        
-        for j in jobs:
-            job_ids.append(j['id'])
-            # 薪资归一化处理
-            s_min = j['salary_min'] 
-            if s_min is None or pd.isna(s_min): s_min = 0
-            
-            s_max = j['salary_max']
-            if s_max is None or pd.isna(s_max): s_max = 0
-            
-            job_salaries.append([(s_min + s_max) / 2])
-            
-            job_edus.append(j['education'] if j['education'] else '不限')
-            if j['city']: all_cities.add(j['city'])
-            if j['industry']: all_industries.add(j['industry'])
-            for skill in j['skills']:
-                all_skills.add(skill)
+        student_ids = students.ids
+        student_edus = students.distinct('education')
+
+        job_ids = jobs.ids
+        job_edus = jobs.distinct('education')
+
+        all_skills = set(students.distinct('skills')) | set(jobs.distinct('skills'))
+        all_cities = set(students.distinct('city')) | set(jobs.distinct('city'))
+        all_majors = set(students.distinct('major'))
+        all_industries = set(jobs.distinct('industry'))
+
+        # 薪资取 (min + max) / 2，缺失按 0 处理
+        job_salaries = jobs.salary_mid()
 
         # --- 编码器拟合 ---
         self.skill_encoder.fit(list(all_skills))
@@ -117,30 +549,32 @@ class GraphDataLoader:
         all_edus = list(set(student_edus + job_edus + ['不限', '大专', '本科', '硕士', '博士']))
         self.edu_encoder.fit(all_edus)
         self.industry_encoder.fit(list(all_industries))
-        
+
+        self.skill_vocab = self._vocab(self.skill_encoder)
+        self.city_vocab = self._vocab(self.city_encoder)
+        self.major_vocab = self._vocab(self.major_encoder)
+        self.edu_vocab = self._vocab(self.edu_encoder)
+        self.industry_vocab = self._vocab(self.industry_encoder)
+
         # --- 设置节点特征 (X) ---
         
         # 1. Student 节点 [Educaton(1), Major(1)]
-        s_edu_vec = self.edu_encoder.transform(student_edus)
-        student_features = []
-        for i, s in enumerate(students):
-            major_idx = self.major_encoder.transform([s['major']])[0]
-            student_features.append([s_edu_vec[i], major_idx])
-            
-        self.data['student'].x = torch.tensor(student_features, dtype=torch.float)
+        s_edu_vec = students.codes('education', self.edu_vocab)
+        s_major_vec = students.codes('major', self.major_vocab)
+        student_features = np.stack([s_edu_vec, s_major_vec], axis=1).reshape(-1, 2)
+
+        self.data['student'].x = torch.from_numpy(student_features.astype(np.float32))
         self.data['student'].num_nodes = len(students)
         self.data['student'].node_map = {sid: i for i, sid in enumerate(student_ids)}
         
         # 2. Job 节点 [Salary(1), Education(1)]
         scaler = MinMaxScaler()
-        salary_norm = scaler.fit_transform(job_salaries)
-        j_edu_vec = self.edu_encoder.transform(job_edus)
-        
-        job_features = []
-        for i in range(len(jobs)):
-            job_features.append([salary_norm[i][0], j_edu_vec[i]])
-            
-        self.data['job'].x = torch.tensor(job_features, dtype=torch.float)
+        salary_norm = scaler.fit_transform(job_salaries) if len(jobs) else job_salaries
+        salary_range = (float(scaler.data_min_[0]), float(scaler.data_max_[0])) if len(jobs) else (0.0, 0.0)
+        j_edu_vec = jobs.codes('education', self.edu_vocab)
+        job_features = np.stack([salary_norm[:, 0], j_edu_vec], axis=1).reshape(-1, 2)
+
+        self.data['job'].x = torch.from_numpy(job_features.astype(np.float32))
         self.data['job'].num_nodes = len(jobs)
         self.data['job'].node_map = {jid: i for i, jid in enumerate(job_ids)}
         
@@ -151,108 +585,96 @@ class GraphDataLoader:
         self.data['city'].num_nodes = len(self.city_encoder.classes_)
         self.data['city'].x = torch.eye(len(self.city_encoder.classes_))
         
+        # 4. 持久化编码状态，供增量更新保持节点索引与特征编码一致
+        self.data.vocab = {
+            'skill': self.skill_encoder.classes_.tolist(),
+            'city': self.city_encoder.classes_.tolist(),
+            'major': self.major_encoder.classes_.tolist(),
+            'edu': self.edu_encoder.classes_.tolist(),
+            'industry': self.industry_encoder.classes_.tolist(),
+        }
+        self.data.salary_range = salary_range
+        self.data.student_digest = dict(zip(students.ids, students.digests))
+
         print(f"   节点统计: Student({self.data['student'].num_nodes}), Job({self.data['job'].num_nodes}), Skill({self.data['skill'].num_nodes})")
 
     def _build_edges(self, students, jobs):
+        if not isinstance(students, StudentColumns):
+            students = StudentColumns.from_records(students)
+        if not isinstance(jobs, JobColumns):
+            jobs = JobColumns.from_records(jobs)
+
         # 辅助函数：添加边
         def add_edge(src_type, dst_type, src_indices, dst_indices):
-            edge_index = torch.tensor([src_indices, dst_indices], dtype=torch.long)
+            edge_index = torch.from_numpy(np.stack([src_indices, dst_indices]).astype(np.int64))
             self.data[src_type, 'to', dst_type].edge_index = edge_index
             # 添加反向边 (无向图效果，利于信息传递)
             # self.data[dst_type, 'rev_to', src_type].edge_index = torch.flip(edge_index, [0])
 
         s_map = self.data['student'].node_map
         j_map = self.data['job'].node_map
-        
-        # 优化：构建技能集合以便快速查找
-        valid_skills = set(self.skill_encoder.classes_)
+
+        # 节点ID -> 索引（ID 重复时与 node_map 一致，取最后一次出现的位置）
+        s_idx = np.fromiter((s_map[sid] for sid in students.ids), dtype=np.int64, count=len(students))
+        j_idx = np.fromiter((j_map[jid] for jid in jobs.ids), dtype=np.int64, count=len(jobs))
         
         # 1. Student-Skill (掌握)
-        src_s, dst_k = [], []
-        for s in students:
-            if s['student_id'] not in s_map: continue
-            s_idx = s_map[s['student_id']]
-            
-            # 过滤有效技能
-            s_skills = [sk for sk in s['skills'] if sk in valid_skills]
-            if not s_skills: continue
-            
-            try:
-                skill_indices = self.skill_encoder.transform(s_skills)
-                for k_idx in skill_indices:
-                    src_s.append(s_idx)
-                    dst_k.append(k_idx)
-            except: pass
+        src_s, dst_k = students.edges('skills', s_idx, self.skill_vocab)
         add_edge('student', 'skill', src_s, dst_k)
         add_edge('skill', 'student', dst_k, src_s) # 反向
         
         # 2. Job-Skill (需求)
-        src_j, dst_k = [], []
-        for j in jobs:
-            if j['id'] not in j_map: continue
-            j_idx = j_map[j['id']]
-            
-            # 过滤有效技能
-            j_skills = [sk for sk in j['skills'] if sk in valid_skills]
-            if not j_skills: continue
-            
-            try:
-                skill_indices = self.skill_encoder.transform(j_skills)
-                for k_idx in skill_indices:
-                    src_j.append(j_idx)
-                    dst_k.append(k_idx)
-            except: pass
-        add_edge('job', 'skill', src_j, dst_k)
-        add_edge('skill', 'job', dst_k, src_j) # 反向
+        src_j = np.repeat(j_idx, jobs.skill_counts())
+        dst_jk = jobs.codes('skills', self.skill_vocab)
+        add_edge('job', 'skill', src_j, dst_jk)
+        add_edge('skill', 'job', dst_jk, src_j) # 反向
         
         # 3. Job-City (位于)
-        src_j, dst_c = [], []
-        valid_cities = set(self.city_encoder.classes_)
-        for j in jobs:
-            if j['id'] not in j_map or not j['city']: continue
-            if j['city'] in valid_cities:
-                j_idx = j_map[j['id']]
-                c_idx = self.city_encoder.transform([j['city']])[0]
-                src_j.append(j_idx)
-                dst_c.append(c_idx)
-        add_edge('job', 'city', src_j, dst_c)
-        add_edge('city', 'job', dst_c, src_j)
+        dst_c = jobs.codes('city', self.city_vocab)
+        has_city = dst_c >= 0
+        src_jc, dst_c = j_idx[has_city], dst_c[has_city]
+        add_edge('job', 'city', src_jc, dst_c)
+        add_edge('city', 'job', dst_c, src_jc)
         
         # 4. Student-City (期望)
-        src_s, dst_c = [], []
-        for s in students:
-            if s['student_id'] not in s_map: continue
-            s_idx = s_map[s['student_id']]
-            for city in s['preferred_cities']:
-                if city in valid_cities:
-                    c_idx = self.city_encoder.transform([city])[0]
-                    src_s.append(s_idx)
-                    dst_c.append(c_idx)
-        add_edge('student', 'city', src_s, dst_c)
-        add_edge('city', 'student', dst_c, src_s)
+        src_sc, dst_sc = students.edges('city', s_idx, self.city_vocab)
+        add_edge('student', 'city', src_sc, dst_sc)
+        add_edge('city', 'student', dst_sc, src_sc)
 
         # 5. 生成训练用的正样本 (Student-Job)
         # 规则：技能重合度 > 0.3 且 城市匹配
         print("   正在生成训练标签(基于规则的弱监督 - 优化版)...")
-        train_src, train_dst = [], []
-        
         # 优化1: 构建 Skill -> Jobs 反向索引
+        self.skill_to_jobs = self._group_skill_jobs(src_j, dst_jk, self.skill_encoder.classes_)
+        train_src, train_dst = self._sample_applies(students.lists('skills'), s_idx.tolist(), self.skill_to_jobs)
+
+        print(f"   生成正样本连接数: {len(train_src)}")
+        edge_index = torch.tensor([train_src, train_dst], dtype=torch.long)
+        self.data['student', 'applies', 'job'].edge_index = edge_index
+
+    @staticmethod
+    def _group_skill_jobs(src_j, dst_jk, skill_names):
+        """
+        Job-Skill 边 -> {技能名: 职位索引集合}
+        按技能稳定排序后分组，组内职位顺序与逐职位插入一致，
+        因此集合的插入顺序（进而 random.sample 的结果）与逐元素构建完全相同
+        """
+        order = np.argsort(dst_jk, kind='stable')
+        grouped_jobs = src_j[order]
+        grouped_skills = dst_jk[order]
+        bounds = np.flatnonzero(np.diff(grouped_skills)) + 1
         skill_to_jobs = {}
-        for j in jobs:
-            if j['id'] not in j_map: continue
-            j_idx = j_map[j['id']]
-            # 过滤有效技能
-            valid_j_skills = [sk for sk in j['skills'] if sk in valid_skills]
-            for sk in valid_j_skills:
-                if sk not in skill_to_jobs: skill_to_jobs[sk] = set()
-                skill_to_jobs[sk].add(j_idx)
-        
-        import random
-        
-        for s in students:
-            if s['student_id'] not in s_map: continue
-            s_idx = s_map[s['student_id']]
-            s_skills = [sk for sk in s['skills'] if sk in valid_skills]
+        for skill_code, job_group in zip(grouped_skills[np.r_[0, bounds]] if len(grouped_skills) else [],
+                                         np.split(grouped_jobs, bounds)):
+            skill_to_jobs[skill_names[skill_code]] = set(job_group.tolist())
+        return skill_to_jobs
+
+    def _sample_applies(self, skill_lists, s_idx, skill_to_jobs):
+        """按技能重叠为每名学生生成至多 50 条 applies 正样本（skill_lists: 每名学生的技能列表）"""
+        train_src, train_dst = [], []
+        valid_skills = self.skill_vocab
+        for skills, s_i in zip(skill_lists, s_idx):
+            s_skills = [sk for sk in skills if sk in valid_skills]
             
             if not s_skills: continue
             
@@ -267,13 +689,9 @@ class GraphDataLoader:
             if len(candidates) > 50:
                 candidates = random.sample(candidates, 50)
                 
-            for j_idx in candidates:
-                train_src.append(s_idx)
-                train_dst.append(j_idx)
-                    
-        print(f"   生成正样本连接数: {len(train_src)}")
-        edge_index = torch.tensor([train_src, train_dst], dtype=torch.long)
-        self.data['student', 'applies', 'job'].edge_index = edge_index
+            train_src.extend([s_i] * len(candidates))
+            train_dst.extend(candidates)
+        return train_src, train_dst
 
 if __name__ == "__main__":
     loader = GraphDataLoader()
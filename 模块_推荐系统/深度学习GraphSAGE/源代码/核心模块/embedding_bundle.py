@@ -0,0 +1,411 @@
+"""
+嵌入包（训练产物导出 / 服务端加载）
+==================================
+训练结束后一次性执行编码器前向，把推荐服务需要的全部数据写成版本化目录:
+
+    输出/嵌入包/
+        CURRENT                # 当前生效的版本名（原子替换即完成热切换）
+        v20260119_153000/
+            manifest.json      # 版本、维度、节点数、来源文件
+            job.npy            # (num_jobs, dim)      按 job_index 升序
+            job_normalized.npy # (num_jobs, dim)      L2 归一化后的召回索引
+            job_index.npy      # (num_jobs,)          图中的 Job 索引
+            student.npy        # (num_students, dim)
+            skill.npy          # (num_skills, dim)    与 data.vocab['skill'] 同序
+            {kind}_ids.npy     # 按行排列的 UTF-8 id（定长字节串）
+            {kind}_keys.npy    # 排序后的 id，二分查找用
+            {kind}_rows.npy    # keys 对应的行号
+            predictor.pt       # LinkPredictor 权重
+
+服务启动时用 np.load(mmap_mode='r') 映射矩阵与 id 索引，不再加载图数据、不再执行编码器前向；
+多个 uvicorn worker 映射同一批文件，共享页缓存中的同一份物理内存，进程内只保留常数大小的对象。
+
+用法:
+    python embedding_bundle.py export --model 输出/模型权重/graphsage_model.pth --data graph_data.pt
+    python embedding_bundle.py list
+    python embedding_bundle.py activate v20260119_153000     # 切换 CURRENT（运行中的服务自动热切换）
+"""
+import os
+import json
+import time
+import argparse
+from collections.abc import MutableMapping
+from datetime import datetime
+
+import numpy as np
+import torch
+
+from embedding_store import EmbeddingStore, ordered_node_map
+
+BUNDLE_DIR = os.path.join('输出', '嵌入包')
+CURRENT = 'CURRENT'
+MATRICES = ('job', 'job_normalized', 'student', 'skill')
+KINDS = ('student', 'job', 'skill')
+
+
+# ==================== 导出 ====================
+
+def _encode_ids(ids):
+    """id 列表 -> (按行的定长字节串, 排序后的 keys, keys 对应的行号)"""
+    encoded = np.array([str(i).encode('utf-8') for i in ids], dtype=bytes) if ids else np.array([], dtype='S1')
+    order = np.argsort(encoded, kind='stable')
+    return encoded, encoded[order], order.astype(np.int64)
+
+
+def export_bundle(model, data, output_dir=BUNDLE_DIR, version=None, sources=None, activate=True):
+    """
+    执行一次编码器前向并写出嵌入包
+
+    Returns:
+        嵌入包目录
+    """
+    if not hasattr(data, 'vocab'):
+        raise ValueError("图数据缺少词表信息，无法确定技能嵌入顺序，请用新版 data_loader 重新构建")
+
+    model.eval()
+    with torch.no_grad():
+        x_dict = model.encoder(data.x_dict, data.edge_index_dict)
+
+    job_index, job_ids = ordered_node_map(data['job'].node_map)
+    student_index, student_ids = ordered_node_map(data['student'].node_map)
+    job = x_dict['job'][torch.from_numpy(job_index)].cpu().numpy().astype(np.float32)
+    student = x_dict['student'][torch.from_numpy(student_index)].cpu().numpy().astype(np.float32)
+    skill_ids = list(data.vocab['skill'])
+    skill = x_dict['skill'][:len(skill_ids)].cpu().numpy().astype(np.float32)
+
+    norms = np.linalg.norm(job, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    job_normalized = job / norms
+
+    version = version or datetime.now().strftime('v%Y%m%d_%H%M%S')
+    path = os.path.join(output_dir, version)
+    tmp = path + '.tmp'
+    os.makedirs(tmp, exist_ok=True)
+
+    for name, matrix in (('job', job), ('job_normalized', job_normalized), ('job_index', job_index),
+                         ('student', student), ('skill', skill)):
+        np.save(os.path.join(tmp, f'{name}.npy'), matrix)
+    for kind, ids in (('job', job_ids), ('student', student_ids), ('skill', skill_ids)):
+        for suffix, array in zip(('ids', 'keys', 'rows'), _encode_ids(ids)):
+            np.save(os.path.join(tmp, f'{kind}_{suffix}.npy'), array)
+    torch.save(model.predictor.state_dict(), os.path.join(tmp, 'predictor.pt'))
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'embedding_dim': int(job.shape[1]),
+        'counts': {'job': len(job_ids), 'student': len(student_ids), 'skill': len(skill_ids)},
+        'sources': sources or {},
+    }
+    with open(os.path.join(tmp, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # 整个目录写完后再改名，加载方不会看到写了一半的版本
+    os.replace(tmp, path)
+    print(f"📦 嵌入包已导出: {path} (job={len(job_ids)}, student={len(student_ids)}, skill={len(skill_ids)})")
+    if activate:
+        activate_version(output_dir, version)
+    return path
+
+
+def activate_version(bundle_dir, version):
+    """原子替换 CURRENT 指针；运行中的服务检测到变化后整体切换到新版本"""
+    if not os.path.exists(os.path.join(bundle_dir, version, 'manifest.json')):
+        raise FileNotFoundError(f"版本不存在: {version}")
+    tmp = os.path.join(bundle_dir, CURRENT + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(bundle_dir, CURRENT))
+    print(f"🔀 当前版本: {version}")
+
+
+# ==================== 加载 ====================
+
+def list_versions(bundle_dir=BUNDLE_DIR):
+    if not os.path.isdir(bundle_dir):
+        return []
+    return sorted(d for d in os.listdir(bundle_dir)
+                  if not d.endswith('.tmp') and os.path.exists(os.path.join(bundle_dir, d, 'manifest.json')))
+
+
+def current_version(bundle_dir):
+    """CURRENT 指向的版本，缺失时取最新版本"""
+    try:
+        with open(os.path.join(bundle_dir, CURRENT), 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        versions = list_versions(bundle_dir)
+        return versions[-1] if versions else None
+
+
+def resolve_bundle(path):
+    """path 可以是单个版本目录，也可以是嵌入包根目录（取 CURRENT 指向的版本）"""
+    if os.path.exists(os.path.join(path, 'manifest.json')):
+        return path
+    version = current_version(path)
+    if not version:
+        raise FileNotFoundError(f"未找到嵌入包: {path}")
+    return os.path.join(path, version)
+
+
+class IdIndex:
+    """
+    id <-> 行号
+    - 全部基于内存映射的定长字节串数组，查找为排序 keys 上的二分查找
+    - 不在进程内构建字典，多进程共享同一份物理页
+    """
+
+    def __init__(self, ids, keys, rows):
+        self.ids = ids
+        self.keys = keys
+        self.rows = rows
+
+    @classmethod
+    def load(cls, path, kind, mmap_mode='r'):
+        return cls(*(np.load(os.path.join(path, f'{kind}_{suffix}.npy'), mmap_mode=mmap_mode)
+                     for suffix in ('ids', 'keys', 'rows')))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, node_id):
+        """id -> 行号，不存在返回 None"""
+        if not isinstance(node_id, str) or not len(self.keys):
+            return None
+        key = node_id.encode('utf-8')
+        pos = int(np.searchsorted(self.keys, key))
+        if pos < len(self.keys) and self.keys[pos] == key:
+            return int(self.rows[pos])
+        return None
+
+    def id(self, row):
+        return self.ids[row].decode('utf-8')
+
+    def __iter__(self):
+        for raw in self.ids:
+            yield raw.decode('utf-8')
+
+
+class OverlayMapping(MutableMapping):
+    """只读基础映射 + 进程内覆盖层（在线更新写入覆盖层）"""
+
+    def __init__(self):
+        self._overlay = {}
+
+    def _base_get(self, key):
+        raise NotImplementedError
+
+    def _base_keys(self):
+        raise NotImplementedError
+
+    def _base_len(self):
+        raise NotImplementedError
+
+    def __getitem__(self, key):
+        if key in self._overlay:
+            return self._overlay[key]
+        value = self._base_get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return key in self._overlay or self._base_get(key) is not None
+
+    def __setitem__(self, key, value):
+        self._overlay[key] = value
+
+    def __delitem__(self, key):
+        del self._overlay[key]
+
+    def __iter__(self):
+        yield from self._overlay
+        for key in self._base_keys():
+            if key not in self._overlay:
+                yield key
+
+    def __len__(self):
+        return self._base_len() + sum(1 for key in self._overlay if self._base_get(key) is None)
+
+
+class JobMapping(OverlayMapping):
+    """Job 索引 -> Job ID（job_index 升序，二分查找）"""
+
+    def __init__(self, job_index, id_index):
+        super().__init__()
+        self.job_index = job_index
+        self.id_index = id_index
+
+    def _base_get(self, idx):
+        try:
+            idx = int(idx)
+        except (TypeError, ValueError):
+            return None
+        pos = int(np.searchsorted(self.job_index, idx))
+        if pos < len(self.job_index) and self.job_index[pos] == idx:
+            return self.id_index.id(pos)
+        return None
+
+    def _base_keys(self):
+        return (int(i) for i in self.job_index)
+
+    def _base_len(self):
+        return len(self.job_index)
+
+
+class RowMapping(OverlayMapping):
+    """ID -> 行号"""
+
+    def __init__(self, id_index):
+        super().__init__()
+        self.id_index = id_index
+
+    def _base_get(self, key):
+        return self.id_index.row(key)
+
+    def _base_keys(self):
+        return iter(self.id_index)
+
+    def _base_len(self):
+        return len(self.id_index)
+
+
+class EmbeddingBundle:
+    """只读嵌入包，矩阵以内存映射方式打开"""
+
+    def __init__(self, path, mmap=True):
+        self.path = resolve_bundle(path)
+        with open(os.path.join(self.path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        mode = 'r' if mmap else None
+        for name in MATRICES + ('job_index',):
+            setattr(self, name, np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode=mode))
+        self.index = {kind: IdIndex.load(self.path, kind, mode) for kind in KINDS}
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def embedding_dim(self):
+        return self.manifest['embedding_dim']
+
+    def job_mapping(self):
+        return JobMapping(self.job_index, self.index['job'])
+
+    def store(self):
+        """以内存映射矩阵为底的嵌入存储；在线更新的职位写入 RowMapping 与推荐器的 JobOverlay 覆盖层，不复制矩阵"""
+        store = EmbeddingStore(self.embedding_dim)
+        for kind in KINDS:
+            store.add(kind, getattr(self, kind), RowMapping(self.index[kind]))
+        return store
+
+    def load_predictor(self):
+        from model import LinkPredictor
+        predictor = LinkPredictor(self.embedding_dim)
+        predictor.load_state_dict(torch.load(os.path.join(self.path, 'predictor.pt'), weights_only=True))
+        predictor.eval()
+        return predictor
+
+
+def create_recommender_from_bundle(
+    bundle_path: str = BUNDLE_DIR,
+    neo4j_uri: str = 'bolt://localhost:7687',
+    neo4j_user: str = 'neo4j',
+    neo4j_password: str = 'TYH041113',
+    driver=None,
+    recall_precision: str = 'float32'
+):
+    """
+    从嵌入包创建混合推荐器（无编码器前向、无技能名称查询）
+    - 向量矩阵与 id 索引均为内存映射，进程内不构建按节点的字典
+    - driver 可复用已有连接（热切换时新旧推荐器共用）
+    - recall_precision 为 float16 / int8 时召回使用量化向量（见 quantization.py）
+    """
+    from neo4j import GraphDatabase
+    from hybrid_recommender import HybridRecommender
+
+    start = time.time()
+    bundle = EmbeddingBundle(bundle_path)
+    print(f"📦 加载嵌入包: {bundle.path} ({bundle.version})")
+
+    if driver is None:
+        driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+    recommender = HybridRecommender(
+        node_embeddings=bundle.store(),
+        link_predictor=bundle.load_predictor(),
+        neo4j_driver=driver,
+        job_mapping=bundle.job_mapping(),
+        embedding_dim=bundle.embedding_dim,
+        job_index=bundle.job_index,
+        job_matrix_normalized=bundle.job_normalized,
+        recall_precision=recall_precision,
+    )
+    recommender.bundle = bundle
+    print(f"   嵌入包加载耗时: {(time.time() - start) * 1000:.0f}ms")
+    return recommender
+
+
+def attach_inductive_encoder(recommender, model_path, data_path):
+    """
+    为嵌入包创建的推荐器挂载归纳式编码器（需要图数据与模型权重，适合在后台线程中调用）
+    - 只加载权重，不执行整图前向
+    - 嵌入包 manifest 记录的来源文件存在时优先使用，保证编码器与嵌入同源
+    """
+    from model import RecommenderModel
+    from inductive_encoder import InductiveJobEncoder
+
+    sources = recommender.bundle.manifest.get('sources', {}) if hasattr(recommender, 'bundle') else {}
+    if os.path.exists(sources.get('model', '')) and os.path.exists(sources.get('data', '')):
+        model_path, data_path = sources['model'], sources['data']
+
+    data = torch.load(data_path, weights_only=False)
+    model = RecommenderModel(data.metadata(), hidden_channels=64, out_channels=recommender.embedding_dim)
+    model.load_state_dict(torch.load(model_path, weights_only=True))
+    model.eval()
+    recommender.job_encoder = InductiveJobEncoder(model.encoder, data)
+    return recommender.job_encoder
+
+
+# ==================== 命令行 ====================
+
+def main():
+    parser = argparse.ArgumentParser(description='嵌入包导出与查看')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export = sub.add_parser('export', help='由模型权重与图数据导出嵌入包')
+    export.add_argument('--model', default=os.path.join('输出', '模型权重', 'graphsage_model.pth'))
+    export.add_argument('--data', default='graph_data.pt')
+    export.add_argument('--output-dir', default=BUNDLE_DIR)
+    export.add_argument('--version', default=None)
+
+    listing = sub.add_parser('list', help='查看已有版本')
+    listing.add_argument('--output-dir', default=BUNDLE_DIR)
+
+    activate = sub.add_parser('activate', help='切换 CURRENT 指向的版本')
+    activate.add_argument('version')
+    activate.add_argument('--output-dir', default=BUNDLE_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        current = current_version(args.output_dir)
+        for version in list_versions(args.output_dir):
+            with open(os.path.join(args.output_dir, version, 'manifest.json'), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            mark = '*' if version == current else ' '
+            print(f"{mark} {version}  dim={manifest['embedding_dim']}  {manifest['counts']}  {manifest['created_at']}")
+        return
+    if args.command == 'activate':
+        activate_version(args.output_dir, args.version)
+        return
+
+    from model import RecommenderModel
+    data = torch.load(args.data, weights_only=False)
+    model = RecommenderModel(data.metadata(), hidden_channels=64, out_channels=32)
+    model.load_state_dict(torch.load(args.model, weights_only=True))
+    export_bundle(model, data, args.output_dir, args.version,
+                  sources={'model': os.path.abspath(args.model), 'data': os.path.abspath(args.data)})
+
+
+if __name__ == '__main__':
+    main()
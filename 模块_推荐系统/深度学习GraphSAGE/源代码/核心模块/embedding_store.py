@@ -0,0 +1,111 @@
+"""
+紧凑嵌入存储
+============
+每种节点类型一个连续的 float32 矩阵 + id -> 行号映射，替代 {id: tensor} 的逐节点字典:
+- 单个节点取向量是一次字典查找加一次行切片（视图，不复制）
+- 批量取向量用一次花式索引，不再逐个 isinstance / detach / numpy 转换
+- 矩阵可以是普通数组，也可以是嵌入包的内存映射；行号映射可以是 dict 或嵌入包的 RowMapping
+"""
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 同一 id 在多个类型中出现时的优先级（与旧版字典的写入顺序一致：技能 > 职位 > 学生）
+LOOKUP_ORDER = ('skill', 'job', 'student')
+
+
+def ordered_node_map(node_map):
+    """node_map {id: idx} -> (按索引升序的 idx 数组, 对应 id 列表)"""
+    items = sorted(node_map.items(), key=lambda kv: kv[1])
+    return np.array([idx for _, idx in items], dtype=np.int64), [node_id for node_id, _ in items]
+
+
+class EmbeddingStore:
+    """
+    按节点类型组织的嵌入矩阵
+
+    Args:
+        dim: 嵌入维度
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.matrices: Dict[str, np.ndarray] = {}
+        self.rows: Dict[str, Mapping[str, int]] = {}
+
+    def add(self, kind: str, matrix: np.ndarray, ids) -> None:
+        """
+        登记一种节点类型
+
+        Args:
+            kind: 节点类型（student / job / skill）
+            matrix: (n, dim) 矩阵，第 i 行对应 ids 的第 i 个
+            ids: id 序列，或已构建好的 id -> 行号 映射
+        """
+        if not isinstance(matrix, np.memmap):
+            matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.matrices[kind] = matrix
+        self.rows[kind] = ids if isinstance(ids, Mapping) else {node_id: row for row, node_id in enumerate(ids)}
+
+    def replace(self, kind: str, matrix: np.ndarray) -> None:
+        """整体替换某类型的矩阵（读方持有的旧矩阵不受影响）"""
+        self.matrices[kind] = matrix
+
+    def matrix(self, kind: str) -> Optional[np.ndarray]:
+        return self.matrices.get(kind)
+
+    def row(self, kind: str, node_id) -> Optional[int]:
+        rows = self.rows.get(kind)
+        if rows is None:
+            return None
+        row = rows.get(node_id)
+        return row if row is not None and row < len(self.matrices[kind]) else None
+
+    def get(self, kind: str, node_id) -> Optional[np.ndarray]:
+        """单个节点的向量（只读视图），不存在返回 None"""
+        row = self.row(kind, node_id)
+        return None if row is None else self.matrices[kind][row]
+
+    def find(self, node_id, kinds: Sequence[str] = LOOKUP_ORDER) -> Optional[np.ndarray]:
+        """不指定类型时按 LOOKUP_ORDER 查找"""
+        for kind in kinds:
+            emb = self.get(kind, node_id)
+            if emb is not None:
+                return emb
+        return None
+
+    def gather(self, kind: str, ids: Iterable) -> Tuple[np.ndarray, List]:
+        """
+        批量取向量
+
+        Returns:
+            ((m, dim) 矩阵, 找到的 m 个 id)，不存在的 id 被跳过
+        """
+        rows = self.rows.get(kind, {})
+        size = len(self.matrices[kind]) if kind in self.matrices else 0
+        found, positions = [], []
+        for node_id in ids:
+            row = rows.get(node_id)
+            if row is not None and row < size:
+                found.append(node_id)
+                positions.append(row)
+        return self.gather_rows(kind, positions), found
+
+    def gather_rows(self, kind: str, rows) -> np.ndarray:
+        """按行号批量取向量（复制为连续数组）"""
+        matrix = self.matrices.get(kind)
+        if matrix is None or not len(rows):
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.asarray(matrix[np.asarray(rows, dtype=np.int64)], dtype=np.float32)
+
+    def __contains__(self, node_id) -> bool:
+        return any(self.row(kind, node_id) is not None for kind in self.matrices)
+
+    def __len__(self) -> int:
+        return sum(len(matrix) for matrix in self.matrices.values())
+
+    def counts(self) -> Dict[str, int]:
+        return {kind: len(matrix) for kind, matrix in self.matrices.items()}
+
+    def nbytes(self) -> int:
+        return sum(matrix.nbytes for matrix in self.matrices.values())
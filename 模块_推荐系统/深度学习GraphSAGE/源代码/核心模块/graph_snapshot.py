@@ -0,0 +1,160 @@
+"""
+图数据版本化快照
+================
+- full:  全量构建图数据，写入新版本
+- delta: 以最新版本为基础，只拉取上次快照之后新增/修改的职位与学生，追加后写入新版本
+- list:  查看已有版本
+
+快照目录结构:
+    graph_snapshots/
+        manifest.json          # 版本列表与当前版本
+        graph_v0001.pt
+        graph_v0002.pt
+        ...
+
+用法:
+    python graph_snapshot.py full
+    python graph_snapshot.py delta --export graph_data.pt   # 同时覆盖训练使用的 graph_data.pt
+    python graph_snapshot.py list
+    python graph_snapshot.py full --students ../../../../模块_工具/学生数据生成/students_1000000   # 分片学生数据
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+from datetime import datetime, timezone
+
+import torch
+
+from data_loader import GraphDataLoader
+
+SNAPSHOT_DIR = 'graph_snapshots'
+MANIFEST = 'manifest.json'
+
+
+def load_manifest(snapshot_dir):
+    path = os.path.join(snapshot_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {'current': None, 'versions': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(snapshot_dir, manifest):
+    path = os.path.join(snapshot_dir, MANIFEST)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def current_version(manifest):
+    for entry in manifest['versions']:
+        if entry['version'] == manifest['current']:
+            return entry
+    return None
+
+
+def write_snapshot(snapshot_dir, manifest, data, entry):
+    """写入新版本文件并更新 manifest（先写文件，后切换 current）"""
+    version = (manifest['versions'][-1]['version'] + 1) if manifest['versions'] else 1
+    filename = f'graph_v{version:04d}.pt'
+    path = os.path.join(snapshot_dir, filename)
+    torch.save(data, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+    entry = dict(entry, version=version, file=filename,
+                 nodes={t: int(data[t].num_nodes) for t in data.node_types},
+                 edges={'__'.join(t): int(data[t].edge_index.size(1)) for t in data.edge_types})
+    manifest['versions'].append(entry)
+    manifest['current'] = version
+    save_manifest(snapshot_dir, manifest)
+    return path, entry
+
+
+def loader_kwargs(args):
+    kwargs = {'page_size': args.page_size}
+    if args.students:
+        kwargs['student_file'] = args.students
+    return kwargs
+
+
+def snapshot_full(args):
+    manifest = load_manifest(args.snapshot_dir)
+    # 拉取前记录时间，拉取期间写入的变更会在下一次增量中被包含
+    fetched_at = datetime.now(timezone.utc).isoformat()
+    start = time.time()
+
+    loader = GraphDataLoader(**loader_kwargs(args))
+    try:
+        data = loader.load_data()
+    finally:
+        loader.close()
+
+    return write_snapshot(args.snapshot_dir, manifest, data, {
+        'mode': 'full', 'base': None, 'fetched_at': fetched_at,
+        'elapsed_s': round(time.time() - start, 2),
+    })
+
+
+def snapshot_delta(args):
+    manifest = load_manifest(args.snapshot_dir)
+    base = current_version(manifest)
+    if base is None:
+        print("⚠️ 尚无快照，改为全量构建")
+        return snapshot_full(args)
+
+    fetched_at = datetime.now(timezone.utc).isoformat()
+    start = time.time()
+    print(f"📂 基础版本: v{base['version']:04d} ({base['fetched_at']})")
+    data = torch.load(os.path.join(args.snapshot_dir, base['file']), weights_only=False)
+
+    loader = GraphDataLoader(**loader_kwargs(args))
+    try:
+        data, stats = loader.load_delta(data, since=base['fetched_at'])
+    finally:
+        loader.close()
+
+    return write_snapshot(args.snapshot_dir, manifest, data, {
+        'mode': 'delta', 'base': base['version'], 'fetched_at': fetched_at,
+        'changed': stats, 'elapsed_s': round(time.time() - start, 2),
+    })
+
+
+def list_snapshots(args):
+    manifest = load_manifest(args.snapshot_dir)
+    if not manifest['versions']:
+        print("暂无快照")
+        return
+    for entry in manifest['versions']:
+        mark = '*' if entry['version'] == manifest['current'] else ' '
+        changed = f", 变更 {entry['changed']}" if entry.get('changed') else ''
+        print(f" {mark} v{entry['version']:04d}  {entry['mode']:<5}  {entry['fetched_at']}  "
+              f"{entry['elapsed_s']}s  节点 {entry['nodes']}{changed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图数据版本化快照')
+    parser.add_argument('command', choices=['full', 'delta', 'list'])
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR)
+    parser.add_argument('--page-size', type=int, default=5000, help='职位分页大小')
+    parser.add_argument('--students', default='', help='学生数据（JSON 文件、JSONL/Parquet 分片目录或通配符路径）')
+    parser.add_argument('--export', default='', help='将新版本复制到该路径（如 graph_data.pt）')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        list_snapshots(args)
+        return
+
+    os.makedirs(args.snapshot_dir, exist_ok=True)
+    path, entry = snapshot_full(args) if args.command == 'full' else snapshot_delta(args)
+    print(f"💾 快照已保存: {path} (v{entry['version']:04d}, {entry['mode']}, {entry['elapsed_s']}s)")
+
+    if args.export:
+        shutil.copyfile(path, args.export)
+        print(f"📤 已导出到 {args.export}")
+
+
+if __name__ == '__main__':
+    main()
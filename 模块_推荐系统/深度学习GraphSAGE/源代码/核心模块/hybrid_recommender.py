@@ -11,6 +11,8 @@ Author: Antigravity AI Agent
 Date: 2026-01-13
 """
 
+import time
+import threading
 import torch
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
@@ -18,6 +20,10 @@ from dataclasses import dataclass
 from neo4j import GraphDatabase
 import warnings
 
+from embedding_store import EmbeddingStore, ordered_node_map
+from quantization import PRECISIONS, QuantizedMatrix
+from job_features import JOB_FEATURE_QUERY, JobFeatureTable
+
 # 尝试导入faiss，如果不可用则使用numpy替代
 try:
     import faiss
@@ -39,12 +45,79 @@ class RecommendationResult:
     explanation: str  # 推荐理由
 
 
+class JobOverlay:
+    """
+    在线更新职位的进程内覆盖层
+    - 基础矩阵（可以是多个 worker 共享的内存映射）从不复制、从不写入，更新的行只保存在覆盖层中
+    - rows 升序：小于 base_size 的行替换基础矩阵的对应行，其余为追加在末尾的新职位
+    - merge() 返回新对象，只复制覆盖层本身，读方持有的旧对象不受影响
+    
+    Attributes:
+        base_size: 基础矩阵行数
+        rows: (m,) 覆盖的向量表行号
+        vectors: (m, dim) 原始向量
+        normalized: (m, dim) L2 归一化向量（召回使用）
+        tail_indices: 追加行的 Job 索引，第 i 个对应行号 base_size + i
+    """
+    
+    def __init__(self, base_size: int, dim: int, rows=None, vectors=None, normalized=None, tail_indices=None):
+        self.base_size = base_size
+        self.rows = rows if rows is not None else np.empty(0, dtype=np.int64)
+        self.vectors = vectors if vectors is not None else np.empty((0, dim), dtype=np.float32)
+        self.normalized = normalized if normalized is not None else np.empty((0, dim), dtype=np.float32)
+        self.tail_indices = tail_indices if tail_indices is not None else np.empty(0, dtype=np.int64)
+    
+    @property
+    def size(self) -> int:
+        """基础行 + 追加行"""
+        return self.base_size + len(self.tail_indices)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.vectors.nbytes + self.normalized.nbytes + self.tail_indices.nbytes
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def merge(self, rows, vectors, normalized, tail_indices) -> 'JobOverlay':
+        """写入若干行（同一行以最后写入的为准）并追加新职位的索引，返回新覆盖层"""
+        rows = np.concatenate([self.rows, np.asarray(rows, dtype=np.int64)])
+        vectors = np.concatenate([self.vectors, vectors])
+        normalized = np.concatenate([self.normalized, normalized])
+        _, last = np.unique(rows[::-1], return_index=True)
+        keep = len(rows) - 1 - last
+        return JobOverlay(self.base_size, self.vectors.shape[1], rows[keep], vectors[keep], normalized[keep],
+                          np.concatenate([self.tail_indices, np.asarray(tail_indices, dtype=np.int64)]))
+    
+    def take(self, base: np.ndarray, rows) -> np.ndarray:
+        """按行号取原始向量（覆盖层优先），rows 须小于 size"""
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(rows), self.vectors.shape[1]), dtype=np.float32)
+        in_base = rows < self.base_size
+        if in_base.any():
+            out[in_base] = base[rows[in_base]]
+        if len(self.rows):
+            pos = np.minimum(np.searchsorted(self.rows, rows), len(self.rows) - 1)
+            hit = self.rows[pos] == rows
+            out[hit] = self.vectors[pos[hit]]
+        return out
+    
+    def scores(self, base_scores: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """基础矩阵的相似度（base_size 个）-> 全部行的相似度，覆盖行用覆盖层的归一化向量重算"""
+        if not len(self.rows):
+            return base_scores
+        out = np.empty(self.size, dtype=np.float32)
+        out[:self.base_size] = base_scores[:self.base_size]
+        out[self.rows] = self.normalized @ query
+        return out
+
+
 class HybridRecommender:
     """
     三层漏斗式混合推荐器
     
     Attributes:
-        node_embeddings: 节点嵌入字典 {id: tensor}
+        node_embeddings: 节点嵌入存储（按类型的矩阵 + id -> 行号）
         link_predictor: 预训练的链路预测模型
         neo4j_driver: Neo4j数据库驱动
         job_mapping: Job索引到ID的映射
@@ -52,30 +125,55 @@ class HybridRecommender:
     
     def __init__(
         self,
-        node_embeddings: Dict[str, torch.Tensor],
+        node_embeddings: EmbeddingStore,
         link_predictor: torch.nn.Module,
         neo4j_driver: Any,
         job_mapping: Dict[int, str],
-        embedding_dim: int = 32
+        embedding_dim: int = 32,
+        job_index: Optional[np.ndarray] = None,
+        job_matrix_normalized: Optional[np.ndarray] = None,
+        recall_precision: str = 'float32',
+        rescore_factor: int = 4
     ):
         """
         初始化混合推荐器
         
         Args:
-            node_embeddings: 所有节点的嵌入向量
+            node_embeddings: 所有节点的嵌入存储，'job' 矩阵即召回与精排使用的向量表
             link_predictor: 预训练的链路预测模型
             neo4j_driver: Neo4j驱动实例
             job_mapping: 索引到Job ID的映射
             embedding_dim: 嵌入向量维度
+            job_index: 可选，与 'job' 矩阵行对应的Job索引（升序），缺省时由 job_mapping 推出
+            job_matrix_normalized: 可选，'job' 矩阵的L2归一化结果（如嵌入包的内存映射）
+            recall_precision: 召回向量精度 float32 / float16 / int8；
+                              量化时不再保留 float32 归一化副本，召回候选用 float32 原始向量精确重排
+            rescore_factor: 量化召回时精确重排的候选倍数（top_k * rescore_factor）
         """
+        if recall_precision not in PRECISIONS:
+            raise ValueError(f"recall_precision 必须是 {PRECISIONS} 之一")
         self.embeddings = node_embeddings
         self.predictor = link_predictor
         self.driver = neo4j_driver
         self.job_mapping = job_mapping
         self.embedding_dim = embedding_dim
+        self.recall_precision = recall_precision
+        self.rescore_factor = rescore_factor
+        # 新职位的归纳式编码器（由 create_recommender_from_trained_model 设置）
+        self.job_encoder = None
+        # 在线更新的职位（见 JobOverlay，由 _build_job_index 创建）
+        self.job_overlay = None
+        self._update_lock = threading.Lock()
+        # Layer 2.5 规则特征表（首次使用时从 Neo4j 一次性加载）
+        self.job_features = None
+        self._job_features_lock = threading.Lock()
+        # 课程 -> 技能映射（由服务注入，提供 loaded 与 skills_for(courses)），未注入时回退到图查询
+        self.course_skill_index = None
+        # 技能名规范化索引（由服务注入，提供 resolve(names)），用于把用户输入折叠到图中的写法
+        self.skill_index = None
         
         # 提取所有Job嵌入并构建索引
-        self._build_job_index()
+        self._build_job_index(job_index, job_matrix_normalized)
         
         # 设置模型为评估模式
         self.predictor.eval()
@@ -84,42 +182,196 @@ class HybridRecommender:
         print(f"   Job数量: {len(self.job_mapping)}")
         print(f"   嵌入维度: {embedding_dim}")
         print(f"   使用FAISS: {USE_FAISS}")
+        if self.recall_index is not None:
+            print(f"   召回精度: {recall_precision} ({self.recall_index.nbytes / 1024 / 1024:.1f}MB)")
     
-    def _build_job_index(self):
+    def _build_job_index(self, job_index=None, job_matrix_normalized=None):
         """构建Job向量索引用于快速检索"""
-        # 收集所有Job的嵌入
-        job_ids = sorted(self.job_mapping.keys())
-        job_embeddings = []
-        
-        for idx in job_ids:
-            job_id = self.job_mapping[idx]
-            if job_id in self.embeddings:
-                emb = self.embeddings[job_id]
-            elif idx in self.embeddings:
-                emb = self.embeddings[idx]
+        # Job ID -> 向量表行号（索引可能不连续，行号与 job_indices 的位置一致）
+        self.job_id_to_row = self.embeddings.rows.setdefault('job', {})
+        self.job_embeddings_np = self.embeddings.matrix('job')
+        if self.job_embeddings_np is None:
+            self.job_embeddings_np = np.empty((0, self.embedding_dim), dtype=np.float32)
+            self.embeddings.replace('job', self.job_embeddings_np)
+        
+        if job_index is None:
+            id_to_idx = {job_id: idx for idx, job_id in self.job_mapping.items()}
+            job_index = np.zeros(len(self.job_embeddings_np), dtype=np.int64)
+            for job_id, row in self.job_id_to_row.items():
+                job_index[row] = id_to_idx[job_id]
+        self.job_indices = np.asarray(job_index, dtype=np.int64)
+        self.job_overlay = JobOverlay(len(self.job_embeddings_np), self.embedding_dim)
+        
+        # 量化召回：只保留量化后的归一化向量，不再保留 float32 归一化副本
+        self.recall_index = None
+        self.job_embeddings_normalized = None
+        if self.recall_precision != 'float32':
+            if job_matrix_normalized is not None:
+                self.recall_index = QuantizedMatrix.quantize(job_matrix_normalized, self.recall_precision)
             else:
-                # 使用随机向量作为fallback
-                emb = torch.randn(self.embedding_dim)
-            
-            if isinstance(emb, torch.Tensor):
-                emb = emb.detach().cpu().numpy()
-            job_embeddings.append(emb)
-        
-        self.job_embeddings_np = np.array(job_embeddings, dtype=np.float32)
-        self.job_indices = job_ids
-        
+                self.recall_index = QuantizedMatrix.quantize(self.job_embeddings_np, self.recall_precision,
+                                                             normalize=True)
         # 归一化用于余弦相似度
-        norms = np.linalg.norm(self.job_embeddings_np, axis=1, keepdims=True)
-        norms[norms == 0] = 1  # 防止除零
-        self.job_embeddings_normalized = self.job_embeddings_np / norms
+        elif job_matrix_normalized is not None:
+            self.job_embeddings_normalized = job_matrix_normalized
+        else:
+            norms = np.linalg.norm(self.job_embeddings_np, axis=1, keepdims=True)
+            norms[norms == 0] = 1  # 防止除零
+            self.job_embeddings_normalized = self.job_embeddings_np / norms
         
-        if USE_FAISS:
+        if USE_FAISS and self.recall_index is None:
             # 使用FAISS构建索引 (内积 = 余弦相似度，因为已归一化)
             self.index = faiss.IndexFlatIP(self.embedding_dim)
             self.index.add(self.job_embeddings_normalized)
         else:
             self.index = None
     
+    def _job_rows(self, job_indices, overlay: Optional[JobOverlay] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Job索引 -> (向量表行号, 是否存在)；基础索引与追加索引均升序，二分查找"""
+        overlay = overlay or self.job_overlay
+        query = np.asarray(job_indices, dtype=np.int64)
+        rows = np.zeros(len(query), dtype=np.int64)
+        found = np.zeros(len(query), dtype=bool)
+        for indices, offset in ((self.job_indices, 0), (overlay.tail_indices, overlay.base_size)):
+            if not len(indices):
+                continue
+            pos = np.minimum(np.searchsorted(indices, query), len(indices) - 1)
+            hit = ~found & (indices[pos] == query)
+            rows[hit] = pos[hit] + offset
+            found |= hit
+        return rows, found
+    
+    def _row_indices(self, rows, overlay: Optional[JobOverlay] = None) -> np.ndarray:
+        """向量表行号 -> Job索引（追加的新职位在覆盖层中）"""
+        overlay = overlay or self.job_overlay
+        rows = np.asarray(rows, dtype=np.int64)
+        in_base = rows < overlay.base_size
+        out = np.empty(len(rows), dtype=np.int64)
+        out[in_base] = self.job_indices[rows[in_base]]
+        out[~in_base] = overlay.tail_indices[rows[~in_base] - overlay.base_size]
+        return out
+    
+    def warm_up(self, student_id: Optional[str] = None, top_k: int = 100) -> float:
+        """
+        预热：顺序读取全部向量矩阵（内存映射的页面载入页缓存），并执行一次召回 + 精排
+        
+        Returns:
+            耗时（毫秒）
+        """
+        start = time.time()
+        matrices = list(self.embeddings.matrices.values())
+        matrices.append(self.recall_index.codes if self.recall_index is not None else self.job_embeddings_normalized)
+        for matrix in matrices:
+            float(np.asarray(matrix).sum())
+        if student_id is None:
+            student_id = next(iter(self.embeddings.rows.get('student', {})), None)
+        if student_id is not None and self.job_overlay.size:
+            self.rank(student_id, self.recall(student_id, top_k))
+        if self.driver is not None:
+            self._get_job_features()
+        return (time.time() - start) * 1000
+    
+    # ==================== 在线更新 ====================
+    def upsert_job(self, job_id: str, embedding: np.ndarray) -> int:
+        """
+        写入/更新单个职位的嵌入（见 upsert_jobs）
+        
+        Returns:
+            职位索引
+        """
+        return self.upsert_jobs([job_id], [embedding])[0]
+    
+    def upsert_jobs(self, job_ids: List[str], embeddings) -> List[int]:
+        """
+        批量写入/更新职位嵌入（写入进程内覆盖层，见 JobOverlay）
+        - 已有职位覆盖对应行，新职位追加在末尾；只读的基础矩阵与召回索引不复制，
+          内存映射的嵌入包在各 worker 间仍共享同一份物理内存
+        - 读路径不加锁：先登记映射，再整体替换覆盖层，读到的覆盖层行数总不超过映射
+        
+        Returns:
+            与 job_ids 对应的职位索引
+        """
+        if not job_ids:
+            return []
+        embs = np.asarray(embeddings, dtype=np.float32).reshape(len(job_ids), -1)
+        norms = np.linalg.norm(embs, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        normalized = embs / norms
+        # 同一批内重复的职位以最后一次为准
+        last = {job_id: i for i, job_id in enumerate(job_ids)}
+        
+        with self._update_lock:
+            overlay = self.job_overlay
+            size = overlay.size
+            rows, positions, appended_ids = [], [], []
+            for job_id, i in last.items():
+                row = self.job_id_to_row.get(job_id)
+                if row is None or row >= size:
+                    row = size + len(appended_ids)
+                    appended_ids.append(job_id)
+                rows.append(row)
+                positions.append(i)
+            positions = np.asarray(positions, dtype=np.int64)
+            
+            if len(overlay.tail_indices):
+                start = int(overlay.tail_indices[-1]) + 1
+            else:
+                start = int(self.job_indices[-1]) + 1 if len(self.job_indices) else 0
+            new_indices = np.arange(start, start + len(appended_ids), dtype=np.int64)
+            for job_id, idx, row in zip(appended_ids, new_indices.tolist(), range(size, size + len(appended_ids))):
+                self.job_mapping[idx] = job_id
+                self.job_id_to_row[job_id] = row
+            
+            overlay = overlay.merge(rows, embs[positions], normalized[positions], new_indices)
+            self.job_overlay = overlay
+            job_rows = self.job_id_to_row
+            return self._row_indices([job_rows[job_id] for job_id in job_ids], overlay).tolist()
+    
+    def refresh_changed_jobs(self, since: str, limit: int = 1000,
+                             after: Optional[str] = None) -> Tuple[int, Optional[Tuple[str, str]]]:
+        """
+        为 since 之后新增/修改的职位计算归纳式嵌入并写入索引（按 (修改时间, url) 升序分页）
+        
+        Args:
+            since: ISO 时间字符串
+            limit: 单次最多处理的职位数
+            after: 与 since 同一修改时间的职位中，只处理 url 大于 after 的（续页使用；
+                   同一事务写入的职位共享同一个 datetime()，只按时间翻页会漏掉超出 limit 的部分）
+            
+        Returns:
+            (更新的职位数, 最后一个职位的 (修改时间, url))，数量达到 limit 时调用方应以此作为 (since, after) 继续
+        """
+        if self.job_encoder is None:
+            return 0, None
+        
+        with self.driver.session() as session:
+            result = session.run("""
+                MATCH (j:Job)
+                WHERE j.updated_at >= datetime($since) OR j.created_at >= datetime($since)
+                WITH j, coalesce(j.updated_at, j.created_at) AS changed_at
+                WHERE changed_at > datetime($since)
+                   OR (changed_at = datetime($since) AND $after IS NOT NULL AND j.url > $after)
+                ORDER BY changed_at, j.url
+                LIMIT $limit
+                OPTIONAL MATCH (j)-[:LOCATED_IN]->(city:City)
+                OPTIONAL MATCH (j)-[:REQUIRES_SKILL]->(s:Skill)
+                WITH j, changed_at, head(collect(DISTINCT city.name)) AS city, collect(DISTINCT s.name) AS skills
+                ORDER BY changed_at, j.url
+                RETURN j.url AS id, j.title AS title, j.salary_min AS salary_min, j.salary_max AS salary_max,
+                       j.education AS education, city, skills, toString(changed_at) AS changed_at
+            """, since=since, after=after, limit=limit)
+            jobs = [record.data() for record in result]
+        
+        if jobs:
+            self.upsert_jobs([job['id'] for job in jobs], [self.job_encoder.encode(job) for job in jobs])
+        if jobs and self.job_features is not None:
+            self.job_features.set_rows([self.job_id_to_row[job['id']] for job in jobs],
+                                       [job['title'] or '' for job in jobs],
+                                       [job['education'] or '' for job in jobs])
+        if jobs:
+            print(f"🆕 归纳式更新 {len(jobs)} 个职位嵌入")
+        return len(jobs), ((jobs[-1]['changed_at'], jobs[-1]['id']) if jobs else None)
+    
     # ==================== Layer 1: 快速召回 ====================
     def recall(self, student_id: str, top_k: int = 500, skills: List[str] = None) -> List[int]:
         """
@@ -142,37 +394,53 @@ class HybridRecommender:
             return self._cold_start_recall(student_id, top_k)
         
         # 归一化
-        if isinstance(student_emb, torch.Tensor):
-            student_emb = student_emb.detach().cpu().numpy()
         student_emb = student_emb.astype(np.float32).reshape(1, -1)
         norm = np.linalg.norm(student_emb)
         if norm > 0:
             student_emb = student_emb / norm
         
-        if USE_FAISS and self.index is not None:
-            # 使用FAISS进行检索
+        if self.recall_index is not None:
+            return self._quantized_recall(student_emb[0], top_k)
+        
+        overlay = self.job_overlay
+        if USE_FAISS and self.index is not None and not len(overlay):
+            # 使用FAISS进行检索（有在线更新的职位时退回 NumPy）
             scores, indices = self.index.search(student_emb, min(top_k, len(self.job_indices)))
-            return [self.job_indices[i] for i in indices[0]]
+            return [int(self.job_indices[i]) for i in indices[0]]
         else:
-            # 使用NumPy计算余弦相似度
-            similarities = np.dot(self.job_embeddings_normalized, student_emb.T).flatten()
+            # 使用NumPy计算余弦相似度，覆盖层中的职位用更新后的向量
+            query = student_emb[0]
+            similarities = overlay.scores(np.dot(self.job_embeddings_normalized, query), query)
             top_indices = np.argsort(similarities)[::-1][:top_k]
-            return [self.job_indices[i] for i in top_indices]
+            return self._row_indices(top_indices, overlay).tolist()
+    
+    def _quantized_recall(self, query: np.ndarray, top_k: int) -> List[int]:
+        """量化向量粗筛 top_k * rescore_factor 个候选，再用 float32 原始向量精确计算余弦相似度排序"""
+        recall_index, job_matrix, overlay = self.recall_index, self.job_embeddings_np, self.job_overlay
+        n = overlay.size
+        if n == 0:
+            return []
+        approx = overlay.scores(recall_index.scores(query), query)
+        shortlist_size = min(n, top_k * self.rescore_factor)
+        if shortlist_size < n:
+            shortlist = np.argpartition(-approx, shortlist_size - 1)[:shortlist_size]
+        else:
+            shortlist = np.arange(n)
+        
+        # 按行号排序后取向量，内存映射时顺序访问页面
+        shortlist = np.sort(shortlist)
+        vectors = overlay.take(job_matrix, shortlist)
+        norms = np.linalg.norm(vectors, axis=1)
+        norms[norms == 0] = 1
+        exact = vectors @ query / norms
+        order = np.argsort(-exact, kind='stable')[:top_k]
+        return self._row_indices(shortlist[order], overlay).tolist()
     
     def _get_student_embedding(self, student_id: str) -> Optional[np.ndarray]:
         """获取学生嵌入向量"""
-        if student_id in self.embeddings:
-            return self.embeddings[student_id]
-        # 尝试数字索引
-        try:
-            idx = int(student_id.replace('STU', '').replace('TEST', ''))
-            if idx in self.embeddings:
-                return self.embeddings[idx]
-        except:
-            pass
-        return None
+        return self.embeddings.get('student', student_id)
     
-    def _get_student_embedding_with_skills(self, student_id: str, skills: List[str] = None) -> Optional[torch.Tensor]:
+    def _get_student_embedding_with_skills(self, student_id: str, skills: List[str] = None) -> Optional[np.ndarray]:
         """
         获取学生嵌入向量，支持基于技能的回退生成
         
@@ -188,37 +456,19 @@ class HybridRecommender:
         # 1. 优先使用缓存的嵌入（训练数据中的学生）
         emb = self._get_student_embedding(student_id)
         if emb is not None:
-            if isinstance(emb, np.ndarray):
-                return torch.from_numpy(emb).float()
             return emb
         
         # 2. 基于技能聚合生成临时嵌入（冷启动用户）
         if skills:
-            try:
-                skill_embs = []
-                for sk in skills:
-                    # 技能可能以不同格式存储
-                    if sk in self.embeddings:
-                        emb = self.embeddings[sk]
-                        if isinstance(emb, torch.Tensor):
-                            skill_embs.append(emb.detach().clone())
-                        elif isinstance(emb, np.ndarray):
-                            skill_embs.append(torch.from_numpy(emb.copy()).float())
-                    elif f"skill_{sk}" in self.embeddings:
-                        emb = self.embeddings[f"skill_{sk}"]
-                        if isinstance(emb, torch.Tensor):
-                            skill_embs.append(emb.detach().clone())
-                        elif isinstance(emb, np.ndarray):
-                            skill_embs.append(torch.from_numpy(emb.copy()).float())
-                
-                if skill_embs:
-                    # 将技能嵌入堆叠并取平均
-                    stacked = torch.stack(skill_embs)
-                    avg_emb = torch.mean(stacked, dim=0)
-                    print(f"🎯 为 {student_id} 基于 {len(skill_embs)} 个技能生成临时嵌入")
-                    return avg_emb
-            except Exception as e:
-                print(f"⚠️ 技能嵌入生成失败: {e}")
+            if self.skill_index is not None:
+                skills = self.skill_index.resolve(skills)
+            # 技能可能以不同格式存储
+            rows = self.embeddings.rows.get('skill', {})
+            names = [sk if sk in rows else f"skill_{sk}" for sk in skills]
+            skill_embs, found = self.embeddings.gather('skill', names)
+            if found:
+                print(f"🎯 为 {student_id} 基于 {len(found)} 个技能生成临时嵌入")
+                return skill_embs.mean(axis=0)
         
         return None
     
@@ -228,7 +478,7 @@ class HybridRecommender:
         TODO: 可以通过Neo4j查询学生专业，然后匹配相关职位
         """
         # 简单实现：返回随机职位
-        indices = list(self.job_indices)
+        indices = np.concatenate([self.job_indices, self.job_overlay.tail_indices]).tolist()
         np.random.shuffle(indices)
         return indices[:top_k]
     
@@ -237,7 +487,7 @@ class HybridRecommender:
         self, 
         student_id: str, 
         candidate_jobs: List[int],
-        student_emb: Optional[torch.Tensor] = None
+        student_emb: Optional[np.ndarray] = None
     ) -> List[Tuple[int, float]]:
         """
         Layer 2: 基于深度学习模型的精排序
@@ -256,43 +506,38 @@ class HybridRecommender:
                 # 无嵌入时返回随机排序
                 return [(idx, 0.5) for idx in candidate_jobs]
         
-        if isinstance(student_emb, np.ndarray):
-            student_emb = torch.from_numpy(student_emb).float()
+        if isinstance(student_emb, torch.Tensor):
+            student_emb = student_emb.detach().cpu().numpy()
+        
+        # 一次性取出全部候选的Job嵌入（不存在的Job用零向量）
+        overlay = self.job_overlay
+        rows, found = self._job_rows(candidate_jobs, overlay)
+        job_embs = np.zeros((len(candidate_jobs), self.embedding_dim), dtype=np.float32)
+        if found.any():
+            job_embs[found] = overlay.take(self.job_embeddings_np, rows[found])
         
         # 批量预测
         scores = []
         batch_size = 128
+        student_tensor = torch.from_numpy(np.asarray(student_emb, dtype=np.float32))
         
         with torch.no_grad():
             for i in range(0, len(candidate_jobs), batch_size):
                 batch_jobs = candidate_jobs[i:i+batch_size]
-                
-                # 获取Job嵌入
-                job_embs = []
-                for job_idx in batch_jobs:
-                    job_id = self.job_mapping.get(job_idx, str(job_idx))
-                    if job_id in self.embeddings:
-                        job_embs.append(self.embeddings[job_id])
-                    elif job_idx < len(self.job_embeddings_np):
-                        job_embs.append(torch.from_numpy(self.job_embeddings_np[job_idx]))
-                    else:
-                        job_embs.append(torch.zeros(self.embedding_dim))
-                
-                job_embs = torch.stack([e if isinstance(e, torch.Tensor) else torch.from_numpy(e) 
-                                        for e in job_embs]).float()
+                batch_embs = torch.from_numpy(job_embs[i:i+batch_size])
                 
                 # 构建边索引 (student -> jobs)
-                student_embs = student_emb.unsqueeze(0).expand(len(batch_jobs), -1)
+                student_embs = student_tensor.unsqueeze(0).expand(len(batch_jobs), -1)
                 
                 # 拼接特征并预测
-                combined = torch.cat([student_embs, job_embs], dim=-1)
+                combined = torch.cat([student_embs, batch_embs], dim=-1)
                 
                 # 使用predictor的线性层
                 if hasattr(self.predictor, 'lin'):
                     batch_scores = torch.sigmoid(self.predictor.lin(combined)).squeeze()
                 else:
                     # 简单的点积相似度
-                    batch_scores = torch.sum(student_embs * job_embs, dim=-1)
+                    batch_scores = torch.sum(student_embs * batch_embs, dim=-1)
                     batch_scores = torch.sigmoid(batch_scores)
                 
                 if batch_scores.dim() == 0:
@@ -615,7 +860,7 @@ class HybridRecommender:
         print(f"{'='*50}")
         
         # Layer 1: 召回
-        recall_k = min(500, len(self.job_indices))
+        recall_k = min(500, self.job_overlay.size)
         print(f"📥 Layer 1: 向量相似度召回 (Top-{recall_k})...")
         candidates = self.recall(student_id, recall_k, all_skills)
         print(f"   召回候选: {len(candidates)} 个职位")
@@ -637,83 +882,55 @@ class HybridRecommender:
         if ranked:
             print(f"   精排完成: Top score = {ranked[0][1]:.4f}")
         
-        # Layer 2.5: 规则加权（学历匹配、期望职业匹配）
+        # Layer 2.5: 规则加权（学历匹配、期望职业匹配），对全部候选一次性计算
         print(f"📐 Layer 2.5: 规则加权...")
-        weighted_results = []
+        job_indices = [job_idx for job_idx, _ in ranked]
+        job_ids = [self.job_mapping.get(job_idx, str(job_idx)) for job_idx in job_indices]
+        deep_scores = np.array([score for _, score in ranked], dtype=np.float64)
+        
+        features = self._get_job_features()
+        if features is not None:
+            rows, found = self._job_rows(job_indices)
+            rows = np.where(found, rows, features.size)  # 不在表中的职位视为无信息
+        else:
+            features = self._query_job_features(job_ids)
+            rows = np.arange(len(job_ids))
         
-        for job_idx, deep_score in ranked:
-            job_id = self.job_mapping.get(job_idx, str(job_idx))
-            
-            # 查询职位信息
-            job_info = self._get_job_info_for_matching(job_id)
-            job_title = job_info.get('title', '')
-            job_edu = job_info.get('education', '')
-            
-            # 学历加权（AI模式：降低强度，鼓励探索）
-            edu_boost = 1.0
-            if education and job_edu:
-                edu_match = self._calculate_education_match(education, job_edu)
-                if edu_match == 'perfect':  # 完全匹配
-                    edu_boost = 1.3  # 原1.3
-                elif edu_match == 'compatible':  # 兼容（学历>=要求 或 不限）
-                    edu_boost = 1.1  # 原1.1
-                else:  # 不匹配（学历<要求）
-                    edu_boost = 0.7  # 原0.7，降低惩罚鼓励探索
-            
-            # 期望职业加权（AI模式：弱化锚定，探索新机会）
-            position_boost = 1.0
-            if expected_position and job_title:
-                position_match = self._calculate_position_match(expected_position, job_title)
-                if position_match >= 0.8:  # 高度匹配
-                    position_boost = 1.4  # 原1.5
-                elif position_match >= 0.5:  # 部分匹配
-                    position_boost = 1.3  # 原1.2
-                elif position_match >= 0.3:  # 轻微相关
-                    position_boost = 1.1  # 原1.1
-            
-            # 计算加权得分
-            final_score = deep_score * edu_boost * position_boost
-            
-            weighted_results.append({
-                'job_idx': job_idx,
-                'job_id': job_id,
-                'deep_score': deep_score,
-                'final_score': final_score,
-                'edu_boost': edu_boost,
-                'position_boost': position_boost,
-                'job_title': job_title,
-                'job_edu': job_edu
-            })
-        
-        # 按加权后的分数重新排序
-        weighted_results.sort(key=lambda x: x['final_score'], reverse=True)
+        edu_boosts = features.edu_boost(rows, education)
+        position_boosts = features.position_boost(rows, expected_position)
+        final_scores = deep_scores * edu_boosts * position_boosts
+        
+        # 按加权后的分数重新排序（稳定排序，同分保持精排顺序）
+        order = np.argsort(-final_scores, kind='stable')[:top_k]
         
         # 构建最终结果
         results = []
-        for item in weighted_results[:top_k]:
-            job_id = item['job_id']
+        for i in order:
+            job_id = job_ids[i]
+            job_title = features.title(int(rows[i]))
+            job_edu = features.education(int(rows[i]))
             
             # 查询匹配的技能
             skill_info = self._query_skill_overlap(student_id, job_id)
             matched_skills = skill_info.get('matched_skills', [])
             
             explanation = self._generate_dl_explanation_v2(
-                item['deep_score'], 
-                item['edu_boost'], 
-                item['position_boost'],
+                float(deep_scores[i]), 
+                float(edu_boosts[i]), 
+                float(position_boosts[i]),
                 matched_skills,
                 education,
-                item['job_edu'],
+                job_edu,
                 expected_position,
-                item['job_title']
+                job_title
             )
             
             results.append(RecommendationResult(
                 job_id=job_id,
-                final_score=item['final_score'],
-                deep_score=item['deep_score'],
-                skill_score=item['position_boost'] - 1.0,  # 用于展示期望职业匹配度
-                rule_score=item['edu_boost'] - 1.0,  # 用于展示学历匹配度
+                final_score=float(final_scores[i]),
+                deep_score=float(deep_scores[i]),
+                skill_score=float(position_boosts[i]) - 1.0,  # 用于展示期望职业匹配度
+                rule_score=float(edu_boosts[i]) - 1.0,  # 用于展示学历匹配度
                 matched_skills=matched_skills,
                 explanation=explanation
             ))
@@ -744,8 +961,13 @@ class HybridRecommender:
         return "AI推荐理由：" + "，".join(reasons)
     
     def _get_course_skills(self, courses: List[str]) -> List[str]:
-        """从 Neo4j 查询课程所教授的技能"""
-        if not courses or not self.driver:
+        """课程所教授的技能：优先使用内存中的课程技能映射，未加载时查询 Neo4j"""
+        if not courses:
+            return []
+        index = self.course_skill_index
+        if index is not None and index.loaded:
+            return list(index.skills_for(courses))
+        if not self.driver:
             return []
         
         try:
@@ -763,101 +985,38 @@ class HybridRecommender:
             print(f"⚠️ 查询课程技能失败: {e}")
             return []
     
-    def _get_job_info_for_matching(self, job_id: str) -> dict:
-        """获取职位的标题和学历要求"""
-        if not self.driver:
-            return {}
-        
-        try:
-            with self.driver.session() as session:
-                query = """
-                MATCH (j:Job)
-                WHERE j.url = $job_id OR j.url ENDS WITH $job_id
-                RETURN j.title as title, j.education as education
-                LIMIT 1
-                """
-                result = session.run(query, job_id=job_id)
-                record = result.single()
-                if record:
-                    return {
-                        'title': record['title'] or '',
-                        'education': record['education'] or ''
-                    }
-        except Exception as e:
-            print(f"⚠️ 查询职位信息失败: {e}")
-        
-        return {'title': '', 'education': ''}
-    
-    def _calculate_education_match(self, user_edu: str, job_edu: str) -> str:
-        """计算学历匹配程度"""
-        # 学历等级映射
-        edu_levels = {
-            '高中': 1, '中专': 1, '中技': 1,
-            '大专': 2, '专科': 2,
-            '本科': 3, '学士': 3,
-            '硕士': 4, '研究生': 4,
-            '博士': 5,
-            '不限': 0, '无要求': 0, '': 0
-        }
-        
-        user_level = edu_levels.get(user_edu, 3)  # 默认本科
-        job_level = edu_levels.get(job_edu, 0)  # 默认不限
-        
-        if job_level == 0:  # 不限
-            return 'compatible'
-        elif user_level == job_level:  # 完全匹配
-            return 'perfect'
-        elif user_level >= job_level:  # 学历高于要求
-            return 'compatible'
-        else:  # 学历低于要求
-            return 'mismatch'
+    def _get_job_features(self) -> Optional[JobFeatureTable]:
+        """规则特征表（首次调用时加载全部职位的标题与学历要求，失败时返回 None 下次重试）"""
+        if self.job_features is not None or not self.driver:
+            return self.job_features
+        with self._job_features_lock:
+            if self.job_features is None:
+                try:
+                    start = time.time()
+                    with self.driver.session() as session:
+                        result = session.run(JOB_FEATURE_QUERY)
+                        self.job_features = JobFeatureTable.from_records(
+                            result, self.job_id_to_row, self.job_overlay.size)
+                    print(f"📋 职位规则特征表加载完成: {self.job_features.size} 行 "
+                          f"({(time.time() - start) * 1000:.0f}ms)")
+                except Exception as e:
+                    print(f"⚠️ 职位规则特征表加载失败: {e}")
+        return self.job_features
     
-    def _calculate_position_match(self, expected: str, job_title: str) -> float:
-        """计算期望职业与职位标题的匹配度"""
-        if not expected or not job_title:
-            return 0.0
-        
-        expected = expected.lower()
-        job_title = job_title.lower()
-        
-        # 完全包含
-        if expected in job_title or job_title in expected:
-            return 1.0
-        
-        # 关键词匹配
-        # 定义职位关键词映射
-        position_keywords = {
-            '前端': ['前端', 'frontend', 'web', 'vue', 'react', 'javascript', 'js', 'css', 'html', 'h5'],
-            '后端': ['后端', 'backend', 'java', 'python', 'go', 'golang', 'php', 'node', 'spring', 'django'],
-            '全栈': ['全栈', 'fullstack', '全端'],
-            '算法': ['算法', 'algorithm', 'ai', '人工智能', '机器学习', 'ml', 'deep learning', 'dl', '深度学习'],
-            '数据': ['数据', 'data', '大数据', 'hadoop', 'spark', 'etl', '数仓', 'bi', '分析'],
-            '测试': ['测试', 'test', 'qa', 'quality'],
-            '运维': ['运维', 'devops', 'sre', 'ops', '云', 'cloud'],
-            '产品': ['产品', 'product', 'pm'],
-            '设计': ['设计', 'design', 'ui', 'ux', '交互'],
-            'android': ['android', '安卓', 'kotlin'],
-            'ios': ['ios', 'swift', 'objective-c', 'oc'],
-            '嵌入式': ['嵌入式', 'embedded', '单片机', 'mcu', 'stm32', 'arm'],
-            '游戏': ['游戏', 'game', 'unity', 'unreal', 'u3d', 'ue4'],
-        }
-        
-        # 找到期望职业对应的关键词列表
-        expected_keywords = []
-        for category, keywords in position_keywords.items():
-            if any(kw in expected for kw in keywords):
-                expected_keywords.extend(keywords)
-        
-        if not expected_keywords:
-            # 使用原始期望职业作为关键词
-            expected_keywords = expected.split()
-        
-        # 计算匹配度
-        match_count = sum(1 for kw in expected_keywords if kw in job_title)
-        if match_count > 0:
-            return min(match_count / len(expected_keywords), 1.0)
-        
-        return 0.0
+    def _query_job_features(self, job_ids: List[str]) -> JobFeatureTable:
+        """特征表不可用时，为候选职位批量查询一次标题与学历要求"""
+        records = []
+        if self.driver and job_ids:
+            try:
+                with self.driver.session() as session:
+                    result = session.run("""
+                        MATCH (j:Job) WHERE j.url IN $job_ids
+                        RETURN j.url AS id, j.title AS title, j.education AS education
+                    """, job_ids=job_ids)
+                    records = [record.data() for record in result]
+            except Exception as e:
+                print(f"⚠️ 查询职位信息失败: {e}")
+        return JobFeatureTable.from_records(records, {job_id: i for i, job_id in enumerate(job_ids)}, len(job_ids))
     
     def _generate_dl_explanation_v2(
         self, 
@@ -972,10 +1131,13 @@ def create_recommender_from_trained_model(
     data_path: str = 'graph_data.pt',
     neo4j_uri: str = 'bolt://localhost:7687',
     neo4j_user: str = 'neo4j',
-    neo4j_password: str = 'TYH041113'
+    neo4j_password: str = 'TYH041113',
+    recall_precision: str = 'float32',
+    driver=None
 ) -> HybridRecommender:
     """
     从训练好的模型创建混合推荐器
+    - driver 可传入服务共用的驱动/连接管理器（提供 session()），为空时自行创建
     """
     from model import RecommenderModel
     
@@ -994,43 +1156,43 @@ def create_recommender_from_trained_model(
     with torch.no_grad():
         x_dict = model.encoder(data.x_dict, data.edge_index_dict)
     
-    # 构建嵌入字典
-    node_embeddings = {}
+    # 构建嵌入存储（每种节点一个连续矩阵，行顺序与节点索引一致）
+    node_embeddings = EmbeddingStore(32)
     
     # Student嵌入
-    student_map = data['student'].node_map
-    for stu_id, idx in student_map.items():
-        node_embeddings[stu_id] = x_dict['student'][idx]
-    print(f"   Student嵌入: {len(student_map)} 个")
+    student_index, student_ids = ordered_node_map(data['student'].node_map)
+    node_embeddings.add('student', x_dict['student'][torch.from_numpy(student_index)].cpu().numpy(), student_ids)
+    print(f"   Student嵌入: {len(student_ids)} 个")
     
     # Job嵌入
     job_map = data['job'].node_map
-    for job_id, idx in job_map.items():
-        node_embeddings[job_id] = x_dict['job'][idx]
-    print(f"   Job嵌入: {len(job_map)} 个")
+    job_index, job_ids = ordered_node_map(job_map)
+    node_embeddings.add('job', x_dict['job'][torch.from_numpy(job_index)].cpu().numpy(), job_ids)
+    print(f"   Job嵌入: {len(job_ids)} 个")
     
     # 构建Job索引映射
     job_mapping = {idx: job_id for job_id, idx in job_map.items()}
     
     # 先连接Neo4j（用于查询技能列表）
-    print("🔌 连接Neo4j...")
-    driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+    if driver is None:
+        print("🔌 连接Neo4j...")
+        driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
     
     # Skill嵌入（关键：用于冷启动用户的嵌入生成）
-    # 从 Neo4j 查询所有技能名称，按字母顺序与 data_loader 中的 skill_encoder 对应
+    # 优先使用图数据中保存的技能词表（增量快照追加的技能不再按字母序）；
+    # 旧版图数据则从 Neo4j 查询所有技能名称，按字母顺序与 data_loader 中的 skill_encoder 对应
     try:
-        with driver.session() as session:
-            result = session.run("MATCH (s:Skill) RETURN s.name AS name ORDER BY s.name")
-            skill_names = [record["name"] for record in result]
+        if hasattr(data, 'vocab'):
+            skill_names = list(data.vocab['skill'])
+        else:
+            with driver.session() as session:
+                result = session.run("MATCH (s:Skill) RETURN s.name AS name ORDER BY s.name")
+                skill_names = [record["name"] for record in result]
         
         if 'skill' in x_dict and skill_names:
-            skill_embs = x_dict['skill']
             # 加载能匹配到的技能嵌入（允许少量数量差异）
-            loaded_count = 0
-            for i, skill_name in enumerate(skill_names):
-                if i < skill_embs.shape[0]:
-                    node_embeddings[skill_name] = skill_embs[i]
-                    loaded_count += 1
+            loaded_count = min(len(skill_names), x_dict['skill'].shape[0])
+            node_embeddings.add('skill', x_dict['skill'][:loaded_count].cpu().numpy(), skill_names[:loaded_count])
             print(f"   Skill嵌入: {loaded_count} 个 (Neo4j有{len(skill_names)}个)")
     except Exception as e:
         print(f"   ⚠️ Skill嵌入加载失败: {e}")
@@ -1041,9 +1203,18 @@ def create_recommender_from_trained_model(
         link_predictor=model.predictor,
         neo4j_driver=driver,
         job_mapping=job_mapping,
-        embedding_dim=32
+        embedding_dim=32,
+        job_index=job_index,
+        recall_precision=recall_precision
     )
     
+    # 新职位的归纳式编码（旧版图数据缺少词表时不可用）
+    try:
+        from inductive_encoder import InductiveJobEncoder
+        recommender.job_encoder = InductiveJobEncoder(model.encoder, data)
+    except Exception as e:
+        print(f"   ⚠️ 归纳式编码器不可用: {e}")
+    
     return recommender
 
 
@@ -0,0 +1,163 @@
+"""
+新职位的归纳式嵌入
+==================
+GraphSAGE 是归纳式模型：新节点只要有特征和邻居，就可以直接用训练好的编码器得到嵌入。
+这里只在目标职位的 k 跳入邻域上执行编码器（k = 卷积层数）：
+- 第 l 层只保留指向“第 l 层需要输出的节点”的边，逐层向外扩展
+- 每种边类型都传入（可能为空的）边集，保证 SAGEConv 的根节点项与偏置和整图前向一致
+因此得到的嵌入与“把该职位加入全图后整图前向”的结果相同；
+新职位对其他节点嵌入的影响（需要整图重算）不在此处更新。
+"""
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+# 职位更新时需要替换的边（其余边类型保持图中原样，如 applies）
+JOB_ATTR_EDGES = {
+    ('job', 'to', 'skill'), ('skill', 'to', 'job'),
+    ('job', 'to', 'city'), ('city', 'to', 'job'),
+}
+
+
+def _csr_by_dst(edge_index, num_dst):
+    """按目标节点排序的 CSR: (ptr, src)"""
+    src, dst = edge_index
+    order = np.argsort(dst, kind='stable')
+    counts = np.bincount(dst, minlength=num_dst)
+    ptr = np.zeros(num_dst + 1, dtype=np.int64)
+    np.cumsum(counts, out=ptr[1:])
+    return ptr, src[order]
+
+
+def _gather(ptr, col, nodes):
+    """取 nodes 的全部入边，返回 (src, dst)"""
+    starts = ptr[nodes]
+    counts = ptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    # 每条边在 col 中的位置 = 所属节点起点 + 组内偏移
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return col[np.repeat(starts, counts) + offsets], np.repeat(nodes, counts)
+
+
+class InductiveJobEncoder:
+    """
+    对单个新增/修改的职位执行局部前向
+
+    Args:
+        encoder: 训练好的 JobRecGraphSAGE
+        data: 训练所用的 HeteroData（需包含 data_loader 保存的 vocab / salary_range）
+    """
+
+    def __init__(self, encoder, data):
+        if not hasattr(data, 'vocab'):
+            raise ValueError("图数据缺少词表信息，请用新版 data_loader 重新构建")
+        self.encoder = encoder.eval()
+        self.layers = [encoder.conv1, encoder.conv2]
+        self.x = {t: data[t].x.detach().cpu() for t in data.node_types}
+        self.num_nodes = {t: int(data[t].num_nodes) for t in data.node_types}
+        self.edge_types = list(data.edge_types)
+        self.in_csr = {
+            et: _csr_by_dst(data[et].edge_index.cpu().numpy(), self.num_nodes[et[2]])
+            for et in self.edge_types
+        }
+        self.job_map = data['job'].node_map
+        self.skill_vocab = {v: i for i, v in enumerate(data.vocab['skill'])}
+        self.city_vocab = {v: i for i, v in enumerate(data.vocab['city'])}
+        self.edu_vocab = {v: i for i, v in enumerate(data.vocab['edu'])}
+        self.salary_range = data.salary_range
+
+    def job_features(self, job):
+        """与 data_loader 一致的职位特征 [归一化薪资, 学历编码]"""
+        salary = [v if v is not None else 0.0 for v in (job.get('salary_min'), job.get('salary_max'))]
+        lo, hi = self.salary_range
+        salary_norm = ((float(salary[0]) + float(salary[1])) / 2 - lo) / (hi - lo if hi > lo else 1.0)
+        edu = self.edu_vocab.get(job.get('education') or '不限', self.edu_vocab.get('不限', 0))
+        return torch.tensor([salary_norm, edu], dtype=torch.float32)
+
+    @torch.no_grad()
+    def encode(self, job):
+        """
+        计算职位嵌入
+
+        Args:
+            job: {'id', 'salary_min', 'salary_max', 'education', 'city', 'skills'}
+
+        Returns:
+            (embedding_dim,) 的 numpy 向量
+        """
+        target = self.job_map.get(job['id'], self.num_nodes['job'])
+        skills = np.array(sorted({self.skill_vocab[s] for s in job.get('skills') or [] if s in self.skill_vocab}),
+                          dtype=np.int64)
+        city = self.city_vocab.get(job.get('city'))
+        cities = np.array([city] if city is not None else [], dtype=np.int64)
+
+        # 目标职位的新边（训练时未见过的技能/城市无法编码，直接忽略）
+        extra = {
+            ('job', 'to', 'skill'): (np.full(len(skills), target), skills),
+            ('skill', 'to', 'job'): (skills, np.full(len(skills), target)),
+            ('job', 'to', 'city'): (np.full(len(cities), target), cities),
+            ('city', 'to', 'job'): (cities, np.full(len(cities), target)),
+        }
+
+        # 自顶向下确定每层需要输出的节点与所需的边
+        need = {'job': np.array([target], dtype=np.int64)}
+        layer_edges = [None] * len(self.layers)
+        for layer in reversed(range(len(self.layers))):
+            edges = {}
+            next_need = dict(need)
+            for et in self.edge_types:
+                src_t, _, dst_t = et
+                dst_nodes = need.get(dst_t)
+                if dst_nodes is None or not len(dst_nodes):
+                    continue
+                src, dst = self._in_edges(et, dst_nodes, target, extra)
+                edges[et] = (src, dst)
+                next_need[src_t] = np.union1d(next_need.get(src_t, np.empty(0, dtype=np.int64)), src)
+            layer_edges[layer] = edges
+            need = next_need
+
+        # 子图局部编号
+        x_sub = {}
+        for t, x in self.x.items():
+            nodes = need.get(t, np.empty(0, dtype=np.int64))
+            real = nodes[nodes < self.num_nodes[t]]
+            x_sub[t] = x[torch.from_numpy(real)]
+            if t == 'job':
+                if len(real) < len(nodes):
+                    x_sub[t] = torch.cat([x_sub[t], x.new_zeros((1, x.size(1)))])
+                x_sub[t][int(np.searchsorted(nodes, target))] = self.job_features(job)
+
+        def local(t, ids):
+            return np.searchsorted(need[t], ids)
+
+        h = x_sub
+        for i, conv in enumerate(self.layers):
+            edge_index_dict = {}
+            for et in self.edge_types:
+                src, dst = layer_edges[i].get(et, (np.empty(0, dtype=np.int64),) * 2)
+                if len(src):
+                    edge_index_dict[et] = torch.from_numpy(
+                        np.stack([local(et[0], src), local(et[2], dst)]).astype(np.int64))
+                else:
+                    edge_index_dict[et] = torch.empty((2, 0), dtype=torch.long)
+            h = conv(h, edge_index_dict)
+            if i < len(self.layers) - 1:
+                h = {k: F.relu(v) for k, v in h.items()}
+
+        return h['job'][int(local('job', target))].cpu().numpy()
+
+    def _in_edges(self, et, dst_nodes, target, extra):
+        ptr, col = self.in_csr[et]
+        src, dst = _gather(ptr, col, dst_nodes[dst_nodes < len(ptr) - 1])
+        if et in JOB_ATTR_EDGES:
+            # 删除目标职位原有的技能/城市边，换成最新的
+            keep = (src != target) if et[0] == 'job' else (dst != target)
+            src, dst = src[keep], dst[keep]
+            extra_src, extra_dst = extra[et]
+            mask = np.isin(extra_dst, dst_nodes)
+            src = np.concatenate([src, extra_src[mask]]).astype(np.int64)
+            dst = np.concatenate([dst, extra_dst[mask]]).astype(np.int64)
+        return src, dst
@@ -0,0 +1,236 @@
+"""
+职位规则特征表（AI 推荐 Layer 2.5 的学历 / 期望职业加权）
+======================================================
+按职位向量表的行号存放:
+- edu_code:    学历要求编码（指向 edu_values，-1 表示为空）
+- keyword_bits: 职位标题命中 POSITION_KEYWORDS 中各关键词的位图（按行 packbits）
+- titles:      原始职位标题（解释文案与完全包含判断使用）
+整表只构建一次，候选集的加权系数用数组运算一次算出，不再逐个职位查询 Neo4j、逐个扫描关键词。
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 学历等级映射（0 表示不限）
+EDU_LEVELS = {
+    '高中': 1, '中专': 1, '中技': 1,
+    '大专': 2, '专科': 2,
+    '本科': 3, '学士': 3,
+    '硕士': 4, '研究生': 4,
+    '博士': 5,
+    '不限': 0, '无要求': 0, '': 0
+}
+
+# 职位类别 -> 关键词
+POSITION_KEYWORDS = {
+    '前端': ['前端', 'frontend', 'web', 'vue', 'react', 'javascript', 'js', 'css', 'html', 'h5'],
+    '后端': ['后端', 'backend', 'java', 'python', 'go', 'golang', 'php', 'node', 'spring', 'django'],
+    '全栈': ['全栈', 'fullstack', '全端'],
+    '算法': ['算法', 'algorithm', 'ai', '人工智能', '机器学习', 'ml', 'deep learning', 'dl', '深度学习'],
+    '数据': ['数据', 'data', '大数据', 'hadoop', 'spark', 'etl', '数仓', 'bi', '分析'],
+    '测试': ['测试', 'test', 'qa', 'quality'],
+    '运维': ['运维', 'devops', 'sre', 'ops', '云', 'cloud'],
+    '产品': ['产品', 'product', 'pm'],
+    '设计': ['设计', 'design', 'ui', 'ux', '交互'],
+    'android': ['android', '安卓', 'kotlin'],
+    'ios': ['ios', 'swift', 'objective-c', 'oc'],
+    '嵌入式': ['嵌入式', 'embedded', '单片机', 'mcu', 'stm32', 'arm'],
+    '游戏': ['游戏', 'game', 'unity', 'unreal', 'u3d', 'ue4'],
+}
+
+# 位图的列顺序
+KEYWORDS = sorted({kw for keywords in POSITION_KEYWORDS.values() for kw in keywords})
+KEYWORD_COLUMN = {kw: i for i, kw in enumerate(KEYWORDS)}
+
+# 加权系数（AI模式：降低强度，鼓励探索）
+EDU_BOOST = {'perfect': 1.3, 'compatible': 1.1, 'mismatch': 0.7}
+# (匹配度下限, 系数)，从高到低
+POSITION_BOOST = ((0.8, 1.4), (0.5, 1.3), (0.3, 1.1))
+
+JOB_FEATURE_QUERY = """
+MATCH (j:Job)
+RETURN j.url AS id, j.title AS title, j.education AS education
+"""
+
+
+def education_match(user_edu: str, job_edu: str) -> str:
+    """计算学历匹配程度（单个职位）"""
+    user_level = EDU_LEVELS.get(user_edu, 3)  # 默认本科
+    job_level = EDU_LEVELS.get(job_edu, 0)  # 默认不限
+
+    if job_level == 0:  # 不限
+        return 'compatible'
+    elif user_level == job_level:  # 完全匹配
+        return 'perfect'
+    elif user_level >= job_level:  # 学历高于要求
+        return 'compatible'
+    else:  # 学历低于要求
+        return 'mismatch'
+
+
+def expected_keywords(expected: str) -> Tuple[List[str], bool]:
+    """
+    期望职业 -> (关键词列表, 是否全部来自 POSITION_KEYWORDS)
+    命中多个类别时关键词按类别依次拼接（重复关键词重复计数）
+    """
+    keywords = []
+    for category_keywords in POSITION_KEYWORDS.values():
+        if any(kw in expected for kw in category_keywords):
+            keywords.extend(category_keywords)
+    if keywords:
+        return keywords, True
+    # 使用原始期望职业作为关键词
+    return expected.split(), False
+
+
+def position_match(expected: str, job_title: str) -> float:
+    """计算期望职业与职位标题的匹配度（单个职位）"""
+    if not expected or not job_title:
+        return 0.0
+
+    expected = expected.lower()
+    job_title = job_title.lower()
+
+    # 完全包含
+    if expected in job_title or job_title in expected:
+        return 1.0
+
+    keywords, _ = expected_keywords(expected)
+    match_count = sum(1 for kw in keywords if kw in job_title)
+    if match_count > 0:
+        return min(match_count / len(keywords), 1.0)
+    return 0.0
+
+
+def _keyword_bits(titles: Iterable[str]) -> np.ndarray:
+    """标题 -> (n, ceil(len(KEYWORDS)/8)) 位图"""
+    titles = [t.lower() for t in titles]
+    hits = np.zeros((len(titles), len(KEYWORDS)), dtype=bool)
+    for col, kw in enumerate(KEYWORDS):
+        hits[:, col] = [kw in t for t in titles]
+    return np.packbits(hits, axis=1)
+
+
+class JobFeatureTable:
+    """
+    按职位向量表行号组织的规则特征
+
+    Args:
+        size: 初始行数（行号与 HybridRecommender 的职位向量表一致，含 JobOverlay 追加的行）
+    """
+
+    def __init__(self, size: int = 0):
+        self.size = size
+        self.titles: List[str] = [''] * size
+        self.edu_values: List[str] = ['']
+        self._edu_lookup: Dict[str, int] = {'': 0}
+        self.edu_code = np.full(size, -1, dtype=np.int16)
+        self.keyword_bits = np.zeros((size, (len(KEYWORDS) + 7) // 8), dtype=np.uint8)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict], job_rows, size: int) -> 'JobFeatureTable':
+        """由 {'id', 'title', 'education'} 记录构建，job_rows: Job ID -> 行号"""
+        table = cls(size)
+        rows, titles, educations = [], [], []
+        for record in records:
+            row = job_rows.get(record['id'])
+            if row is not None and row < size:
+                rows.append(row)
+                titles.append(record.get('title') or '')
+                educations.append(record.get('education') or '')
+        table.set_rows(rows, titles, educations)
+        return table
+
+    def _edu_index(self, edu: str) -> int:
+        code = self._edu_lookup.get(edu)
+        if code is None:
+            code = self._edu_lookup[edu] = len(self.edu_values)
+            self.edu_values.append(edu)
+        return code
+
+    def set_rows(self, rows: List[int], titles: List[str], educations: List[str]) -> None:
+        """写入/追加若干行（在线更新的职位）；行号超出当前大小时扩容"""
+        if not rows:
+            return
+        with self._lock:
+            size = max(self.size, max(rows) + 1)
+            if size > len(self.edu_code):
+                capacity = max(size, 2 * len(self.edu_code))
+                edu_code = np.full(capacity, -1, dtype=np.int16)
+                edu_code[:self.size] = self.edu_code[:self.size]
+                keyword_bits = np.zeros((capacity, self.keyword_bits.shape[1]), dtype=np.uint8)
+                keyword_bits[:self.size] = self.keyword_bits[:self.size]
+                self.edu_code, self.keyword_bits = edu_code, keyword_bits
+                self.titles.extend([''] * (size - len(self.titles)))
+
+            index = np.asarray(rows, dtype=np.int64)
+            self.edu_code[index] = [self._edu_index(edu) if edu else -1 for edu in educations]
+            self.keyword_bits[index] = _keyword_bits(titles)
+            for row, title in zip(rows, titles):
+                self.titles[row] = title
+            self.size = size
+
+    def title(self, row: int) -> str:
+        return self.titles[row] if row < self.size else ''
+
+    def education(self, row: int) -> str:
+        code = int(self.edu_code[row]) if row < self.size else -1
+        return self.edu_values[code] if code >= 0 else ''
+
+    def edu_boost(self, rows: np.ndarray, education: Optional[str]) -> np.ndarray:
+        """学历加权系数；职位学历为空或用户未填学历时为 1.0"""
+        boost = np.ones(len(rows), dtype=np.float64)
+        if not education:
+            return boost
+        valid = rows < self.size
+        codes = np.full(len(rows), -1, dtype=np.int16)
+        codes[valid] = self.edu_code[rows[valid]]
+        levels = np.array([EDU_LEVELS.get(v, 0) for v in self.edu_values], dtype=np.int16)
+        job_level = levels[np.maximum(codes, 0)]
+        user_level = EDU_LEVELS.get(education, 3)
+
+        has = codes >= 0
+        perfect = has & (job_level != 0) & (job_level == user_level)
+        compatible = has & ~perfect & ((job_level == 0) | (user_level >= job_level))
+        mismatch = has & ~perfect & ~compatible
+        boost[perfect] = EDU_BOOST['perfect']
+        boost[compatible] = EDU_BOOST['compatible']
+        boost[mismatch] = EDU_BOOST['mismatch']
+        return boost
+
+    def position_scores(self, rows: np.ndarray, expected: Optional[str]) -> np.ndarray:
+        """期望职业匹配度，与 position_match 逐个计算的结果一致"""
+        scores = np.zeros(len(rows), dtype=np.float64)
+        if not expected:
+            return scores
+        expected = expected.lower()
+        titles = [self.title(int(row)).lower() for row in rows]
+        has_title = np.fromiter((bool(t) for t in titles), dtype=bool, count=len(titles))
+        contains = np.fromiter((bool(t) and (expected in t or t in expected) for t in titles),
+                               dtype=bool, count=len(titles))
+
+        keywords, precompiled = expected_keywords(expected)
+        if keywords and precompiled:
+            valid = rows < self.size
+            bits = np.zeros((len(rows), self.keyword_bits.shape[1]), dtype=np.uint8)
+            bits[valid] = self.keyword_bits[rows[valid]]
+            hits = np.unpackbits(bits, axis=1, count=len(KEYWORDS))
+            counts = hits[:, [KEYWORD_COLUMN[kw] for kw in keywords]].sum(axis=1)
+        elif keywords:
+            counts = np.array([sum(kw in t for kw in keywords) for t in titles], dtype=np.int64)
+        else:
+            counts = np.zeros(len(rows), dtype=np.int64)
+
+        if keywords:
+            scores = np.minimum(counts / len(keywords), 1.0)
+        scores[contains] = 1.0
+        scores[~has_title] = 0.0
+        return scores
+
+    def position_boost(self, rows: np.ndarray, expected: Optional[str]) -> np.ndarray:
+        """期望职业加权系数（AI模式：弱化锚定，探索新机会）"""
+        scores = self.position_scores(rows, expected)
+        conditions = [scores >= threshold for threshold, _ in POSITION_BOOST]
+        return np.select(conditions, [boost for _, boost in POSITION_BOOST], default=1.0)
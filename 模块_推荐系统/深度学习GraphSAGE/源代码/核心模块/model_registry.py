@@ -0,0 +1,182 @@
+"""
+模型注册表（嵌入包版本的热切换与回滚）
+====================================
+- 新版本在后台线程中加载并预热，完成后用一次引用赋值替换当前推荐器，
+  切换期间请求继续由旧推荐器处理，不中断服务
+- 激活 / 回滚都会写嵌入包目录的 CURRENT 指针；同一目录下的其他 worker 轮询到变化后各自加载同一版本
+- 每个版本的矩阵都是内存映射，新旧版本短暂共存时只多占用页缓存
+
+用法:
+    registry = ModelRegistry(bundle_dir, on_swap=..., driver=driver)
+    registry.load_current()        # 启动时同步加载 CURRENT
+    registry.start()               # 后台轮询 CURRENT
+    registry.activate('v20260119_153000')
+    registry.rollback()
+"""
+import os
+import time
+import threading
+from datetime import datetime
+
+from embedding_bundle import (
+    activate_version, create_recommender_from_bundle, current_version, list_versions,
+)
+
+
+class ModelRegistry:
+    """
+    Args:
+        bundle_dir: 嵌入包根目录
+        on_swap: 新推荐器就绪后的回调（调用方在其中替换全局引用）
+        driver: 复用的 Neo4j 驱动，新旧推荐器共用，切换时不关闭
+        interval: CURRENT 指针的轮询间隔（秒）
+        recall_precision: 召回向量精度（float32 / float16 / int8）
+    """
+
+    def __init__(self, bundle_dir, on_swap=None, driver=None, interval=5.0, recall_precision='float32'):
+        self.bundle_dir = bundle_dir
+        self.on_swap = on_swap
+        self.driver = driver
+        self.interval = interval
+        self.recall_precision = recall_precision
+        self.active = None
+        self.version = None
+        self.activated_at = None
+        self.history = []          # 回滚栈：正向切换时压入被替换的版本，回滚时弹出
+        self.loading = None        # 正在后台加载的版本
+        self.last_error = None
+        self.failed_version = None  # 加载失败的版本，轮询时不再自动重试
+        self._load_lock = threading.Lock()
+
+    # ==================== 加载与切换 ====================
+
+    def _load(self, version):
+        """加载并预热指定版本，返回新推荐器（不切换）"""
+        start = time.time()
+        recommender = create_recommender_from_bundle(os.path.join(self.bundle_dir, version), driver=self.driver,
+                                                     recall_precision=self.recall_precision)
+        if self.driver is None:
+            self.driver = recommender.driver
+        recommender.warm_up()
+        print(f"🔥 {version} 加载并预热完成 ({(time.time() - start) * 1000:.0f}ms)")
+        return recommender
+
+    def _swap(self, version, recommender, rollback=False):
+        if rollback:
+            # 回滚：弹出目标版本及其之后的记录，被回滚的版本不入栈
+            if version in self.history:
+                del self.history[len(self.history) - 1 - self.history[::-1].index(version):]
+        elif self.version and self.version != version:
+            self.history.append(self.version)
+        self.active = recommender
+        self.version = version
+        self.activated_at = datetime.now().isoformat(timespec='seconds')
+        if self.on_swap is not None:
+            self.on_swap(recommender)
+        print(f"🔀 推荐模型已切换到 {version}")
+
+    def switch_to(self, version, publish=True, rollback=False):
+        """
+        同步加载、预热并切换到 version
+
+        Args:
+            publish: 是否写 CURRENT 指针，通知同目录的其他 worker
+            rollback: 是否为回滚（弹出回滚栈而不是压入当前版本）
+        """
+        with self._load_lock:
+            if version == self.version:
+                return self.active
+            self.loading = version
+            try:
+                recommender = self._load(version)
+                self._swap(version, recommender, rollback=rollback)
+                if publish:
+                    activate_version(self.bundle_dir, version)
+                self.last_error = None
+                self.failed_version = None
+                return recommender
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                self.failed_version = version
+                raise
+            finally:
+                self.loading = None
+
+    def load_current(self):
+        """启动时同步加载 CURRENT 指向的版本"""
+        version = current_version(self.bundle_dir)
+        if not version:
+            raise FileNotFoundError(f"未找到嵌入包: {self.bundle_dir}")
+        return self.switch_to(version, publish=False)
+
+    def activate(self, version, rollback=False):
+        """在后台加载并切换到 version，立即返回"""
+        if version not in list_versions(self.bundle_dir):
+            raise FileNotFoundError(f"版本不存在: {version}")
+        if self.loading:
+            raise RuntimeError(f"{self.loading} 正在加载中")
+        thread = threading.Thread(target=self._activate_quietly, args=(version, rollback),
+                                  name=f'model-load-{version}', daemon=True)
+        thread.start()
+        return thread
+
+    def _activate_quietly(self, version, rollback=False):
+        try:
+            self.switch_to(version, rollback=rollback)
+        except Exception as e:
+            print(f"❌ 推荐模型 {version} 加载失败，继续使用 {self.version}: {e}")
+
+    def previous_version(self):
+        """回滚目标：回滚栈顶（跳过已删除的版本），栈空时取目录中早于当前版本的最新版本"""
+        versions = list_versions(self.bundle_dir)
+        for version in reversed(self.history):
+            if version in versions and version != self.version:
+                return version
+        older = [v for v in versions if self.version is None or v < self.version]
+        return older[-1] if older else None
+
+    def rollback(self):
+        version = self.previous_version()
+        if version is None:
+            raise FileNotFoundError("没有可回滚的版本")
+        self.activate(version, rollback=True)
+        return version
+
+    # ==================== 跟随 CURRENT ====================
+
+    def check(self):
+        """CURRENT 被其他 worker 或命令行修改时跟随切换（指向回滚栈顶时按回滚处理）"""
+        version = current_version(self.bundle_dir)
+        if not version or version in (self.version, self.failed_version) or self.loading:
+            return False
+        self.switch_to(version, publish=False, rollback=version in self.history and version == self.previous_version())
+        return True
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ 推荐模型热切换失败: {e}")
+
+    def start(self):
+        thread = threading.Thread(target=self._loop, name='model-registry', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        """当前生效版本与可用版本（管理接口使用）"""
+        manifest = self.active.bundle.manifest if self.active is not None and hasattr(self.active, 'bundle') else {}
+        return {
+            'active_version': self.version,
+            'activated_at': self.activated_at,
+            'recall_precision': self.recall_precision,
+            'created_at': manifest.get('created_at'),
+            'counts': manifest.get('counts'),
+            'current_pointer': current_version(self.bundle_dir),
+            'loading': self.loading,
+            'last_error': self.last_error,
+            'previous_version': self.previous_version(),
+            'versions': list_versions(self.bundle_dir),
+        }
@@ -0,0 +1,144 @@
+"""
+负采样策略
+==========
+- uniform:    全体职位均匀采样（原 train.py 行为）
+- in_batch:   批内其他正样本的职位作为负样本（子图节点可复用）
+- popularity: 按职位在 applies 边中的度数^alpha 采样（热门职位更常作为负样本）
+- hard:       技能重叠困难负样本，沿 job -> skill -> job 游走得到与正样本职位共享技能的职位
+
+所有采样器接口一致: sample(src, pos_dst) -> neg_dst，与正样本一一对应。
+"""
+import torch
+
+TRAIN_EDGE = ('student', 'applies', 'job')
+SAMPLERS = ('uniform', 'in_batch', 'popularity', 'hard')
+
+
+def _csr(edge_index, num_src):
+    """按源节点排序的 CSR: (ptr, col)"""
+    src, dst = edge_index
+    order = torch.argsort(src, stable=True)
+    col = dst[order]
+    counts = torch.bincount(src, minlength=num_src)
+    ptr = torch.zeros(num_src + 1, dtype=torch.long)
+    ptr[1:] = torch.cumsum(counts, dim=0)
+    return ptr, col
+
+
+def _pick_neighbor(ptr, col, nodes):
+    """为每个节点随机选一个邻居，无邻居时返回 -1"""
+    start = ptr[nodes]
+    deg = ptr[nodes + 1] - start
+    offset = (torch.rand(nodes.numel()) * deg.clamp(min=1)).long()
+    picked = col[(start + offset).clamp(max=max(col.numel() - 1, 0))] if col.numel() else torch.full_like(nodes, -1)
+    return torch.where(deg > 0, picked, torch.full_like(picked, -1))
+
+
+class NegativeSampler:
+    """负采样基类"""
+
+    def __init__(self, data):
+        self.num_jobs = data['job'].num_nodes
+        src, dst = data[TRAIN_EDGE].edge_index.cpu()
+        # 正样本键 (student * num_jobs + job)，用于剔除采到的正样本
+        self.pos_keys = torch.unique(src * self.num_jobs + dst)
+
+    def sample(self, src, pos_dst):
+        raise NotImplementedError
+
+    def _uniform(self, n):
+        return torch.randint(0, self.num_jobs, (n,))
+
+    def _replace_positives(self, src, neg_dst):
+        """采到的正样本替换为均匀负样本（一轮即可，剩余碰撞概率可忽略）"""
+        keys = src * self.num_jobs + neg_dst
+        pos = torch.searchsorted(self.pos_keys, keys).clamp(max=max(self.pos_keys.numel() - 1, 0))
+        hit = self.pos_keys[pos] == keys if self.pos_keys.numel() else torch.zeros_like(keys, dtype=torch.bool)
+        if hit.any():
+            neg_dst = neg_dst.clone()
+            neg_dst[hit] = self._uniform(int(hit.sum()))
+        return neg_dst
+
+
+class UniformSampler(NegativeSampler):
+    def sample(self, src, pos_dst):
+        return self._uniform(src.numel())
+
+
+class InBatchSampler(NegativeSampler):
+    """
+    批内负采样
+    - 在每个 batch_size 大小的连续分块内打乱正样本职位
+    - 调用方需保证分块与训练批次对齐（全图模式下整体视为一个批次）
+    """
+
+    def __init__(self, data, batch_size):
+        super().__init__(data)
+        self.batch_size = batch_size
+
+    def sample(self, src, pos_dst):
+        n = pos_dst.numel()
+        chunk = torch.arange(n) // self.batch_size
+        # 分块内随机排列：按 (块号, 随机键) 排序
+        order = torch.argsort(chunk.double() + torch.rand(n).double() * 0.5)
+        neg_dst = pos_dst[order]
+        return self._replace_positives(src, neg_dst)
+
+
+class PopularitySampler(NegativeSampler):
+    """按职位热度（正样本度数^alpha）采样"""
+
+    def __init__(self, data, alpha=0.75):
+        super().__init__(data)
+        degree = torch.bincount(data[TRAIN_EDGE].edge_index[1].cpu(), minlength=self.num_jobs).double()
+        # +1 平滑，保证冷门职位也有被采到的机会
+        self.weights = (degree + 1).pow(alpha)
+
+    def sample(self, src, pos_dst):
+        neg_dst = torch.multinomial(self.weights, src.numel(), replacement=True)
+        return self._replace_positives(src, neg_dst)
+
+
+class HardNegativeSampler(NegativeSampler):
+    """
+    技能重叠困难负样本
+    - job -> skill 与 skill -> job 两个 CSR 索引来自 data_loader 构建的 Job-Skill 边
+    - hard_ratio 比例的负样本走 job -> skill -> job，其余均匀采样（纯困难负样本会导致训练不稳定）
+    """
+
+    def __init__(self, data, hard_ratio=0.5):
+        super().__init__(data)
+        self.hard_ratio = hard_ratio
+        num_skills = data['skill'].num_nodes
+        self.job_ptr, self.job_skills = _csr(data['job', 'to', 'skill'].edge_index.cpu(), self.num_jobs)
+        self.skill_ptr, self.skill_jobs = _csr(data['skill', 'to', 'job'].edge_index.cpu(), num_skills)
+
+    def sample(self, src, pos_dst):
+        n = src.numel()
+        neg_dst = self._uniform(n)
+
+        hard = torch.rand(n) < self.hard_ratio
+        if hard.any():
+            skills = _pick_neighbor(self.job_ptr, self.job_skills, pos_dst[hard])
+            jobs = torch.full_like(skills, -1)
+            has_skill = skills >= 0
+            if has_skill.any():
+                jobs[has_skill] = _pick_neighbor(self.skill_ptr, self.skill_jobs, skills[has_skill])
+            # 无技能的职位保留均匀负样本
+            hard_dst = torch.where(jobs >= 0, jobs, neg_dst[hard])
+            neg_dst[hard] = hard_dst
+
+        return self._replace_positives(src, neg_dst)
+
+
+def build_sampler(name, data, batch_size=None, hard_ratio=0.5, alpha=0.75):
+    """按名称创建负采样器"""
+    if name == 'uniform':
+        return UniformSampler(data)
+    if name == 'in_batch':
+        return InBatchSampler(data, batch_size or data[TRAIN_EDGE].edge_index.size(1))
+    if name == 'popularity':
+        return PopularitySampler(data, alpha=alpha)
+    if name == 'hard':
+        return HardNegativeSampler(data, hard_ratio=hard_ratio)
+    raise ValueError(f"未知的负采样策略: {name}，可选: {', '.join(SAMPLERS)}")
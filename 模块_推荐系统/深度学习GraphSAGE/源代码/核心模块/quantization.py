@@ -0,0 +1,83 @@
+"""
+召回向量的量化存储
+==================
+召回只需要从全部职位中挑出候选，不需要精确分数:
+- float16: 每个分量 2 字节
+- int8:    每个分量 1 字节 + 每行一个 float32 缩放系数（对称量化，scale = max|x| / 127）
+召回在量化矩阵上打分，取 top_k * rescore_factor 个候选后，再用 float32 原始向量精确重算排序。
+打分按块把量化向量转换为 float32，临时内存与块大小相关，与职位总数无关。
+"""
+from typing import Optional
+
+import numpy as np
+
+PRECISIONS = ('float32', 'float16', 'int8')
+# 分块打分/量化的行数
+SCORE_BLOCK = 65536
+
+
+def _quantize_int8(block):
+    scales = np.abs(block).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(block / scales[:, None]).clip(-127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class QuantizedMatrix:
+    """
+    按行量化的只读矩阵
+
+    Attributes:
+        codes: (n, dim) float16 或 int8
+        scales: (n,) float32，仅 int8 使用
+    """
+
+    def __init__(self, codes: np.ndarray, scales: Optional[np.ndarray] = None):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def quantize(cls, matrix: np.ndarray, precision: str, normalize: bool = False) -> 'QuantizedMatrix':
+        """
+        Args:
+            matrix: (n, dim) float32 矩阵（可以是内存映射）
+            precision: float16 / int8
+            normalize: 是否先逐行 L2 归一化（分块进行，不生成完整的 float32 副本）
+        """
+        if precision not in PRECISIONS[1:]:
+            raise ValueError(f"不支持的量化精度: {precision}，可选 {PRECISIONS[1:]}")
+        codes = np.empty(matrix.shape, dtype=np.float16 if precision == 'float16' else np.int8)
+        scales = np.empty(len(matrix), dtype=np.float32) if precision == 'int8' else None
+        for start in range(0, len(matrix), SCORE_BLOCK):
+            block = np.asarray(matrix[start:start + SCORE_BLOCK], dtype=np.float32)
+            if normalize:
+                norms = np.linalg.norm(block, axis=1, keepdims=True)
+                norms[norms == 0] = 1
+                block = block / norms
+            if scales is None:
+                codes[start:start + len(block)] = block
+            else:
+                codes[start:start + len(block)], scales[start:start + len(block)] = _quantize_int8(block)
+        return cls(codes, scales)
+
+    @property
+    def precision(self) -> str:
+        return 'int8' if self.scales is not None else 'float16'
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """全部行与 query 的近似内积"""
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        out = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), SCORE_BLOCK):
+            block = self.codes[start:start + SCORE_BLOCK].astype(np.float32)
+            np.dot(block, query, out=out[start:start + len(block)])
+        if self.scales is not None:
+            out *= self.scales
+        return out
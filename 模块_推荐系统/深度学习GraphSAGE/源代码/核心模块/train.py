@@ -1,5 +1,8 @@
 import sys
 print("🚀 Script starting...", flush=True)
+import argparse
+import copy
+import time
 import torch
 import torch.nn.functional as F
 from tqdm import tqdm
@@ -10,88 +13,291 @@ import numpy as np
 try:
     from data_loader import GraphDataLoader
     from model import RecommenderModel
+    from negative_sampling import build_sampler, SAMPLERS
+    from embedding_bundle import export_bundle, BUNDLE_DIR
 except ImportError as e:
     print(f"❌ 无法导入模块: {e}", flush=True)
     exit(1)
 
+TRAIN_EDGE = ('student', 'applies', 'job')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='GraphSAGE 职位推荐模型训练')
+    parser.add_argument('--mode', choices=['full', 'minibatch'], default='full',
+                        help='full: 全图训练; minibatch: 邻居采样小批量训练（内存与图规模无关）')
+    parser.add_argument('--data-path', default='graph_data.pt')
+    parser.add_argument('--epochs', type=int, default=200)
+    parser.add_argument('--lr', type=float, default=0.01)
+    parser.add_argument('--batch-size', type=int, default=2048, help='每批正样本边数（minibatch 模式）')
+    parser.add_argument('--num-neighbors', default='10,5',
+                        help='每层每种边类型的采样邻居数，逗号分隔，层数需与模型一致（minibatch 模式）')
+    parser.add_argument('--num-workers', type=int, default=0, help='采样进程数（minibatch 模式）')
+    parser.add_argument('--neg-sampler', choices=SAMPLERS, default='uniform', help='负采样策略')
+    parser.add_argument('--hard-ratio', type=float, default=0.5, help='hard 策略中困难负样本的比例')
+    parser.add_argument('--pop-alpha', type=float, default=0.75, help='popularity 策略的度数指数')
+    parser.add_argument('--eval-edges', type=int, default=20000,
+                        help='留出评估的正样本数（从训练图中移除，负样本为固定的均匀采样）')
+    parser.add_argument('--target-auc', type=float, default=0.91, help='记录达到该评估 AUC 的耗时')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--log-every', type=int, default=5)
+    parser.add_argument('--save-path', default='输出/模型权重/graphsage_model.pth')
+    parser.add_argument('--bundle-dir', default=BUNDLE_DIR, help='训练后导出嵌入包的目录，留空则不导出')
+    return parser.parse_args()
+
+
+def load_graph(data_path):
+    if os.path.exists(data_path):
+        print(f"📂 加载缓存数据: {data_path}", flush=True)
+        return torch.load(data_path, weights_only=False)
+
+    print("🔄 构建新数据...", flush=True)
+    loader = GraphDataLoader()
+    try:
+        data = loader.load_data()
+        torch.save(data, data_path)
+    finally:
+        loader.close()
+    return data
+
+
+def build_edge_labels(edge_index, sampler, chunk_size=None):
+    """
+    正样本 + 等量负样本
+    - chunk_size 不为空时按块交错排列 [正样本块, 对应负样本块]，使每个训练批次恰好包含
+      一块正样本及其负样本（批内负采样需要与批次对齐）
+    """
+    device = edge_index.device
+    edge_index = edge_index.cpu()
+    if chunk_size:
+        edge_index = edge_index[:, torch.randperm(edge_index.size(1))]
+    src, pos_dst = edge_index
+    neg_dst = sampler.sample(src, pos_dst)
+
+    n = src.size(0)
+    edge_label_index = torch.cat([edge_index, torch.stack([src, neg_dst], dim=0)], dim=1)
+    target = torch.cat([torch.ones(n), torch.zeros(n)])
+
+    if chunk_size:
+        order = torch.cat([
+            torch.cat([chunk, chunk + n]) for chunk in torch.arange(n).split(chunk_size)
+        ])
+        edge_label_index, target = edge_label_index[:, order], target[order]
+    return edge_label_index.to(device), target.to(device)
+
+
+def split_eval_edges(data, num_edges, seed):
+    """
+    留出评估集：按固定种子打乱 applies 边，前 num_edges 条作为评估正样本（最多一半），
+    并从训练图中移除——既不作为监督样本，也不参与消息传递，评估 AUC 衡量的是对未见边的泛化
+    负样本为固定的均匀采样，保证不同负采样策略的 AUC 可比
+
+    Returns:
+        (训练图, (评估边, 标签))；原图不修改，导出嵌入包时仍使用完整的图
+    """
+    generator = torch.Generator().manual_seed(seed)
+    edge_index = data[TRAIN_EDGE].edge_index.cpu()
+    total = edge_index.size(1)
+    n = min(num_edges, total // 2)
+    perm = torch.randperm(total, generator=generator)
+    pos = edge_index[:, perm[:n]]
+
+    train_data = copy.copy(data)
+    train_data[TRAIN_EDGE].edge_index = edge_index[:, torch.sort(perm[n:]).values]
+
+    neg_dst = torch.randint(0, data['job'].num_nodes, (n,), generator=generator)
+    edge_label_index = torch.cat([pos, torch.stack([pos[0], neg_dst], dim=0)], dim=1)
+    target = torch.cat([torch.ones(n), torch.zeros(n)])
+    return train_data, (edge_label_index, target)
+
+
+class AucTracker:
+    """记录评估 AUC 首次达到目标值的耗时"""
+
+    def __init__(self, target):
+        self.target = target
+        self.start = time.time()
+        self.reached = None
+
+    def update(self, epoch, auc):
+        if self.reached is None and auc >= self.target:
+            self.reached = (epoch, time.time() - self.start)
+            print(f"⏱️  评估 AUC 达到 {self.target:.2f}: Epoch {epoch}, 用时 {self.reached[1]:.1f}s", flush=True)
+
+    def summary(self):
+        total = time.time() - self.start
+        if self.reached:
+            print(f"\n⏱️  Time-to-AUC({self.target:.2f}): {self.reached[1]:.1f}s (Epoch {self.reached[0]}), 总训练时间 {total:.1f}s", flush=True)
+        else:
+            print(f"\n⏱️  未达到目标 AUC {self.target:.2f}，总训练时间 {total:.1f}s", flush=True)
+
+
+def auc_score(prob, label):
+    from sklearn.metrics import roc_auc_score
+    try:
+        return roc_auc_score(label, prob)
+    except Exception:
+        return float('nan')
+
+
+def log_auc(epoch, loss, prob, label, elapsed, eval_auc=None):
+    auc = auc_score(prob, label)
+    eval_str = f", Eval AUC: {eval_auc:.4f}" if eval_auc is not None else ""
+    print(f"Epoch: {epoch:03d}, Loss: {loss:.4f}, Train AUC: {auc:.4f}{eval_str}, Time: {elapsed:.1f}s", flush=True)
+
+
+def train_full(model, optimizer, data, args, device, sampler, eval_set, tracker):
+    """全图训练：每个 epoch 编码整张图"""
+    data = data.to(device)
+    edge_index = data[TRAIN_EDGE].edge_index
+    eval_label_index = eval_set[0].to(device)
+    start = time.time()
+
+    model.train()
+    for epoch in range(1, args.epochs + 1):
+        optimizer.zero_grad()
+
+        edge_label_index, target = build_edge_labels(edge_index, sampler)
+        pred = model(data.x_dict, data.edge_index_dict, edge_label_index).squeeze()
+
+        loss = F.binary_cross_entropy_with_logits(pred, target)
+        loss.backward()
+        optimizer.step()
+
+        if epoch % args.log_every == 0:
+            with torch.no_grad():
+                eval_pred = model(data.x_dict, data.edge_index_dict, eval_label_index).view(-1)
+                eval_auc = auc_score(eval_pred.sigmoid().cpu().numpy(), eval_set[1].numpy())
+                tracker.update(epoch, eval_auc)
+                log_auc(epoch, loss, pred.sigmoid().cpu().numpy(), target.cpu().numpy(), time.time() - start, eval_auc)
+
+
+def make_link_loader(data, edge_label_index, edge_label, args, shuffle):
+    """
+    异构邻居采样加载器
+    - 以监督边两端节点为种子，按 num_neighbors 逐层采样子图
+    """
+    from torch_geometric.loader import LinkNeighborLoader
+
+    num_neighbors = [int(n) for n in args.num_neighbors.split(',')]
+    return LinkNeighborLoader(
+        data,
+        num_neighbors=num_neighbors,
+        edge_label_index=(TRAIN_EDGE, edge_label_index),
+        edge_label=edge_label,
+        batch_size=args.batch_size * 2,  # 正负样本各占一半
+        shuffle=shuffle,
+        num_workers=args.num_workers,
+    )
+
+
+def evaluate_minibatch(model, data, eval_set, args, device):
+    """按相同的邻居采样配置分批推理评估集"""
+    loader = make_link_loader(data, eval_set[0], eval_set[1], args, shuffle=False)
+    probs, labels = [], []
+    with torch.no_grad():
+        for batch in loader:
+            batch = batch.to(device)
+            pred = model(batch.x_dict, batch.edge_index_dict, batch[TRAIN_EDGE].edge_label_index).view(-1)
+            probs.append(pred.sigmoid().cpu())
+            labels.append(batch[TRAIN_EDGE].edge_label.cpu())
+    return auc_score(torch.cat(probs).numpy(), torch.cat(labels).numpy())
+
+
+def train_minibatch(model, optimizer, data, args, device, sampler, eval_set, tracker):
+    """
+    邻居采样小批量训练
+    - 图数据保留在 CPU，每批只把采样子图搬到 device
+    - 峰值内存取决于 batch_size 与 fan-out，而不是全图规模
+    """
+    edge_index = data[TRAIN_EDGE].edge_index
+    start = time.time()
+
+    model.train()
+    for epoch in range(1, args.epochs + 1):
+        # 按批次交错排列正负样本，关闭加载器的打乱以保持批内负样本与正样本同批
+        edge_label_index, edge_label = build_edge_labels(edge_index, sampler, chunk_size=args.batch_size)
+        loader = make_link_loader(data, edge_label_index, edge_label, args, shuffle=False)
+
+        total_loss, total_count = 0.0, 0
+        probs, labels = [], []
+        for batch in loader:
+            batch = batch.to(device)
+            optimizer.zero_grad()
+
+            target = batch[TRAIN_EDGE].edge_label
+            pred = model(batch.x_dict, batch.edge_index_dict, batch[TRAIN_EDGE].edge_label_index).view(-1)
+
+            loss = F.binary_cross_entropy_with_logits(pred, target)
+            loss.backward()
+            optimizer.step()
+
+            total_loss += float(loss) * target.numel()
+            total_count += target.numel()
+            if epoch % args.log_every == 0:
+                probs.append(pred.detach().sigmoid().cpu())
+                labels.append(target.cpu())
+
+        if epoch % args.log_every == 0:
+            eval_auc = evaluate_minibatch(model, data, eval_set, args, device)
+            tracker.update(epoch, eval_auc)
+            log_auc(epoch, total_loss / max(total_count, 1),
+                    torch.cat(probs).numpy(), torch.cat(labels).numpy(), time.time() - start, eval_auc)
+
+
 def train():
+    args = parse_args()
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     print(f"🚀 使用设备: {device}", flush=True)
 
     # 1. 加载数据
-    data_path = 'graph_data.pt'
-    if os.path.exists(data_path):
-        print(f"📂 加载缓存数据: {data_path}", flush=True)
-        data = torch.load(data_path, weights_only=False)
-    else:
-        print("🔄 构建新数据...", flush=True)
-        loader = GraphDataLoader()
-        try:
-            data = loader.load_data()
-            torch.save(data, data_path)
-        finally:
-            loader.close()
-            
-    data = data.to(device)
-    
-    # 2. 初始化模型
-    model = RecommenderModel(data.metadata(), hidden_channels=64, out_channels=32).to(device)
-    optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
-    
-    if ('student', 'applies', 'job') not in data.edge_index_dict:
+    data = load_graph(args.data_path)
+
+    if TRAIN_EDGE not in data.edge_index_dict:
         print("❌ 错误: 图数据中缺少 'applies' 边，无法训练。", flush=True)
         return
 
-    edge_index = data['student', 'applies', 'job'].edge_index
-    print(f"📈 训练样本数: {edge_index.size(1)}", flush=True)
-    
+    # 2. 初始化模型
+    model = RecommenderModel(data.metadata(), hidden_channels=64, out_channels=32).to(device)
+    optimizer = torch.optim.Adam(model.parameters(), lr=args.lr)
+
+    # 留出评估边（训练图中不含这些边）
+    train_data, eval_set = split_eval_edges(data, args.eval_edges, args.seed)
+    edge_index = train_data[TRAIN_EDGE].edge_index
+    print(f"📈 训练样本数: {edge_index.size(1)}, 留出评估: {eval_set[1].numel() // 2}", flush=True)
+
     # 检查数据质量
     for k, v in data.x_dict.items():
         if torch.isnan(v).any():
             print(f"❌ Node feature '{k}' has NaN!", flush=True)
         else:
             print(f"✅ Node feature '{k}' OK.", flush=True)
-    
-    # 3. 训练循环
-    print("\nStarting Training...", flush=True)
-    model.train()
-    
-    for epoch in range(1, 201):
-        optimizer.zero_grad()
-        
-        src, pos_dst = edge_index
-        num_nodes = data['job'].num_nodes
-        neg_dst = torch.randint(0, num_nodes, (src.size(0),), device=device)
-        
-        pos_edge_label_index = edge_index
-        neg_edge_label_index = torch.stack([src, neg_dst], dim=0)
-        edge_label_index = torch.cat([pos_edge_label_index, neg_edge_label_index], dim=1)
-        
-        pos_label = torch.ones(pos_edge_label_index.size(1), device=device)
-        neg_label = torch.zeros(neg_edge_label_index.size(1), device=device)
-        target = torch.cat([pos_label, neg_label])
-        
-        pred = model(data.x_dict, data.edge_index_dict, edge_label_index).squeeze()
-        
-        loss = F.binary_cross_entropy_with_logits(pred, target)
-        loss.backward()
-        optimizer.step()
-        
-        if epoch % 5 == 0:
-            with torch.no_grad():
-                from sklearn.metrics import roc_auc_score
-                prob = pred.sigmoid().cpu().numpy()
-                label = target.cpu().numpy()
-                try:
-                    auc = roc_auc_score(label, prob)
-                    print(f"Epoch: {epoch:03d}, Loss: {loss:.4f}, Train AUC: {auc:.4f}", flush=True)
-                except:
-                    print(f"Epoch: {epoch:03d}, Loss: {loss:.4f}", flush=True)
-
-    os.makedirs('输出/模型权重', exist_ok=True)
-    save_path = '输出/模型权重/graphsage_model.pth'
-    torch.save(model.state_dict(), save_path)
-    print(f"\n✅ 模型已保存到: {save_path}", flush=True)
+
+    # 3. 负采样与评估集
+    torch.manual_seed(args.seed)
+    batch_size = args.batch_size if args.mode == 'minibatch' else None
+    sampler = build_sampler(args.neg_sampler, train_data, batch_size=batch_size,
+                            hard_ratio=args.hard_ratio, alpha=args.pop_alpha)
+    tracker = AucTracker(args.target_auc)
+    print(f"🎯 负采样策略: {args.neg_sampler}, 评估集: {eval_set[1].numel()} 条边", flush=True)
+
+    # 4. 训练循环
+    print(f"\nStarting Training ({args.mode})...", flush=True)
+    if args.mode == 'minibatch':
+        print(f"   batch_size={args.batch_size}, num_neighbors=[{args.num_neighbors}], num_workers={args.num_workers}", flush=True)
+        train_minibatch(model, optimizer, train_data, args, device, sampler, eval_set, tracker)
+    else:
+        train_full(model, optimizer, train_data, args, device, sampler, eval_set, tracker)
+    tracker.summary()
+
+    os.makedirs(os.path.dirname(args.save_path), exist_ok=True)
+    torch.save(model.state_dict(), args.save_path)
+    print(f"\n✅ 模型已保存到: {args.save_path}", flush=True)
+
+    # 5. 导出嵌入包（服务启动直接映射，不再执行编码器前向；使用包含留出边的完整图）
+    if args.bundle_dir:
+        export_bundle(model.cpu(), data.cpu(), args.bundle_dir,
+                      sources={'model': os.path.abspath(args.save_path), 'data': os.path.abspath(args.data_path)})
 
 if __name__ == "__main__":
     train()
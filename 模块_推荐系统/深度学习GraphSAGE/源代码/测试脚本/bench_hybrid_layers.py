@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HybridRecommender 分层微基准
+============================
+使用随机嵌入 + 内存桩驱动构建推荐器（无需 Neo4j / 训练好的模型），
+在不同职位规模与嵌入维度下测量各层的:
+- 延迟 (p50 / p95 / mean)
+- 内存峰值 (tracemalloc)
+- 净增分配块数 / 净增内存
+
+用法:
+    python bench_hybrid_layers.py                                  # 默认网格
+    python bench_hybrid_layers.py --jobs 10000,100000 --dims 32,128 --repeat 20
+    python bench_hybrid_layers.py --db-latency-ms 0.5              # 模拟 Neo4j 往返延迟
+    python bench_hybrid_layers.py --precisions float32,float16,int8  # 量化召回，附 Recall@K 对齐率
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '核心模块'))
+
+from hybrid_recommender import HybridRecommender
+from embedding_store import EmbeddingStore
+from model import LinkPredictor
+
+EDUCATIONS = ['不限', '大专', '本科', '硕士', '博士']
+TITLES = ['Java后端开发', '前端工程师', '算法工程师', '数据分析师', '测试工程师', '运维工程师', '嵌入式开发', '产品经理']
+SKILLS = [f"skill_{i}" for i in range(2000)]
+COURSES = {f"course_{i}": random.Random(i).sample(SKILLS, 3) for i in range(200)}
+
+
+# ==================== 桩驱动 ====================
+
+class _StubResult:
+    def __init__(self, records):
+        self._records = records
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def __iter__(self):
+        return iter(self._records)
+
+
+class _StubSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        params = dict(parameters or {}, **kwargs)
+        self.driver.calls += 1
+        if self.driver.latency:
+            time.sleep(self.driver.latency)
+        return _StubResult(self.driver.answer(query, params))
+
+
+class StubDriver:
+    """
+    按查询特征返回合成结果的内存驱动
+    - 覆盖 HybridRecommender 使用到的全部查询
+    """
+
+    def __init__(self, job_ids, seed=0, latency_ms=0.0):
+        rng = random.Random(seed)
+        self.latency = latency_ms / 1000.0
+        self.calls = 0
+        self.job_info = {
+            jid: {'title': rng.choice(TITLES), 'education': rng.choice(EDUCATIONS), 'city': rng.choice(['北京', '上海', '深圳'])}
+            for jid in job_ids
+        }
+        self.job_skills = {jid: rng.sample(SKILLS[:300], 5) for jid in job_ids[:1000]}
+
+    def session(self, **kwargs):
+        return _StubSession(self)
+
+    def close(self):
+        pass
+
+    def answer(self, query, params):
+        if 'overlap_count' in query:
+            skills = self.job_skills.get(params.get('job_suffix'), SKILLS[:5])
+            matched = skills[:2]
+            return [{'overlap_count': len(matched), 'matched_skills': matched, 'required_count': len(skills),
+                     'direct_skills': matched[:1], 'course_skills': matched[1:]}]
+        if 'stu_edu' in query:
+            return [{'stu_edu': '本科', 'job_edu': self.job_info.get(params.get('job_suffix'), {}).get('education')}]
+        if 'TEACHES_SKILL' in query:
+            return [{'skill': s} for c in params.get('courses', []) for s in COURSES.get(c, [])]
+        if 'j.title AS title' in query:
+            job_ids = params.get('job_ids', self.job_info.keys())
+            return [{'id': j, 'title': self.job_info[j]['title'], 'education': self.job_info[j]['education']}
+                    for j in job_ids if j in self.job_info]
+        if 'j.url IN $job_ids' in query:
+            return [{'job_id': j} for j in params.get('job_ids', []) if self.job_info.get(j, {}).get('city') == params.get('city')]
+        return []
+
+
+# ==================== 推荐器构建 ====================
+
+def build_recommender(num_jobs, dim, num_students, seed, latency_ms, precision='float32'):
+    """用随机嵌入构建推荐器，嵌入存储形式与 create_recommender_from_trained_model 一致（每种节点一个矩阵）"""
+    torch.manual_seed(seed)
+    job_ids = [f"bench_job_{i:07d}" for i in range(num_jobs)]
+    student_ids = [f"STU{i:04d}" for i in range(1, num_students + 1)]
+
+    job_matrix = torch.randn(num_jobs, dim)
+    student_matrix = torch.randn(num_students, dim)
+    skill_matrix = torch.randn(len(SKILLS), dim)
+
+    node_embeddings = EmbeddingStore(dim)
+    node_embeddings.add('student', student_matrix.numpy(), student_ids)
+    node_embeddings.add('job', job_matrix.numpy(), job_ids)
+    node_embeddings.add('skill', skill_matrix.numpy(), SKILLS)
+
+    predictor = LinkPredictor(dim)
+    driver = StubDriver(job_ids, seed=seed, latency_ms=latency_ms)
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        recommender = HybridRecommender(
+            node_embeddings=node_embeddings,
+            link_predictor=predictor,
+            neo4j_driver=driver,
+            job_mapping={i: jid for i, jid in enumerate(job_ids)},
+            embedding_dim=dim,
+            recall_precision=precision
+        )
+    return recommender, student_ids
+
+
+# ==================== 测量 ====================
+
+def _percentile(values, p):
+    return float(np.percentile(values, p)) if values else 0.0
+
+
+def measure(fn, repeat, warmup):
+    """
+    测量单层
+    - 计时轮次不开启 tracemalloc，避免追踪开销污染延迟
+    - 额外执行一次追踪轮次统计内存峰值与净增分配
+    """
+    devnull = open(os.devnull, 'w')
+    try:
+        with redirect_stdout(devnull):
+            for i in range(warmup):
+                fn(i)
+
+            latencies = []
+            for i in range(repeat):
+                start = time.perf_counter()
+                fn(i)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            base_current, _ = tracemalloc.get_traced_memory()
+            result = fn(0)
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            del result
+    finally:
+        devnull.close()
+
+    diff = after.compare_to(before, 'filename')
+    return {
+        'latency_ms': {
+            'mean': round(float(np.mean(latencies)), 3),
+            'p50': round(_percentile(latencies, 50), 3),
+            'p95': round(_percentile(latencies, 95), 3),
+        },
+        'peak_kb': round((peak - base_current) / 1024, 1),
+        'retained_kb': round((current - base_current) / 1024, 1),
+        'net_blocks': int(sum(stat.count_diff for stat in diff)),
+    }
+
+
+def recall_parity(recommender, students, k):
+    """
+    量化召回与 float32 精确召回的 Recall@K 对齐率
+    - 参照结果直接在 float32 向量表上分块计算余弦相似度，不额外构建推荐器
+    """
+    job_matrix = recommender.job_embeddings_np
+    norms = np.linalg.norm(job_matrix, axis=1)
+    norms[norms == 0] = 1
+    overlaps = []
+    for sid in students:
+        query = np.asarray(recommender._get_student_embedding(sid), dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        exact = (job_matrix @ query) / norms
+        expected = set(recommender.job_indices[np.argpartition(-exact, k - 1)[:k]].tolist())
+        overlaps.append(len(expected & set(recommender.recall(sid, k))) / k)
+    return round(float(np.mean(overlaps)), 4)
+
+
+def bench_config(num_jobs, dim, args, precision='float32'):
+    gc.collect()
+    build_start = time.perf_counter()
+    recommender, student_ids = build_recommender(num_jobs, dim, args.students, args.seed, args.db_latency_ms,
+                                                 precision)
+    build_s = time.perf_counter() - build_start
+
+    rng = random.Random(args.seed)
+    students = [rng.choice(student_ids) for _ in range(args.repeat + args.warmup)]
+    course_names = list(COURSES.keys())
+    course_picks = [rng.sample(course_names, 4) for _ in students]
+
+    # 预先准备各层输入，保证单层测量互不依赖
+    candidates = [recommender.recall(s, args.recall_k) for s in students[:args.warmup + 1]]
+    ranked = [recommender.rank(students[i], candidates[i]) for i in range(len(candidates))]
+
+    def pick(i):
+        return i % len(candidates)
+
+    layers = {
+        'recall': lambda i: recommender.recall(students[i], args.recall_k),
+        'rank': lambda i: recommender.rank(students[pick(i)], candidates[pick(i)]),
+        'fuse_and_explain': lambda i: recommender.fuse_and_explain(students[pick(i)], ranked[pick(i)], args.rank_k),
+        'recommend_pure_dl': lambda i: recommender.recommend_pure_dl(
+            students[i], top_k=args.rank_k, education='本科', expected_position='后端开发',
+            courses=course_picks[i]
+        ),
+    }
+
+    recall_matrix = recommender.recall_index if recommender.recall_index is not None \
+        else recommender.job_embeddings_normalized
+    result = {'jobs': num_jobs, 'dim': dim, 'precision': precision, 'build_s': round(build_s, 2),
+              'recall_index_mb': round(recall_matrix.nbytes / 1024 / 1024, 1), 'layers': {}}
+    if precision != 'float32':
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            result['recall_parity'] = recall_parity(recommender, students[:args.parity_students],
+                                                    min(args.recall_k, num_jobs))
+    for name, fn in layers.items():
+        driver_calls = recommender.driver.calls
+        result['layers'][name] = measure(fn, args.repeat, args.warmup)
+        total_runs = args.repeat + args.warmup + 1
+        result['layers'][name]['db_calls_per_call'] = round((recommender.driver.calls - driver_calls) / total_runs, 1)
+
+    del recommender, candidates, ranked
+    gc.collect()
+    return result
+
+
+def print_result(r):
+    parity = f", Recall@K 对齐率 {r['recall_parity']:.4f}" if 'recall_parity' in r else ''
+    print(f"\n📐 jobs={r['jobs']:,} dim={r['dim']} precision={r['precision']} "
+          f"(构建 {r['build_s']:.1f}s, 召回索引 {r['recall_index_mb']}MB{parity})")
+    print(f"   {'层':<20}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'峰值 KB':>12}{'净增 KB':>10}{'净增块':>9}{'DB调用':>8}")
+    for name, m in r['layers'].items():
+        lat = m['latency_ms']
+        print(f"   {name:<20}{lat['mean']:>10.2f}{lat['p50']:>10.2f}{lat['p95']:>10.2f}"
+              f"{m['peak_kb']:>12.1f}{m['retained_kb']:>10.1f}{m['net_blocks']:>9}{m['db_calls_per_call']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HybridRecommender 分层微基准')
+    parser.add_argument('--jobs', default='10000,100000,1000000,5000000', help='职位规模，逗号分隔')
+    parser.add_argument('--dims', default='32,64,128,256', help='嵌入维度，逗号分隔')
+    parser.add_argument('--students', type=int, default=1000, help='学生数')
+    parser.add_argument('--recall-k', type=int, default=500)
+    parser.add_argument('--rank-k', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=10, help='每层计时轮次')
+    parser.add_argument('--warmup', type=int, default=2, help='每层预热轮次')
+    parser.add_argument('--db-latency-ms', type=float, default=0.0, help='桩驱动每次查询的模拟延迟')
+    parser.add_argument('--precisions', default='float32', help='召回精度，逗号分隔（float32,float16,int8）')
+    parser.add_argument('--parity-students', type=int, default=50, help='计算 Recall@K 对齐率的学生数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', '-o', default='', help='结果 JSON 路径')
+    args = parser.parse_args()
+
+    job_scales = [int(x) for x in args.jobs.split(',') if x]
+    dims = [int(x) for x in args.dims.split(',') if x]
+    precisions = [x for x in args.precisions.split(',') if x]
+
+    print("=" * 70)
+    print("🧪 HybridRecommender 分层微基准")
+    print(f"📅 测试时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"   职位规模: {job_scales} | 嵌入维度: {dims} | 召回精度: {precisions} | 计时轮次: {args.repeat}")
+    print("=" * 70)
+
+    results = []
+    for num_jobs in job_scales:
+        for dim in dims:
+            for precision in precisions:
+                r = bench_config(num_jobs, dim, args, precision)
+                print_result(r)
+                results.append(r)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'args': vars(args),
+        'results': results,
+    }
+    output = args.output or os.path.join('输出', f"bench_hybrid_layers_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'=' * 70}")
+    print(f"✅ 基准完成！结果已保存到: {output}")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
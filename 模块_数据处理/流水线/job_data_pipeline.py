@@ -16,12 +16,17 @@
 
 import os
 import re
+import sys
 import json
 import argparse
 import pandas as pd
 from datetime import datetime
 from neo4j import GraphDatabase
 
+# 复用后端的技能名规范化索引
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+from common.skill_normalizer import SkillIndex, SKILL_NAME_QUERY
+
 # ==================== 配置加载 ====================
 def load_config():
     """加载配置文件"""
@@ -232,6 +237,11 @@ class Neo4jUploader:
             print(f"📊 当前数据库: {total_nodes:,} 个节点, {total_rels:,} 条关系")
         except Exception as e:
             print(f"⚠️  无法获取数据库统计: {e}")
+        
+        # 已有技能词表：新技能折叠到图中已有的写法（python -> Python），不产生大小写/全半角变体
+        with self.driver.session() as session:
+            self.skill_index = SkillIndex(r["name"] for r in session.run(SKILL_NAME_QUERY))
+        print(f"🏷️  已有技能: {len(self.skill_index)} 个规范键")
     
     def close(self):
         self.driver.close()
@@ -292,7 +302,8 @@ class Neo4jUploader:
                     j.salary_min = $salary_min,
                     j.salary_max = $salary_max,
                     j.annual_months = $annual_months,
-                    j.publish_time = $publish_time
+                    j.publish_time = $publish_time,
+                    j.updated_at = datetime()
             """,
                 url=job_url,
                 title=job_data.get('职位', ''),
@@ -328,7 +339,9 @@ class Neo4jUploader:
                 for skill in skill_list:
                     skill = skill.strip()
                     if skill and len(skill) >= 2:
+                        skill = self.skill_index.canonical(skill) or skill
                         session.run("MERGE (s:Skill {name: $name})", name=skill)
+                        self.skill_index.add(skill)
                         session.run("""
                             MATCH (j:Job {url: $url})
                             MATCH (s:Skill {name: $skill})